@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import contractors, forbidden_words, mcc_codes, scan_results, scan_sessions, users, auth, dashboard
+from app.api.v1.endpoints import contractors, forbidden_words, mcc_codes, scan_results, scan_sessions, users, auth, dashboard, deletion_jobs
 
 api_router = APIRouter()
 
@@ -14,4 +14,5 @@ api_router.include_router(mcc_codes.router, prefix="/mcc-codes", tags=["mcc-code
 api_router.include_router(scan_results.router, prefix="/scan-results", tags=["scan-results"])
 api_router.include_router(scan_sessions.router, prefix="/scan-sessions", tags=["scan-sessions"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"]) 
\ No newline at end of file
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(deletion_jobs.router, prefix="/deletion-jobs", tags=["deletion-jobs"]) 
\ No newline at end of file
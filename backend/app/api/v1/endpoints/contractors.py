@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional, Dict, Any
 from app.models.contractor import Contractor
 from app.models.scan_session import ScanSession
@@ -9,40 +9,70 @@ from app.core.auth import get_current_user
 from app.schemas.contractor import ContractorCreate, ContractorUpdate, ContractorResponse
 from app.schemas.violation import WebPageDetailResponse
 from app.services.queue_service import queue_service
-from tortoise.functions import Sum
+from app.services.blob_store import blob_store
+from app.services.deletion_service import deletion_service
+from tortoise.expressions import F
+from tortoise.functions import Coalesce, Sum
+from tortoise.queryset import QuerySet
 
 
 router = APIRouter()
 
+# Суммы по сессиям контрагента: поле ответа списка -> поле ScanSession
+SESSION_TOTALS = {
+    'total_pages': 'pages_scanned',
+    'scanned_pages': 'pages_with_violations',
+    'violations_found': 'total_violations',
+}
+# Сортировка списка: поля контрагента и суммы по сессиям, '-' в начале - по убыванию
+SORT_FIELDS = ('id', 'name', 'domain', 'created_at', *SESSION_TOTALS)
+
+
+def with_session_totals(query: QuerySet) -> QuerySet:
+    """Суммы по сессиям контрагентов в том же запросе (LEFT JOIN и GROUP BY), без сессий - 0"""
+    return query.annotate(**{
+        f'sessions_{field}': Coalesce(Sum(f'scan_sessions__{field}'), 0)
+        for field in SESSION_TOTALS.values()
+    })
+
 
 @router.get("/")
 async def get_contractors(
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    sort: str = Query('id', pattern=f"^-?({'|'.join(SORT_FIELDS)})$", description="Поле сортировки, '-' - по убыванию"),
+    min_pages: Optional[int] = Query(None, ge=0, description="Не меньше просканированных страниц (total_pages)"),
+    min_violations: Optional[int] = Query(None, ge=0, description="Не меньше нарушений (violations_found)"),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    """Получение списка контрагентов"""
-    # Подсчитываем общее количество контрагентов
-    total_contractors = await Contractor.all().count()
+    """Получение списка контрагентов с суммами по их сессиям сканирования"""
+    query = with_session_totals(Contractor.all())
+    if min_pages is not None:
+        query = query.filter(sessions_pages_scanned__gte=min_pages)
+    if min_violations is not None:
+        query = query.filter(sessions_total_violations__gte=min_violations)
+    
+    # Подсчитываем общее количество контрагентов (без фильтров - без группировки)
+    if min_pages is None and min_violations is None:
+        total_contractors = await Contractor.all().count()
+    else:
+        total_contractors = await query.count()
     
     # Вычисляем смещение для пагинации
     offset = (page - 1) * page_size
     
-    contractors = await Contractor.all().order_by('id').offset(offset).limit(page_size)
-    contractors_response = [ContractorResponse.from_orm(contractor) for contractor in contractors]
+    field = sort.lstrip('-')
+    order = sort[:-len(field)] + (f'sessions_{SESSION_TOTALS[field]}' if field in SESSION_TOTALS else field)
+    # id - для стабильного порядка страниц при одинаковых значениях
+    order_by = [order] if field == 'id' else [order, 'id']
     
-    for contractor in contractors_response:
-        result = await ScanSession.filter(
-            contractor_id=contractor.id
-        ).annotate(
-            pages_scanned=Sum('pages_scanned'),
-            pages_with_violations=Sum('pages_with_violations'),
-            total_violations=Sum('total_violations')
-
-        ).values('pages_scanned', 'pages_with_violations', 'total_violations')
-        contractor.total_pages = result[0].get('pages_scanned')
-        contractor.scanned_pages = result[0].get('pages_with_violations')
-        contractor.violations_found = result[0].get('total_violations')
+    contractors = await query.order_by(*order_by).offset(offset).limit(page_size)
+    contractors_response = []
+    for contractor in contractors:
+        response = ContractorResponse.from_orm(contractor)
+        for response_field, session_field in SESSION_TOTALS.items():
+            setattr(response, response_field, getattr(contractor, f'sessions_{session_field}'))
+        contractors_response.append(response)
     
     # Вычисляем общее количество страниц
     total_pages = (total_contractors + page_size - 1) // page_size
@@ -74,22 +104,14 @@ async def create_contractor(
 @router.get("/{contractor_id}", response_model=ContractorResponse)
 async def get_contractor(contractor_id: int, current_user: User = Depends(get_current_user)):
     """Получение контрагента по ID"""
-    contractor = await Contractor.get_or_none(id=contractor_id)
+    contractor = await with_session_totals(Contractor.filter(id=contractor_id)).first()
     if not contractor:
         raise HTTPException(status_code=404, detail="Contractor not found")
-    contractor = ContractorResponse.from_orm(contractor)
-
-    result = await ScanSession.filter(
-        contractor_id=contractor.id
-    ).annotate(
-        pages_scanned=Sum('pages_scanned'),
-        total_violations=Sum('total_violations')
-
-    ).values('pages_scanned', 'total_violations')
-    contractor.total_pages = result[0].get('pages_scanned')
-    contractor.scanned_pages = result[0].get('pages_scanned')
-    contractor.violations_found = result[0].get('total_violations')
-    return contractor
+    response = ContractorResponse.from_orm(contractor)
+    response.total_pages = contractor.sessions_pages_scanned
+    response.scanned_pages = contractor.sessions_pages_scanned
+    response.violations_found = contractor.sessions_total_violations
+    return response
 
 @router.put("/{contractor_id}", response_model=ContractorResponse)
 async def update_contractor(
@@ -102,20 +124,28 @@ async def update_contractor(
     if not contractor:
         raise HTTPException(status_code=404, detail="Contractor not found")
     
-    for field, value in contractor_data.dict(exclude_unset=True).items():
+    update_data = contractor_data.dict(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(contractor, field, value)
     
-    await contractor.save()
+    # Сохраняем только переданные поля, чтобы не затереть счетчики, которые параллельно обновляет сканер
+    if update_data:
+        await contractor.save(update_fields=[*update_data, 'updated_at'])
     return ContractorResponse.from_orm(contractor)
 
 @router.delete("/{contractor_id}")
-async def delete_contractor(contractor_id: int, current_user: User = Depends(get_current_user)):
-    """Удаление контрагента"""
-    contractor = await Contractor.get_or_none(id=contractor_id)
-    if not contractor:
+async def delete_contractor(contractor_id: int, response: Response, current_user: User = Depends(get_current_user)):
+    """Удаление контрагента с сессиями, страницами и нарушениями
+
+    Контрагент с большим числом страниц удаляется в фоне: ответ 202 с id задания удаления.
+    """
+    if not await Contractor.exists(id=contractor_id):
         raise HTTPException(status_code=404, detail="Contractor not found")
     
-    await contractor.delete()
+    job = await deletion_service.delete('contractor', contractor_id, current_user)
+    if job:
+        response.status_code = 202
+        return {"message": "Contractor deletion scheduled", "job_id": job.id}
     return {"message": "Contractor deleted successfully"}
 
 @router.post("/{contractor_id}/scan")
@@ -127,9 +157,16 @@ async def start_scan(contractor_id: int, current_user: User = Depends(get_curren
     
     # Создаем новую сессию сканирования
     from app.models.scan_session import ScanSession
+    # Стартовая задача учитывается сразу: сессия завершится, когда обработаны все задачи
     session = await ScanSession.create(
         contractor=contractor,
-        status='running'
+        status='running',
+        pending_tasks=1,
+        tasks_queued=1
+    )
+    await Contractor.filter(id=contractor.id).update(
+        scan_sessions_count=F('scan_sessions_count') + 1,
+        last_session_violations=0
     )
     
     # Добавляем задачу в очередь с session_id
@@ -199,6 +236,7 @@ async def get_contractor_pages(
 async def get_page_details(
     contractor_id: int, 
     page_id: int, 
+    include_content: bool = Query(False, description="Вернуть HTML и текст страницы"),
     current_user: User = Depends(get_current_user)
 ):
     """Получение деталей страницы с нарушениями"""
@@ -229,6 +267,9 @@ async def get_page_details(
             "created_at": violation.created_at
         })
     
+    # Контент хранится отдельно от страницы и загружается, только если нужен
+    content, text_content = await blob_store.page_content(page) if include_content else (None, None)
+    
     return {
         "id": page.id,
         "url": page.url,
@@ -237,6 +278,10 @@ async def get_page_details(
         "status": page.status,
         "http_status": page.http_status,
         "response_time": page.response_time,
+        "content_bytes": page.content_bytes,
+        "content_truncated": page.content_truncated,
+        "content": content,
+        "text_content": text_content,
         "violations_found": page.violations_found,
         "violations_count": page.violations_count,
         "last_scanned": page.last_scanned,
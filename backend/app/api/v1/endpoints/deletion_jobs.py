@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, Any
+from app.core.auth import get_current_user
+from app.models.user import User
+from app.models.deletion_job import DeletionJob
+
+router = APIRouter()
+
+
+@router.get("/{job_id}")
+async def get_deletion_job(job_id: int, current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+    """Состояние фонового удаления сессии или контрагента"""
+    job = await DeletionJob.get_or_none(id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    
+    return {
+        "id": job.id,
+        "target": job.target,
+        "target_id": job.target_id,
+        "status": job.status,
+        "sessions_deleted": job.sessions_deleted,
+        "pages_deleted": job.pages_deleted,
+        "violations_deleted": job.violations_deleted,
+        "error_message": job.error_message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None
+    }
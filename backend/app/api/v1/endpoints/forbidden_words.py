@@ -6,9 +6,20 @@ from datetime import datetime
 from app.models.forbidden_word import ForbiddenWord
 from app.models.user import User
 from app.core.auth import get_current_user
+from app.core.logging import logger
+from app.services.queue_service import queue_service
 
 router = APIRouter()
 
+
+async def notify_forbidden_words_changed():
+    """Уведомление воркеров о том, что набор запрещенных слов изменился"""
+    try:
+        await queue_service.publish_forbidden_words_changed()
+    except Exception as e:
+        # Воркеры все равно увидят изменения при плановой проверке версии
+        await logger.warning(f'Failed to publish forbidden words change: {e}')
+
 class ForbiddenWordCreate(BaseModel):
     word: str
     category: str
@@ -58,6 +69,7 @@ async def create_forbidden_word(
         **word_data.dict(),
         created_by_id=current_user.id
     )
+    await notify_forbidden_words_changed()
     return forbidden_word
 
 @router.get('/', response_model=List[ForbiddenWordResponse])
@@ -106,6 +118,7 @@ async def update_forbidden_word(
     update_data = word_data.dict(exclude_unset=True)
     await word.update_from_dict(update_data)
     await word.save()
+    await notify_forbidden_words_changed()
     return word
 
 @router.delete('/{word_id}')
@@ -122,6 +135,7 @@ async def delete_forbidden_word(
         )
     
     await word.delete()
+    await notify_forbidden_words_changed()
     return {'message': 'Запрещенное слово удалено'}
 
 @router.get('/categories/list')
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Dict, Any, Optional
 from app.models.user import User
@@ -22,18 +23,22 @@ async def get_scan_results(
         # Вычисляем смещение для пагинации
         offset = (page - 1) * page_size
         
-        # Получаем страницы с нарушениями с пагинацией
+        # Получаем страницы с нарушениями с пагинацией (контрагент - в том же запросе)
         pages_with_violations = await WebPage.filter(
             violations_found=True
-        ).prefetch_related('contractor', 'violations__forbidden_word').order_by('-id').offset(offset).limit(page_size)
+        ).select_related('contractor').order_by('-id').offset(offset).limit(page_size)
+        
+        # Нарушения всех страниц одним запросом вместе с запрещенными словами
+        page_violations: Dict[int, List[Violation]] = defaultdict(list)
+        for violation in await Violation.filter(
+            webpage_id__in=[page_obj.id for page_obj in pages_with_violations]
+        ).select_related('forbidden_word').order_by('id'):
+            page_violations[violation.webpage_id].append(violation)
         
         results = []
         for page_obj in pages_with_violations:
-            # Получаем нарушения для страницы
-            violations = await Violation.filter(webpage=page_obj).prefetch_related('forbidden_word')
-            
             violations_data = []
-            for violation in violations:
+            for violation in page_violations[page_obj.id]:
                 violations_data.append({
                     "id": violation.id,
                     "word_found": violation.word_found,
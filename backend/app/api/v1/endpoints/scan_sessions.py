@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from app.models.user import User
@@ -8,6 +9,8 @@ from app.models.webpage import WebPage
 from app.models.scan_result import Violation
 from app.core.auth import get_current_user
 from app.services.queue_service import queue_service
+from app.services.deletion_service import deletion_service
+from tortoise.expressions import F
 
 router = APIRouter()
 
@@ -80,7 +83,7 @@ async def get_scan_session(
 ) -> Dict[str, Any]:
     """Получение деталей сессии сканирования"""
     try:
-        session = await ScanSession.get_or_none(id=session_id).prefetch_related('contractor')
+        session = await ScanSession.get_or_none(id=session_id).select_related('contractor')
         if not session:
             raise HTTPException(status_code=404, detail="Scan session not found")
         
@@ -93,9 +96,15 @@ async def get_scan_session(
         # Получаем страницы для этой сессии с пагинацией
         pages = await WebPage.filter(scan_session=session).order_by('-id').offset(offset).limit(page_size)
         
+        # Нарушения всех страниц одним запросом вместе с запрещенными словами
+        page_violations: Dict[int, List[Violation]] = defaultdict(list)
+        for violation in await Violation.filter(
+            webpage_id__in=[page_obj.id for page_obj in pages]
+        ).select_related('forbidden_word').order_by('id'):
+            page_violations[violation.webpage_id].append(violation)
+        
         pages_data = []
         for page_obj in pages:
-            violations = await Violation.filter(webpage=page_obj).prefetch_related('forbidden_word')
             pages_data.append({
                 "id": page_obj.id,
                 "url": page_obj.url,
@@ -116,7 +125,7 @@ async def get_scan_session(
                         "forbidden_word_word": v.forbidden_word.word,
                         "forbidden_word_category": v.forbidden_word.category,
                     }
-                    for v in violations
+                    for v in page_violations[page_obj.id]
                 ]
             })
         
@@ -162,9 +171,16 @@ async def start_scan_session(
             raise HTTPException(status_code=404, detail="Contractor not found")
         
         # Создаем новую сессию сканирования
+        # Стартовая задача учитывается сразу: сессия завершится, когда обработаны все задачи
         session = await ScanSession.create(
             contractor=contractor,
-            status='running'
+            status='running',
+            pending_tasks=1,
+            tasks_queued=1
+        )
+        await Contractor.filter(id=contractor.id).update(
+            scan_sessions_count=F('scan_sessions_count') + 1,
+            last_session_violations=0
         )
         
         # Добавляем задачу в очередь с session_id
@@ -187,22 +203,21 @@ async def start_scan_session(
 @router.delete("/{session_id}")
 async def delete_scan_session(
     session_id: int,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
-    """Удаление сессии сканирования"""
+    """Удаление сессии сканирования со страницами и нарушениями
+
+    Большая сессия удаляется в фоне: ответ 202 с id задания удаления.
+    """
+    if not await ScanSession.exists(id=session_id):
+        raise HTTPException(status_code=404, detail="Scan session not found")
+    
     try:
-        session = await ScanSession.get_or_none(id=session_id)
-        if not session:
-            raise HTTPException(status_code=404, detail="Scan session not found")
-        
-        # Удаляем связанные страницы и нарушения
-        pages = await WebPage.filter(scan_session=session)
-        for page in pages:
-            await Violation.filter(webpage=page).delete()
-        await pages.delete()
-        
-        # Удаляем сессию
-        await session.delete()
+        job = await deletion_service.delete('scan_session', session_id, current_user)
+        if job:
+            response.status_code = 202
+            return {"message": "Scan session deletion scheduled", "job_id": job.id}
         
         return {"message": "Scan session deleted successfully"}
     except Exception as e:
@@ -35,6 +35,91 @@ class Settings(BaseSettings):
     jwt_algorithm: str = os.getenv('JWT_ALGORITHM', 'HS256')
     jwt_expire_minutes: int = int(os.getenv('JWT_EXPIRE_MINUTES', '30'))
     
+    # Scanner
+    # Сколько найденных ссылок объединять в одно сообщение очереди (1 - по сообщению на ссылку)
+    scan_task_coalesce: int = int(os.getenv('SCAN_TASK_COALESCE', '1'))
+    # Как часто (в секундах) воркер сверяет версию набора запрещенных слов с базой
+    rule_set_check_interval: int = int(os.getenv('RULE_SET_CHECK_INTERVAL', '60'))
+    # Проверять совместимые регулярные выражения объединенными альтернативами
+    regex_combined_mode: bool = os.getenv('REGEX_COMBINED_MODE', 'false').lower() == 'true'
+    # Сколько задач сканирования воркер обрабатывает одновременно (prefetch очереди). Сетевую часть
+    # дополнительно ограничивает SCAN_HTTP_CONNECTIONS, CPU-часть - SCAN_CPU_QUEUE_SIZE
+    scan_worker_concurrency: int = int(os.getenv('SCAN_WORKER_CONCURRENCY', '100'))
+    # Процессов scan worker под супервизором (0 - по числу ядер), через сколько секунд без heartbeat
+    # процесс считается зависшим и сколько секунд при остановке дорабатываются начатые задачи.
+    # Процессы делят между собой ядра пула CPU и лимиты HOST_* (см. supervisor.share_limits)
+    scan_worker_processes: int = int(os.getenv('SCAN_WORKER_PROCESSES', '1'))
+    scan_worker_heartbeat_timeout: int = int(os.getenv('SCAN_WORKER_HEARTBEAT_TIMEOUT', '60'))
+    scan_worker_drain_timeout: int = int(os.getenv('SCAN_WORKER_DRAIN_TIMEOUT', '30'))
+    # Где выполнять разбор HTML и поиск нарушений: process, thread или inline (в event loop)
+    scan_cpu_executor: str = os.getenv('SCAN_CPU_EXECUTOR', 'process').lower()
+    # Размер пула в процессе (0 - по числу ядер, под супервизором - доля ядер процесса) и максимум задач,
+    # переданных в пул одновременно (0 - 2 на воркер пула)
+    scan_cpu_workers: int = int(os.getenv('SCAN_CPU_WORKERS', '0'))
+    scan_cpu_queue_size: int = int(os.getenv('SCAN_CPU_QUEUE_SIZE', '0'))
+    # Реализация разбора HTML: html.parser, lxml или selectolax (последние две - из группы fast-html)
+    html_parser_backend: str = os.getenv('HTML_PARSER_BACKEND', 'html.parser').lower()
+    # Максимальный размер тела страницы в байтах (у контрагента можно задать свой) и размер чтения за раз
+    scan_max_page_bytes: int = int(os.getenv('SCAN_MAX_PAGE_BYTES', str(5 * 1024 * 1024)))
+    scan_read_chunk_size: int = int(os.getenv('SCAN_READ_CHUNK_SIZE', str(64 * 1024)))
+    # Глубина обхода для контрагентов без max_depth (0 - без ограничения)
+    scan_default_max_depth: int = int(os.getenv('SCAN_DEFAULT_MAX_DEPTH', '10'))
+    # Общий лимит HTTP-соединений воркера
+    scan_http_connections: int = int(os.getenv('SCAN_HTTP_CONNECTIONS', '100'))
+    # Вежливость к сайтам: запросов в секунду (0 - без ограничения частоты) и максимум одновременных
+    # запросов к одному хосту (на весь scan worker - процессы супервизора делят их поровну,
+    # поэтому процессов не может быть больше HOST_MAX_CONCURRENCY)
+    host_requests_per_second: float = float(os.getenv('HOST_REQUESTS_PER_SECOND', '2'))
+    host_max_concurrency: int = int(os.getenv('HOST_MAX_CONCURRENCY', '4'))
+    # Ответ (заголовки) дольше этого времени (в секундах) уменьшает параллельность запросов к хосту
+    host_latency_target: float = float(os.getenv('HOST_LATENCY_TARGET', '3'))
+    # Максимальная пауза по Retry-After (в секундах) и число повторов после 429/503
+    host_max_retry_after: int = int(os.getenv('HOST_MAX_RETRY_AFTER', '300'))
+    host_max_retries: int = int(os.getenv('HOST_MAX_RETRIES', '2'))
+    # Канонизация ссылок: удаляемые параметры запроса (шаблон name_* - по префиксу) и завершающий "/"
+    url_strip_query_params: str = os.getenv(
+        'URL_STRIP_QUERY_PARAMS', 'utm_*,gclid,fbclid,yclid,ysclid,_openstat,_ga,mc_cid,mc_eid'
+    )
+    url_strip_trailing_slash: bool = os.getenv('URL_STRIP_TRAILING_SLASH', 'true').lower() == 'true'
+    # Фильтр уже встреченных URL сессии: начальная емкость, доля ложных совпадений, сколько сессий держать в памяти
+    frontier_initial_capacity: int = int(os.getenv('FRONTIER_INITIAL_CAPACITY', '10000'))
+    frontier_error_rate: float = float(os.getenv('FRONTIER_ERROR_RATE', '0.0001'))
+    frontier_max_sessions: int = int(os.getenv('FRONTIER_MAX_SESSIONS', '100'))
+    # Хранилище HTML и текста страниц: postgres (таблица page_blobs) или filesystem (каталог BLOB_STORE_PATH),
+    # сжатие gzip или zstd (из группы zstd) и уровень сжатия (0 - по умолчанию кодека)
+    blob_store_backend: str = os.getenv('BLOB_STORE_BACKEND', 'postgres').lower()
+    blob_store_path: str = os.getenv('BLOB_STORE_PATH', '/data/blobs')
+    blob_compression: str = os.getenv('BLOB_COMPRESSION', 'gzip').lower()
+    blob_compression_level: int = int(os.getenv('BLOB_COMPRESSION_LEVEL', '0'))
+    # Blob без ссылок со страниц удаляются не раньше, чем через столько секунд после сохранения
+    blob_gc_grace: int = int(os.getenv('BLOB_GC_GRACE', '3600'))
+    # Перенос в хранилище контента страниц, сохраненных до его появления: как часто (в секундах,
+    # 0 - не переносить), сколько страниц переносится параллельно одной пачкой и сколько секунд
+    # за раз переносятся пачки
+    blob_migrate_interval: int = int(os.getenv('BLOB_MIGRATE_INTERVAL', '60'))
+    blob_migrate_batch: int = int(os.getenv('BLOB_MIGRATE_BATCH', '100'))
+    blob_migrate_time: float = float(os.getenv('BLOB_MIGRATE_TIME', '30'))
+    # Как часто (в секундах) сверять счетчики статистики сессий и контрагентов с данными (0 - не сверять)
+    stats_reconcile_interval: int = int(os.getenv('STATS_RECONCILE_INTERVAL', '3600'))
+    # Очистка старых данных: как часто (в секундах, 0 - не очищать), сколько последних сессий контрагента
+    # хранить (0 - все), сколько дней хранить более старые сессии с нарушениями (0 - всегда) и через
+    # сколько дней удалять HTML страниц (0 - не удалять)
+    retention_interval: int = int(os.getenv('RETENTION_INTERVAL', '3600'))
+    retention_keep_sessions: int = int(os.getenv('RETENTION_KEEP_SESSIONS', '0'))
+    retention_violations_days: int = int(os.getenv('RETENTION_VIOLATIONS_DAYS', '0'))
+    retention_html_days: int = int(os.getenv('RETENTION_HTML_DAYS', '0'))
+    # Удаление пачками: наибольший размер пачки, целевая длительность транзакции пачки в миллисекундах
+    # (пачка уменьшается, если транзакция дольше) и пауза между пачками в секундах
+    retention_batch_size: int = int(os.getenv('RETENTION_BATCH_SIZE', '500'))
+    retention_max_lock_ms: int = int(os.getenv('RETENTION_MAX_LOCK_MS', '200'))
+    retention_batch_pause: float = float(os.getenv('RETENTION_BATCH_PAUSE', '0.1'))
+    # Сессии и контрагенты не больше чем с таким числом страниц удаляются сразу в запросе API, большие -
+    # заданием в maintenance worker, который проверяет новые задания раз в DELETION_JOB_INTERVAL секунд
+    deletion_inline_pages: int = int(os.getenv('DELETION_INLINE_PAGES', '1000'))
+    deletion_job_interval: int = int(os.getenv('DELETION_JOB_INTERVAL', '5'))
+    # Как часто (в секундах) воркер выводит в лог счетчики сканирования
+    metrics_log_interval: int = int(os.getenv('METRICS_LOG_INTERVAL', '60'))
+    
     # Notification settings
     notification_email_enabled: bool = os.getenv('NOTIFICATION_EMAIL_ENABLED', 'true').lower() == 'true'
     notification_webhook_enabled: bool = os.getenv('NOTIFICATION_WEBHOOK_ENABLED', 'false').lower() == 'true'
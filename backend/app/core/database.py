@@ -7,7 +7,7 @@ TORTOISE_ORM = {
     },
     'apps': {
         'models': {
-            'models': ['aerich.models', 'app.models.user', 'app.models.contractor', 'app.models.forbidden_word', 'app.models.mcc_code', 'app.models.scan_result', 'app.models.webpage', 'app.models.scan_session'],
+            'models': ['aerich.models', 'app.models.user', 'app.models.contractor', 'app.models.forbidden_word', 'app.models.mcc_code', 'app.models.scan_result', 'app.models.webpage', 'app.models.scan_session', 'app.models.page_blob', 'app.models.deletion_job', 'app.models.session_url'],
             'default_connection': 'default',
         }
     },
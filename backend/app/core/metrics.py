@@ -0,0 +1,38 @@
+import time
+from collections import Counter
+from typing import Dict
+
+
+class Metrics:
+    """Счетчики событий процесса
+
+    Счетчики накапливаются между отчетами: report() возвращает значения
+    за прошедший интервал и обнуляет их.
+    """
+
+    def __init__(self):
+        self._counters: Counter = Counter()
+        self._started_at = time.monotonic()
+
+    def increment(self, name: str, value: int = 1):
+        """Увеличение счетчика"""
+        self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        return self._counters[name]
+
+    def report(self) -> Dict[str, int]:
+        """Значения счетчиков за интервал с последнего отчета"""
+        counters = dict(self._counters)
+        self._counters.clear()
+        self._started_at = time.monotonic()
+        return counters
+
+    @property
+    def interval(self) -> float:
+        """Секунд с последнего отчета"""
+        return time.monotonic() - self._started_at
+
+
+# Глобальный экземпляр метрик процесса
+metrics = Metrics()
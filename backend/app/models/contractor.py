@@ -17,6 +17,9 @@ class Contractor(models.Model):
     # Настройки парсинга (опциональные)
     max_pages = fields.IntField(null=True, description="Максимальное количество страниц для проверки")
     max_depth = fields.IntField(null=True, description="Максимальная глубина обхода")
+    max_page_bytes = fields.IntField(null=True, description="Максимальный размер страницы в байтах")
+    host_aliases = fields.JSONField(null=True, description="Синонимы домена: зеркала и старые адреса сайта")
+    strip_query_params = fields.JSONField(null=True, description="Параметры запроса, удаляемые из ссылок")
     
     # Классификация
     mcc_code = fields.CharField(max_length=10, null=True, description="MCC код")
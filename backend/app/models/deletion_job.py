@@ -0,0 +1,24 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DeletionJob(Model):
+    """Фоновое удаление сессии сканирования или контрагента со всеми данными"""
+    id = fields.IntField(pk=True)
+    target = fields.CharField(max_length=20, description="Что удаляется: scan_session или contractor")
+    target_id = fields.IntField(description="id удаляемой записи")
+    status = fields.CharField(max_length=20, default='pending', description="Статус: pending, running, completed, failed")
+    sessions_deleted = fields.IntField(default=0, description="Удалено сессий")
+    pages_deleted = fields.IntField(default=0, description="Удалено страниц")
+    violations_deleted = fields.IntField(default=0, description="Удалено нарушений")
+    error_message = fields.TextField(null=True)
+    created_by = fields.ForeignKeyField('models.User', related_name='deletion_jobs', null=True, on_delete=fields.SET_NULL)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    started_at = fields.DatetimeField(null=True)
+    completed_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "deletion_jobs"
+
+    def __str__(self):
+        return f"{self.target} {self.target_id} ({self.status})"
@@ -0,0 +1,16 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class PageBlob(Model):
+    """Сжатый контент страницы в хранилище с адресацией по хешу (BLOB_STORE_BACKEND=postgres)"""
+    hash = fields.CharField(max_length=64, pk=True, description="SHA-256 несжатого контента")
+    data = fields.BinaryField(description="Сжатый контент, кодек определяется по заголовку")
+    size = fields.IntField(description="Размер несжатого контента в байтах")
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "page_blobs"
+
+    def __str__(self):
+        return self.hash
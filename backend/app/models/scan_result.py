@@ -47,6 +47,8 @@ class Violation(models.Model):
     
     class Meta:
         table = "violations"
+        # Одно нарушение на страницу для слова и позиции - повторная запись пропускается
+        unique_together = (("webpage", "forbidden_word", "position", "word_found"),)
         
     def __str__(self):
         return f"Violation: {self.word_found} on {self.webpage.url}" 
\ No newline at end of file
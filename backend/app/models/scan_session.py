@@ -1,5 +1,6 @@
 from tortoise import fields
 from tortoise.models import Model
+from tortoise.indexes import Index
 from datetime import datetime
 from typing import Optional
 
@@ -11,12 +12,18 @@ class ScanSession(Model):
     pages_scanned = fields.IntField(default=0)
     pages_with_violations = fields.IntField(default=0)
     total_violations = fields.IntField(default=0)
+    pending_tasks = fields.IntField(default=0, description="Задачи сессии в очереди и в обработке")
+    tasks_queued = fields.IntField(default=0, description="Всего задач, поставленных в очередь за сессию")
     started_at = fields.DatetimeField(auto_now_add=True)
     completed_at = fields.DatetimeField(null=True)
     error_message = fields.TextField(null=True)
     
     class Meta:
         table = "scan_sessions"
+        indexes = (
+            # Сессии контрагента по времени запуска, включая последнюю
+            Index(fields=("contractor_id", "started_at"), name="idx_scan_sessions_contractor_started"),
+        )
     
     def __str__(self):
         return f"ScanSession {self.id} - {self.contractor.name} ({self.status})"
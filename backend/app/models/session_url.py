@@ -0,0 +1,16 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class SessionUrl(Model):
+    """URL, уже поставленный в очередь в сессии сканирования; общий для всех процессов воркеров"""
+    id = fields.BigIntField(pk=True)
+    scan_session = fields.ForeignKeyField('models.ScanSession', related_name='urls', on_delete=fields.CASCADE)
+    url_hash = fields.CharField(max_length=32, description="MD5 канонического URL")
+
+    class Meta:
+        table = "session_urls"
+        unique_together = (("scan_session", "url_hash"),)
+
+    def __str__(self):
+        return f"{self.scan_session_id}: {self.url_hash}"
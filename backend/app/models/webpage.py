@@ -1,4 +1,6 @@
 from tortoise import fields, models
+from tortoise.contrib.postgres.indexes import PostgreSQLIndex
+from tortoise.indexes import Index
 from datetime import datetime
 
 class WebPage(models.Model):
@@ -12,12 +14,22 @@ class WebPage(models.Model):
     
     # URL и метаданные
     url = fields.CharField(max_length=2048, description="URL страницы")
+    depth = fields.IntField(null=True, description="Глубина от стартовой страницы")
     title = fields.CharField(max_length=500, null=True, description="Заголовок страницы")
     meta_description = fields.CharField(max_length=1000, null=True, description="Meta description")
     
     # Контент
-    content = fields.TextField(description="HTML контент страницы")
-    text_content = fields.TextField(description="Текстовый контент без HTML")
+    # HTML и текст хранятся в blob_store, у страницы - только ключи; колонки content и text_content
+    # заполнены у страниц, сохраненных до появления хранилища, пока их не перенесет maintenance worker
+    content_blob = fields.CharField(max_length=64, null=True, description="Ключ HTML контента в хранилище")
+    text_blob = fields.CharField(max_length=64, null=True, description="Ключ текстового контента в хранилище")
+    content = fields.TextField(null=True, description="HTML контент страницы")
+    text_content = fields.TextField(null=True, description="Текстовый контент без HTML")
+    content_hash = fields.CharField(max_length=64, null=True, description="SHA-256 текста, по которому искались нарушения")
+    rules_hash = fields.CharField(max_length=64, null=True, description="Отпечаток набора правил, которым проверена страница")
+    content_bytes = fields.IntField(null=True, description="Прочитано байт тела ответа")
+    content_length = fields.BigIntField(null=True, description="Content-Length из ответа")
+    content_truncated = fields.BooleanField(default=False, description="Тело обрезано по лимиту размера")
     
     # Статус сканирования
     status = fields.CharField(
@@ -27,6 +39,9 @@ class WebPage(models.Model):
     )
     http_status = fields.IntField(null=True, description="HTTP статус код")
     response_time = fields.FloatField(null=True, description="Время ответа в секундах")
+    etag = fields.CharField(max_length=512, null=True, description="ETag из ответа")
+    last_modified = fields.CharField(max_length=64, null=True, description="Last-Modified из ответа")
+    outbound_links = fields.JSONField(null=True, description="Ссылки со страницы для обхода без повторного разбора")
     
     # Нарушения
     violations_found = fields.BooleanField(default=False, description="Найдены нарушения")
@@ -40,6 +55,18 @@ class WebPage(models.Model):
     
     class Meta:
         table = "webpages"
+        indexes = (
+            # Предыдущая копия страницы, проверка TTL, поиск страницы в сессии и без нее
+            Index(fields=("contractor_id", "url", "last_scanned"), name="idx_webpages_contractor_url_scanned"),
+            # Страницы контрагента и сессии (списки по id, загрузка URL сессии в фильтр)
+            Index(fields=("contractor_id", "id"), name="idx_webpages_contractor"),
+            Index(fields=("scan_session_id", "id"), name="idx_webpages_session"),
+            # Проверка ссылок на blob при очистке хранилища
+            Index(fields=("content_blob",), name="idx_webpages_content_blob"),
+            Index(fields=("text_blob",), name="idx_webpages_text_blob"),
+            # Список страниц с нарушениями
+            PostgreSQLIndex(fields=("id",), name="idx_webpages_violations", condition={"violations_found": True}),
+        )
         
     def __str__(self):
         return f"{self.url} ({self.contractor.domain})"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class ContractorCreate(BaseModel):
     name: str
@@ -9,6 +9,9 @@ class ContractorCreate(BaseModel):
     check_schedule: str = 'daily'
     max_pages: Optional[int] = None
     max_depth: Optional[int] = None
+    max_page_bytes: Optional[int] = None
+    host_aliases: Optional[List[str]] = None
+    strip_query_params: Optional[List[str]] = None
 
 class ContractorUpdate(BaseModel):
     name: Optional[str] = None
@@ -17,6 +20,9 @@ class ContractorUpdate(BaseModel):
     check_schedule: Optional[str] = None
     max_pages: Optional[int] = None
     max_depth: Optional[int] = None
+    max_page_bytes: Optional[int] = None
+    host_aliases: Optional[List[str]] = None
+    strip_query_params: Optional[List[str]] = None
 
 class ContractorResponse(BaseModel):
     id: int
@@ -29,6 +35,9 @@ class ContractorResponse(BaseModel):
     next_check: Optional[datetime]
     max_pages: Optional[int]
     max_depth: Optional[int]
+    max_page_bytes: Optional[int]
+    host_aliases: Optional[List[str]]
+    strip_query_params: Optional[List[str]]
     mcc_code: Optional[str]
     mcc_probability: float
     total_pages: int
@@ -25,6 +25,11 @@ class WebPageDetailResponse(BaseModel):
     status: str
     http_status: Optional[int]
     response_time: Optional[float]
+    content_bytes: Optional[int] = None
+    content_truncated: bool = False
+    # Загружаются из хранилища только по запросу (include_content)
+    content: Optional[str] = None
+    text_content: Optional[str] = None
     violations_found: bool
     violations_count: int
     last_scanned: Optional[datetime]
@@ -0,0 +1,352 @@
+"""Хранилище контента страниц с адресацией по хешу
+
+HTML и текст страниц сохраняются сжатыми под ключом - SHA-256 несжатого контента,
+а WebPage хранит только ключи (content_blob, text_blob). Одинаковый контент (страница
+без изменений в следующей сессии, общие страницы разных контрагентов) хранится один раз.
+
+Хранилища: таблица page_blobs в Postgres или каталог BLOB_STORE_PATH, в котором файлы
+разложены по первым символам хеша (ab/cd/abcd...). Сжатие - gzip или zstd (группа zstd);
+кодек записан в заголовке blob, поэтому смена BLOB_COMPRESSION не мешает читать старые.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from tortoise.expressions import Q
+from tortoise.functions import Length
+
+from app.models.page_blob import PageBlob
+from app.models.webpage import WebPage
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.logging import logger
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def blob_key(data: bytes) -> str:
+    """Ключ blob - хеш несжатого контента"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(f"Blob compression 'zstd' requires optional dependency: {e.name}") from e
+    return zstandard
+
+
+def compress(data: bytes, codec: str, level: int = 0) -> bytes:
+    """Сжатие контента (level 0 - уровень по умолчанию кодека)"""
+    if codec == 'gzip':
+        # mtime=0: одинаковый контент дает одинаковый blob
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    if codec == 'zstd':
+        return _zstandard().ZstdCompressor(level=level or 3).compress(data)
+    raise ValueError(f"Unknown BLOB_COMPRESSION: {codec}")
+
+
+def decompress(blob: bytes) -> bytes:
+    """Распаковка по заголовку blob"""
+    if blob.startswith(GZIP_MAGIC):
+        return gzip.decompress(blob)
+    if blob.startswith(ZSTD_MAGIC):
+        return _zstandard().ZstdDecompressor().decompress(blob)
+    raise ValueError("Unknown blob format")
+
+
+class BlobBackend:
+    """Интерфейс места хранения сжатых blob"""
+    name = ''
+
+    async def touch(self, key: str) -> bool:
+        """Обновление времени сохранения blob (защита от очистки), False - blob нет"""
+        raise NotImplementedError
+
+    async def put(self, key: str, blob: bytes, size: int):
+        """Сохранение blob; повторное сохранение того же ключа не ошибка"""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    async def list_keys(self, after: str, limit: int, min_age: float) -> List[str]:
+        """Ключи больше after по возрастанию, сохраненные не меньше min_age секунд назад"""
+        raise NotImplementedError
+
+    async def delete_many(self, keys: List[str], min_age: float) -> int:
+        """Удаление blob, сохраненных не меньше min_age секунд назад; возвращает число освобожденных байт"""
+        raise NotImplementedError
+
+
+class PostgresBlobBackend(BlobBackend):
+    """Таблица page_blobs"""
+    name = 'postgres'
+
+    async def touch(self, key: str) -> bool:
+        return bool(await PageBlob.filter(hash=key).update(created_at=datetime.utcnow()))
+
+    async def put(self, key: str, blob: bytes, size: int):
+        # Тот же контент мог одновременно сохранить другой воркер - конфликт пропускается
+        await PageBlob.bulk_create([PageBlob(hash=key, data=blob, size=size)], ignore_conflicts=True)
+
+    async def get(self, key: str) -> bytes | None:
+        blob = await PageBlob.filter(hash=key).first().values_list('data', flat=True)
+        return bytes(blob) if blob is not None else None
+
+    async def list_keys(self, after: str, limit: int, min_age: float) -> List[str]:
+        return await PageBlob.filter(hash__gt=after, created_at__lt=datetime.utcnow() - timedelta(seconds=min_age)) \
+            .order_by('hash').limit(limit).values_list('hash', flat=True)
+
+    async def delete_many(self, keys: List[str], min_age: float) -> int:
+        query = PageBlob.filter(hash__in=keys, created_at__lt=datetime.utcnow() - timedelta(seconds=min_age))
+        sizes = await query.annotate(stored=Length('data')).values_list('stored', flat=True)
+        await query.delete()
+        return sum(sizes)
+
+
+class FilesystemBlobBackend(BlobBackend):
+    """Файлы в каталоге, разложенные по первым символам хеша"""
+    name = 'filesystem'
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    async def touch(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(os.utime, self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def put(self, key: str, blob: bytes, size: int):
+        await asyncio.to_thread(self._write, self.path(key), blob)
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            return await asyncio.to_thread(self._read, self.path(key))
+        except FileNotFoundError:
+            return None
+
+    async def list_keys(self, after: str, limit: int, min_age: float) -> List[str]:
+        return await asyncio.to_thread(self._list, after, limit, time.time() - min_age)
+
+    async def delete_many(self, keys: List[str], min_age: float) -> int:
+        return await asyncio.to_thread(self._delete, [self.path(key) for key in keys], time.time() - min_age)
+
+    @staticmethod
+    def _write(path: str, blob: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запись во временный файл и переименование: читатель не увидит недописанный blob,
+        # а одновременная запись одного ключа несколькими воркерами безопасна
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(blob)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def _list(self, after: str, limit: int, created_before: float) -> List[str]:
+        keys = []
+        # Каталоги обходятся по порядку имен, начиная с каталогов ключа after
+        for first in self._subdirs(self.root, after[:2]):
+            first_path = os.path.join(self.root, first)
+            for second in self._subdirs(first_path, after[2:4] if first == after[:2] else ''):
+                second_path = os.path.join(first_path, second)
+                for name in sorted(os.listdir(second_path)):
+                    temporary = name.endswith('.tmp')
+                    if not temporary and name <= after:
+                        continue
+                    path = os.path.join(second_path, name)
+                    try:
+                        if os.path.getmtime(path) >= created_before:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    if temporary:
+                        # Временный файл записи, прерванной падением процесса
+                        self._delete([path], created_before)
+                    else:
+                        keys.append(name)
+                        if len(keys) >= limit:
+                            return keys
+        return keys
+
+    @staticmethod
+    def _subdirs(path: str, start: str) -> List[str]:
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if name >= start and os.path.isdir(os.path.join(path, name)))
+
+    @staticmethod
+    def _delete(paths: List[str], created_before: float) -> int:
+        freed = 0
+        for path in paths:
+            try:
+                # Файл, обновленный после выбора ключей (touch при повторном сохранении), остается
+                stat = os.stat(path)
+                if stat.st_mtime >= created_before:
+                    continue
+                os.remove(path)
+                freed += stat.st_size
+            except FileNotFoundError:
+                pass
+        return freed
+
+
+def create_backend(name: str) -> BlobBackend:
+    """Место хранения по имени из BLOB_STORE_BACKEND"""
+    if name == 'postgres':
+        return PostgresBlobBackend()
+    if name == 'filesystem':
+        return FilesystemBlobBackend(settings.blob_store_path)
+    raise ValueError(f"Unknown BLOB_STORE_BACKEND: {name}")
+
+
+class BlobStore:
+    """Сохранение и загрузка контента страниц
+
+    Сжатие и распаковка выполняются в потоке: zlib и zstd отпускают GIL, а данные
+    не копируются в другой процесс, как при offload_service.
+    """
+
+    def __init__(self):
+        self._backend: BlobBackend | None = None
+        # Последняя перенесенная в хранилище страница (см. migrate_pages)
+        self._migrated_id = 0
+
+    @property
+    def backend(self) -> BlobBackend:
+        if self._backend is None:
+            self._backend = create_backend(settings.blob_store_backend)
+        return self._backend
+
+    async def check_compression(self):
+        """Проверка кодека BLOB_COMPRESSION при старте воркера; без zstandard - запись в gzip
+
+        Уже сохраненные в zstd blob без zstandard прочитать нельзя, но новые записываются.
+        """
+        try:
+            compress(b'', settings.blob_compression)
+        except RuntimeError as e:
+            await logger.error(f"❌ {e}, falling back to gzip")
+            settings.blob_compression = 'gzip'
+
+    async def put(self, content: str) -> str:
+        """Сохранение контента, возвращает ключ; уже сохраненный контент не записывается повторно
+
+        Для сохраненного контента обновляется время сохранения: ссылку на него воркер запишет
+        в страницу позже, и до этого blob не должна удалить очистка (см. collect_garbage).
+        """
+        data = content.encode()
+        key = blob_key(data)
+        if await self.backend.touch(key):
+            metrics.increment('blobs_deduplicated')
+            return key
+
+        blob = await asyncio.to_thread(compress, data, settings.blob_compression, settings.blob_compression_level)
+        await self.backend.put(key, blob, len(data))
+        metrics.increment('blobs_stored')
+        metrics.increment('blob_bytes_stored', len(blob))
+        return key
+
+    async def keep(self, key: str | None) -> str | None:
+        """Продление хранения blob, на который сошлется новая страница; None, если blob уже удален
+
+        Как и put, защищает blob от очистки до записи ссылки на него (см. collect_garbage).
+        """
+        if not key:
+            return None
+        if await self.backend.touch(key):
+            return key
+        await logger.warning(f"⚠️ Blob {key} not found in {self.backend.name} store")
+        return None
+
+    async def get(self, key: str | None) -> str | None:
+        """Контент по ключу; None, если ключа нет или blob не найден"""
+        if not key:
+            return None
+        blob = await self.backend.get(key)
+        if blob is None:
+            await logger.warning(f"⚠️ Blob {key} not found in {self.backend.name} store")
+            return None
+        return (await asyncio.to_thread(decompress, blob)).decode()
+
+    async def page_content(self, page: WebPage) -> Tuple[str | None, str | None]:
+        """HTML и текст страницы; у страниц, сохраненных до появления хранилища, - из колонок"""
+        if page.content_blob or page.text_blob:
+            return await self.get(page.content_blob), await self.get(page.text_blob)
+        return page.content, page.text_content
+
+    async def migrate_pages(self) -> int:
+        """Перенос в хранилище контента страниц, сохраненных в колонках content и text_content
+
+        Страницы переносятся пачками по BLOB_MIGRATE_BATCH, страницы пачки - параллельно;
+        пачки берутся, пока не пройдет BLOB_MIGRATE_TIME секунд. Колонки очищаются.
+        Возвращает число перенесенных страниц.
+        """
+        deadline = time.monotonic() + settings.blob_migrate_time
+        migrated = 0
+        while True:
+            pages = await WebPage.filter(id__gt=self._migrated_id) \
+                .filter(Q(content__isnull=False) | Q(text_content__isnull=False)).order_by('id') \
+                .limit(settings.blob_migrate_batch).values('id', 'content', 'text_content')
+            if not pages:
+                break
+            await asyncio.gather(*(self._migrate_page(page) for page in pages))
+            self._migrated_id = pages[-1]['id']
+            migrated += len(pages)
+            if time.monotonic() >= deadline:
+                break
+
+        if migrated:
+            metrics.increment('pages_migrated_to_blobs', migrated)
+            await logger.info(f"📦 Moved content of {migrated} pages to {self.backend.name} blob store")
+        return migrated
+
+    async def _migrate_page(self, page: Dict[str, Any]):
+        """Перенос контента одной страницы"""
+        # HTML могла уже удалить очистка по сроку хранения
+        keys: Dict[str, str] = {'text_blob': await self.put(page['text_content'] or '')}
+        if page['content'] is not None:
+            keys['content_blob'] = await self.put(page['content'])
+        await WebPage.filter(id=page['id']).update(**keys, content=None, text_content=None)
+
+    async def collect_garbage(self, batch_size: int) -> Tuple[int, int]:
+        """Удаление blob, на которые не ссылается ни одна страница
+
+        Blob, сохраненные или повторно сохраненные (put обновляет время) меньше BLOB_GC_GRACE
+        секунд назад, не удаляются: ссылку на контент воркер записывает в страницу после
+        сохранения blob. Возраст проверяется и при удалении, поэтому blob, повторно сохраненный
+        после проверки ссылок, остается. Возвращает число удаленных blob и освобожденных байт.
+        """
+        after, deleted, freed = '', 0, 0
+        while keys := await self.backend.list_keys(after, batch_size, settings.blob_gc_grace):
+            after = keys[-1]
+            referenced = set(await WebPage.filter(content_blob__in=keys).values_list('content_blob', flat=True))
+            referenced.update(await WebPage.filter(text_blob__in=keys).values_list('text_blob', flat=True))
+            orphans = [key for key in keys if key not in referenced]
+            if orphans:
+                freed += await self.backend.delete_many(orphans, settings.blob_gc_grace)
+                deleted += len(orphans)
+        return deleted, freed
+
+
+# Глобальный экземпляр хранилища
+blob_store = BlobStore()
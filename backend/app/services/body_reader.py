@@ -0,0 +1,97 @@
+"""Потоковое чтение тела HTTP-ответа с ограничением размера
+
+Тело читается частями, поэтому память на страницу ограничена лимитом, а не размером ответа.
+Кодировка берется из Content-Type, затем из BOM или <meta charset> в начале документа,
+иначе используется utf-8; некорректные байты заменяются, а не прерывают чтение.
+"""
+import codecs
+import re
+from dataclasses import dataclass
+
+import aiohttp
+
+
+# Сколько байт с начала документа просматривать в поисках <meta charset> (как в браузерах)
+CHARSET_SNIFF_BYTES = 1024
+DEFAULT_ENCODING = 'utf-8'
+
+_META_CHARSET = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.-]+)',
+    re.IGNORECASE
+)
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+@dataclass(slots=True)
+class BodyReadResult:
+    """Прочитанное тело ответа и сведения об усечении"""
+    text: str
+    bytes_read: int
+    truncated: bool
+    encoding: str
+
+
+def _known_encoding(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(head: bytes) -> str | None:
+    """Кодировка по BOM или <meta charset> в начале документа"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _META_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+    return _known_encoding(match.group(1).decode('ascii')) if match else None
+
+
+async def read_body(response: aiohttp.ClientResponse, max_bytes: int, chunk_size: int) -> BodyReadResult:
+    """Чтение тела ответа не более max_bytes байт с инкрементальным декодированием"""
+    encoding = _known_encoding(response.charset)
+    decoder = None
+    head = b''
+    parts = []
+    bytes_read = 0
+    truncated = False
+
+    async for chunk in response.content.iter_chunked(chunk_size):
+        if bytes_read + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - bytes_read]
+            truncated = True
+        bytes_read += len(chunk)
+
+        if decoder is None:
+            # Кодировку из документа определяем по первым байтам, пока копим их
+            head += chunk
+            if encoding is None and len(head) < CHARSET_SNIFF_BYTES and not truncated:
+                continue
+            encoding = encoding or sniff_encoding(head) or DEFAULT_ENCODING
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunk, head = head, b''
+        parts.append(decoder.decode(chunk))
+
+        if truncated:
+            break
+
+    if decoder is None:
+        encoding = encoding or sniff_encoding(head) or DEFAULT_ENCODING
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        parts.append(decoder.decode(head))
+    if not truncated:
+        # При усечении недочитанный многобайтный символ отбрасываем, а не заменяем
+        parts.append(decoder.decode(b'', final=True))
+
+    return BodyReadResult(
+        text=''.join(parts),
+        bytes_read=bytes_read,
+        truncated=truncated,
+        encoding=encoding
+    )
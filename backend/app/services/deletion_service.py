@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from tortoise.queryset import QuerySet
+
+from app.models.deletion_job import DeletionJob
+from app.models.user import User
+from app.models.webpage import WebPage
+from app.services.retention_service import retention_service, Progress, RetentionReport
+from app.core.config import settings
+from app.core.logging import logger
+
+
+# Задания, которые еще нужно выполнить (running - прерванные остановкой worker)
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class DeletionService:
+    """Удаление сессий сканирования и контрагентов со всеми страницами и нарушениями
+
+    Удаление идет пачками через retention_service. Небольшие объемы (не больше
+    DELETION_INLINE_PAGES страниц) удаляются сразу в запросе API, большие - заданием
+    DeletionJob, которое выполняет maintenance worker; API возвращает задание, и его
+    состояние можно запросить. Счетчики контрагента исправляет сверка статистики.
+    """
+
+    async def delete(self, target: str, target_id: int, user: User | None = None) -> DeletionJob | None:
+        """Удаление сразу или постановка задания; возвращает задание, если удаление отложено"""
+        if await self._pages(target, target_id).count() <= settings.deletion_inline_pages:
+            await self._delete(target, target_id)
+            return None
+
+        job = await DeletionJob.filter(target=target, target_id=target_id, status__in=ACTIVE_STATUSES).first()
+        if job is None:
+            job = await DeletionJob.create(target=target, target_id=target_id, created_by=user)
+            await logger.info(f"🗓️ Deletion of {target} {target_id} scheduled as job {job.id}")
+        return job
+
+    async def run_pending(self) -> int:
+        """Выполнение ожидающих заданий, возвращает их число"""
+        jobs = await DeletionJob.filter(status__in=ACTIVE_STATUSES).order_by('id')
+        for job in jobs:
+            await self._run(job)
+        return len(jobs)
+
+    async def _run(self, job: DeletionJob):
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        await job.save(update_fields=['status', 'started_at'])
+        await logger.info(f"🗑️ Deletion job {job.id} started: {job.target} {job.target_id}")
+
+        async def progress(report: RetentionReport):
+            await DeletionJob.filter(id=job.id).update(
+                sessions_deleted=report.sessions,
+                pages_deleted=report.pages,
+                violations_deleted=report.violations
+            )
+
+        # Прерванное задание продолжается с уже удаленными записями в итогах
+        report = RetentionReport(
+            sessions=job.sessions_deleted, pages=job.pages_deleted, violations=job.violations_deleted
+        )
+        try:
+            await self._delete(job.target, job.target_id, report, progress)
+        except Exception as e:
+            job.status = 'failed'
+            job.error_message = str(e)
+            job.completed_at = datetime.utcnow()
+            await job.save(update_fields=['status', 'error_message', 'completed_at'])
+            await logger.error(f"❌ Deletion job {job.id} failed: {e}")
+            return
+
+        job.status = 'completed'
+        job.sessions_deleted = report.sessions
+        job.pages_deleted = report.pages
+        job.violations_deleted = report.violations
+        job.completed_at = datetime.utcnow()
+        await job.save(update_fields=['status', 'sessions_deleted', 'pages_deleted', 'violations_deleted', 'completed_at'])
+        await logger.info(f"✅ Deletion job {job.id} completed")
+
+    @staticmethod
+    async def _delete(
+        target: str,
+        target_id: int,
+        report: RetentionReport | None = None,
+        progress: Progress = None
+    ) -> RetentionReport:
+        if target == 'scan_session':
+            return await retention_service.delete_session(target_id, report, progress)
+        if target == 'contractor':
+            return await retention_service.delete_contractor(target_id, report, progress)
+        raise ValueError(f"Unknown deletion target: {target}")
+
+    @staticmethod
+    def _pages(target: str, target_id: int) -> QuerySet:
+        if target == 'scan_session':
+            return WebPage.filter(scan_session_id=target_id)
+        return WebPage.filter(contractor_id=target_id)
+
+
+# Глобальный экземпляр сервиса
+deletion_service = DeletionService()
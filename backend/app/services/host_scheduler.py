@@ -0,0 +1,203 @@
+"""Вежливый обход: ограничение частоты и параллельности запросов к каждому хосту
+
+Для каждого хоста ведется ведро токенов (запросов в секунду) и окно одновременных
+запросов. Окно растет на единицу за "круг" успешных быстрых ответов и уменьшается
+вдвое при 429/503, ошибках сервера и сети или медленных ответах; частота при
+ошибках тоже уменьшается вдвое и постепенно возвращается к настроенной.
+Retry-After приостанавливает все запросы к хосту. Задержка ответа для окна - время
+до заголовков ответа: загрузка большого тела не считается медлительностью сервера.
+HOST_REQUESTS_PER_SECOND=0 отключает ограничение частоты (окно остается).
+
+Ограничения действуют в пределах процесса. Супервизор делит host_requests_per_second
+и host_max_concurrency между своими процессами; отдельно запущенные воркеры (несколько
+контейнеров) складывают свои лимиты.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, AsyncIterator
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+# Ответы, после которых хост нужно разгрузить
+BACKOFF_STATUSES = {429, 503}
+# Минимальная частота, до которой снижается скорость при ошибках
+MIN_REQUESTS_PER_SECOND = 0.05
+# Через сколько секунд простоя состояние хоста можно забыть
+IDLE_HOST_TTL = 600
+PRUNE_EVERY = 1000
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Задержка в секундах из Retry-After (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(slots=True)
+class HostSlot:
+    """Результат запроса, который сообщается планировщику при освобождении слота"""
+    status: int | None = None
+    retry_after: float | None = None
+    # Время получения заголовков ответа (time.monotonic)
+    headers_at: float | None = None
+
+    def record(self, status: int, retry_after: str | None = None):
+        """Вызывается по получении заголовков ответа, до чтения тела"""
+        self.status = status
+        self.retry_after = parse_retry_after(retry_after)
+        self.headers_at = time.monotonic()
+
+
+class HostState:
+    """Ведро токенов, окно параллельности и пауза одного хоста"""
+
+    def __init__(self, rate: float, concurrency: float):
+        # 0 - частота не ограничена
+        self.rate = rate
+        self.tokens = 1.0
+        self.concurrency = concurrency
+        self.in_flight = 0
+        # Задачи внутри acquire: ждут окна, токена или блокировки condition
+        self.waiters = 0
+        self.blocked_until = 0.0
+        self.refilled_at = time.monotonic()
+        self.used_at = self.refilled_at
+        self.condition = asyncio.Condition()
+
+    def refill(self, now: float):
+        # Запас не больше одного токена: без всплесков после простоя
+        if self.rate > 0:
+            self.tokens = min(1.0, self.tokens + (now - self.refilled_at) * self.rate)
+        else:
+            self.tokens = 1.0
+        self.refilled_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Сколько ждать до следующего запроса; 0 - можно сейчас"""
+        self.refill(now)
+        token_wait = (1.0 - self.tokens) / self.rate if self.rate > 0 else 0.0
+        return max(self.blocked_until - now, token_wait, 0.0)
+
+
+class HostScheduler:
+    """Планировщик запросов по хостам"""
+
+    def __init__(self):
+        self._hosts: Dict[str, HostState] = {}
+        self._acquired = 0
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(max(0.0, settings.host_requests_per_second), 1.0)
+            self._hosts[host] = state
+        return state
+
+    def _prune(self, now: float):
+        # Состояние с ожидающими задачами не удаляется: иначе следующий запрос к хосту
+        # получил бы новое независимое ведро и ограничение временно удвоилось бы
+        for host, state in list(self._hosts.items()):
+            if state.in_flight == 0 and state.waiters == 0 and now - state.used_at > IDLE_HOST_TTL and now >= state.blocked_until:
+                del self._hosts[host]
+
+    async def acquire(self, host: str) -> HostState:
+        """Ожидание токена и свободного места в окне хоста"""
+        state = self._state(host)
+        waited = False
+        state.waiters += 1
+        try:
+            async with state.condition:
+                while True:
+                    now = time.monotonic()
+                    if state.in_flight >= int(state.concurrency):
+                        waited = True
+                        await state.condition.wait()
+                        continue
+                    delay = state.wait_time(now)
+                    if delay > 0:
+                        waited = True
+                        try:
+                            await asyncio.wait_for(state.condition.wait(), delay)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    state.tokens -= 1.0
+                    state.in_flight += 1
+                    state.used_at = now
+                    break
+        finally:
+            state.waiters -= 1
+
+        if waited:
+            metrics.increment('host_waits')
+        self._acquired += 1
+        if self._acquired % PRUNE_EVERY == 0:
+            self._prune(time.monotonic())
+        return state
+
+    async def release(self, state: HostState, slot: HostSlot, latency: float):
+        """Освобождение места и подстройка ограничений по результату запроса
+
+        latency - время до заголовков ответа (или до ошибки, если ответа нет)
+        """
+        async with state.condition:
+            state.in_flight -= 1
+            now = time.monotonic()
+            max_rate = max(0.0, settings.host_requests_per_second)
+            failed = slot.status is None or slot.status in BACKOFF_STATUSES or slot.status >= 500
+
+            if failed:
+                # Мультипликативное уменьшение частоты (если она ограничена) и окна
+                if max_rate > 0:
+                    state.rate = max(min(MIN_REQUESTS_PER_SECOND, max_rate), state.rate / 2)
+                state.concurrency = max(1.0, state.concurrency / 2)
+                metrics.increment('host_backoffs')
+                if slot.retry_after is not None:
+                    pause = min(slot.retry_after, settings.host_max_retry_after)
+                    state.blocked_until = max(state.blocked_until, now + pause)
+                    metrics.increment('host_retry_after')
+            elif latency > settings.host_latency_target:
+                # Сервер отвечает медленно - меньше одновременных запросов, частоту не трогаем
+                state.concurrency = max(1.0, state.concurrency / 2)
+            else:
+                # Аддитивное увеличение: +1 к окну за окно успешных ответов
+                state.concurrency = min(
+                    float(settings.host_max_concurrency),
+                    state.concurrency + 1.0 / state.concurrency
+                )
+                state.rate = min(max_rate, state.rate + max_rate / 10)
+
+            state.condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[HostSlot]:
+        """Слот для запроса к хосту url; результат сообщается через HostSlot.record"""
+        state = await self.acquire(urlparse(url).netloc.lower())
+        slot = HostSlot()
+        started = time.monotonic()
+        try:
+            yield slot
+        finally:
+            answered = slot.headers_at if slot.headers_at is not None else time.monotonic()
+            await self.release(state, slot, answered - started)
+
+
+# Глобальный экземпляр планировщика
+host_scheduler = HostScheduler()
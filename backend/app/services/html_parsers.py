@@ -0,0 +1,171 @@
+"""Взаимозаменяемые реализации разбора HTML
+
+Все реализации извлекают одно и то же: текст страницы (как BeautifulSoup.get_text
+с separator=' ' и strip=True), заголовок, meta description и href всех ссылок.
+Текст внутри script, style, template, rt и rp и комментарии в текст не входят.
+lxml и selectolax - необязательные зависимости (группа fast-html).
+
+На невалидной разметке деревья могут различаться: selectolax строит дерево по HTML5
+и, например, склеивает текст вокруг отброшенных тегов td вне таблицы, а lxml теряет
+содержимое глубже 255 уровней вложенности. Сверка - tests/test_html_parsers.py.
+"""
+from typing import Dict, List, Iterable, Iterator, Tuple
+
+from bs4 import BeautifulSoup
+
+
+# Теги, строки внутри которых BeautifulSoup не считает текстом страницы
+EXCLUDED_TEXT_TAGS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+
+ParseResult = Tuple[str, str | None, str | None, List[str]]
+
+
+def join_text(strings: Iterable[str]) -> str:
+    """Текст страницы из отдельных строк: без пустых строк и пробелов по краям"""
+    return ' '.join(stripped for stripped in (string.strip() for string in strings) if stripped)
+
+
+class HTMLParserBackend:
+    """Интерфейс разбора HTML"""
+    name = ''
+
+    def parse(self, content: str) -> ParseResult:
+        """Текст, заголовок, meta description и значения href всех ссылок"""
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(HTMLParserBackend):
+    """BeautifulSoup со встроенным html.parser - медленный, но без зависимостей"""
+    name = 'html.parser'
+
+    def parse(self, content: str) -> ParseResult:
+        soup = BeautifulSoup(content, 'html.parser')
+
+        title = soup.find('title')
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+
+        return (
+            soup.get_text(separator=' ', strip=True),
+            title.get_text().strip() if title else None,
+            meta_desc.get('content') if meta_desc else None,
+            [a_tag['href'] for a_tag in soup.find_all('a', href=True)]
+        )
+
+
+class LxmlBackend(HTMLParserBackend):
+    """lxml.html (libxml2); содержимое глубже 255 уровней вложенности libxml2 отбрасывает"""
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        self._html = lxml.html
+        self._parser = lxml.html.HTMLParser(encoding='utf-8')
+
+    def parse(self, content: str) -> ParseResult:
+        if not content.strip():
+            return '', None, None, []
+        # Строки с объявлением кодировки lxml не принимает, поэтому передаем байты
+        root = self._html.document_fromstring(content.encode('utf-8', errors='replace'), parser=self._parser)
+
+        title = root.find('.//title')
+        description = None
+        for meta in root.iter('meta'):
+            if meta.get('name') == 'description':
+                description = meta.get('content')
+                break
+
+        return (
+            join_text(self._strings(root)),
+            ''.join(self._strings(title)).strip() if title is not None else None,
+            description,
+            [a_tag.get('href') for a_tag in root.iter('a') if a_tag.get('href') is not None]
+        )
+
+    @staticmethod
+    def _strings(root) -> Iterator[str]:
+        # Обход без рекурсии: у неаккуратной разметки вложенность бывает очень глубокой
+        stack = [(root, False)]
+        while stack:
+            item, excluded = stack.pop()
+            if isinstance(item, str):
+                if not excluded:
+                    yield item
+                continue
+
+            is_element = isinstance(item.tag, str)
+            excluded = excluded or (is_element and item.tag in EXCLUDED_TEXT_TAGS)
+            if is_element and item.text and not excluded:
+                yield item.text
+
+            for child in reversed(item):
+                if child.tail:
+                    # Текст после дочернего элемента принадлежит текущему
+                    stack.append((child.tail, excluded))
+                stack.append((child, excluded))
+
+
+class SelectolaxBackend(HTMLParserBackend):
+    """selectolax (lexbor)"""
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_class = LexborHTMLParser
+
+    def parse(self, content: str) -> ParseResult:
+        tree = self._parser_class(content)
+
+        title = tree.css_first('title')
+        description = None
+        for meta in tree.css('meta'):
+            if meta.attributes.get('name') == 'description':
+                description = meta.attributes.get('content')
+                break
+
+        return (
+            join_text(self._strings(tree.root)) if tree.root is not None else '',
+            ''.join(self._strings(title)).strip() if title is not None else None,
+            description,
+            [
+                a_tag.attributes['href']
+                for a_tag in tree.css('a[href]')
+                if a_tag.attributes.get('href') is not None
+            ]
+        )
+
+    @staticmethod
+    def _strings(root) -> Iterator[str]:
+        stack = [(root, False)]
+        while stack:
+            node, excluded = stack.pop()
+            if node.is_text_node:
+                if not excluded:
+                    yield node.text_content or ''
+                continue
+            if not node.is_element_node and not node.is_document_node:
+                continue
+
+            excluded = excluded or node.tag in EXCLUDED_TEXT_TAGS
+            stack.extend((child, excluded) for child in reversed(list(node.iter(include_text=True))))
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BeautifulSoupBackend, LxmlBackend, SelectolaxBackend)
+}
+
+_instances: Dict[str, HTMLParserBackend] = {}
+
+
+def get_parser(name: str) -> HTMLParserBackend:
+    """Экземпляр реализации разбора HTML по имени"""
+    parser = _instances.get(name)
+    if parser is None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend: {name}")
+        try:
+            parser = BACKENDS[name]()
+        except ImportError as e:
+            raise RuntimeError(f"HTML parser backend '{name}' requires optional dependency: {e.name}") from e
+        _instances[name] = parser
+    return parser
@@ -0,0 +1,64 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class OffloadService:
+    """Выполнение CPU-нагруженных шагов (разбор HTML, поиск нарушений) вне event loop
+
+    Сетевой ввод-вывод остается в event loop, а разбор и поиск уходят в пул процессов
+    (или потоков). Число одновременно переданных в пул задач ограничено: при заполнении
+    очереди корутины ждут свободного места, и воркер не набирает страницы в память
+    быстрее, чем успевает их обработать.
+    """
+
+    def __init__(self):
+        self.executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._mode = settings.scan_cpu_executor
+
+    def start(self):
+        """Создание пула"""
+        if self.executor is not None or self._mode == 'inline':
+            return
+
+        workers = settings.scan_cpu_workers or os.cpu_count() or 1
+        if self._mode == 'process':
+            # spawn: дочерние процессы не наследуют event loop и соединения с БД и MQ
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        elif self._mode == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan-cpu')
+        else:
+            raise ValueError(f"Unknown SCAN_CPU_EXECUTOR: {self._mode}")
+
+        self._semaphore = asyncio.Semaphore(settings.scan_cpu_queue_size or workers * 2)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Выполнение функции в пуле с ограничением очереди"""
+        if self._mode == 'inline':
+            return func(*args)
+        if self.executor is None:
+            self.start()
+            await logger.info(f"⚙️ Started {self._mode} pool for CPU-bound scan steps")
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def shutdown(self):
+        """Остановка пула"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+            self._semaphore = None
+
+
+# Глобальный экземпляр сервиса
+offload_service = OffloadService()
@@ -0,0 +1,85 @@
+"""CPU-нагруженные шаги обработки страницы
+
+Функции модуля не обращаются к базе, очереди и event loop, поэтому могут выполняться
+в пуле потоков или процессов (см. offload_service).
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import List, Iterable
+
+from app.services.html_parsers import get_parser
+from app.services.url_canonicalizer import UrlRules, canonicalize, resolve_url
+
+
+@dataclass(slots=True)
+class ParsedPage:
+    """Результат однократного разбора страницы"""
+    url: str
+    text: str
+    title: str | None = None
+    description: str | None = None
+    links: List[str] = field(default_factory=list)
+    content_hash: str = ''
+    # Заполняются после загрузки; HTML освобождается сразу после сохранения страницы
+    http_status: int | None = None
+    response_time: float | None = None
+    html: str | None = None
+    content_bytes: int | None = None
+    content_length: int | None = None
+    content_truncated: bool = False
+    # Валидаторы для условного запроса при следующем сканировании
+    etag: str | None = None
+    last_modified: str | None = None
+    # Страница не изменилась (304) и собрана из предыдущей копии
+    not_modified: bool = False
+    # Ключи контента предыдущей копии в blob_store: при 304 контент не загружается и не сохраняется заново
+    html_blob: str | None = None
+    text_blob: str | None = None
+    # Канонический адрес страницы после редиректов
+    final_url: str | None = None
+
+
+def text_hash(text: str) -> str:
+    """Хеш текста страницы в точности, как его проверяет поиск нарушений
+
+    По совпадению хеша переносятся позиции и контекст нарушений предыдущей копии, поэтому
+    пробелы не нормализуются: от них зависят смещения и совпадения правил с пробелами и \\s.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def parse_page(
+    content: str,
+    url: str,
+    base_url: str,
+    url_rules: UrlRules,
+    parser_backend: str = 'html.parser'
+) -> ParsedPage:
+    """Разбор HTML за один проход: текст, заголовок, meta description и ссылки"""
+    text_content, title_text, description, hrefs = get_parser(parser_backend).parse(content)
+    
+    return ParsedPage(
+        url=url,
+        text=text_content,
+        title=title_text,
+        description=description,
+        links=filter_links(hrefs, base_url, url_rules),
+        content_hash=text_hash(text_content)
+    )
+
+
+def filter_links(hrefs: Iterable[str], base_url: str, url_rules: UrlRules) -> List[str]:
+    """Ссылки на страницы того же сайта в порядке появления, без повторов по каноническому виду
+
+    Относительные ссылки разрешаются от base_url - адреса страницы после редиректов.
+    Возвращаются адреса для загрузки (как на странице, см. resolve_url); ключ
+    дедупликации - их канонический вид.
+    """
+    links = {}
+    
+    for href in hrefs:
+        link = canonicalize(href, base_url, url_rules)
+        if link is not None and link not in links and url_rules.is_internal(link):
+            links[link] = resolve_url(href, base_url)
+    
+    return list(links.values())
@@ -1,6 +1,7 @@
 import aio_pika
+import asyncio
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from app.core.config import settings
 from app.core.logging import logger
@@ -10,18 +11,31 @@ class QueueService:
     def __init__(self):
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
+        # Состояние потребителя задач сканирования для остановки без потери сообщений
+        self._scan_queue: Optional[aio_pika.Queue] = None
+        self._scan_consumer_tag: Optional[str] = None
+        self._scan_in_flight = 0
+        self._scan_idle = asyncio.Event()
+        self._scan_idle.set()
+        self._scan_draining = False
         
     async def connect(self):
         """Подключение к MQ"""
         try:
             self.connection = await aio_pika.connect_robust(settings.mq_url)
-            self.channel = await self.connection.channel()
+            # С подтверждениями публикации publish ждет ответа брокера, поэтому пачки публикуются параллельно
+            self.channel = await self.connection.channel(publisher_confirms=True)
             
             # Объявляем очереди
             await self.channel.declare_queue("scan_tasks", durable=True)
             await self.channel.declare_queue("scan_results", durable=True)
             await self.channel.declare_queue("violation_notifications", durable=True)
             
+            # Широковещательные события об изменении запрещенных слов
+            await self.channel.declare_exchange(
+                "forbidden_words_events", aio_pika.ExchangeType.FANOUT, durable=True
+            )
+            
             await logger.info("Connected to MQ")
         except Exception as e:
             await logger.error(f"Failed to connect to MQ: {e}")
@@ -56,6 +70,56 @@ class QueueService:
         
         await logger.info(f"Published scan task for contractor {contractor_id}, URL: {url}, session_id: {session_id}")
     
+    async def publish_scan_tasks_batch(
+        self,
+        contractor_id: int,
+        urls: List[str],
+        depth: int = 0,
+        session_id: int = None,
+        coalesce: Optional[int] = None,
+    ):
+        """Публикация пачки задач сканирования одним вызовом
+
+        Сообщения публикуются без ожидания подтверждения каждого по очереди. При coalesce > 1
+        до coalesce URL объединяются в одно сообщение с полем urls.
+        """
+        if not urls:
+            return
+        if not self.channel:
+            await self.connect()
+        
+        coalesce = settings.scan_task_coalesce if coalesce is None else coalesce
+        step = max(coalesce, 1)
+        timestamp = datetime.utcnow().isoformat()
+        
+        messages = []
+        for start in range(0, len(urls), step):
+            chunk = urls[start:start + step]
+            message = {
+                "contractor_id": contractor_id,
+                "depth": depth,
+                "session_id": session_id,
+                "timestamp": timestamp
+            }
+            if step > 1:
+                message["urls"] = chunk
+            else:
+                message["url"] = chunk[0]
+            messages.append(
+                aio_pika.Message(
+                    body=json.dumps(message).encode(),
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                )
+            )
+        
+        exchange = self.channel.default_exchange
+        await asyncio.gather(*(exchange.publish(message, routing_key="scan_tasks") for message in messages))
+        
+        await logger.info(
+            f"Published {len(urls)} scan tasks in {len(messages)} messages for contractor {contractor_id}, "
+            f"depth: {depth}, session_id: {session_id}"
+        )
+    
     async def publish_scan_result(self, result_data: Dict[str, Any]):
         """Публикация результата сканирования"""
         if not self.channel:
@@ -86,23 +150,80 @@ class QueueService:
         
         await logger.info(f"Published violation notification for contractor {violation_data.get('contractor_id')}")
     
-    async def consume_scan_tasks(self, callback):
-        """Потребление задач сканирования"""
+    async def publish_forbidden_words_changed(self):
+        """Публикация события об изменении запрещенных слов"""
         if not self.channel:
             await self.connect()
         
+        exchange = await self.channel.get_exchange("forbidden_words_events")
+        await exchange.publish(
+            aio_pika.Message(
+                body=json.dumps({"timestamp": datetime.utcnow().isoformat()}).encode()
+            ),
+            routing_key=""
+        )
+        
+        await logger.info("Published forbidden words change event")
+    
+    async def consume_scan_tasks(self, callback, concurrency: Optional[int] = None):
+        """Потребление задач сканирования
+
+        Брокер отдает не больше concurrency неподтвержденных сообщений (prefetch), и столько же
+        задач обрабатывается одновременно. Сообщение подтверждается после обработки.
+        """
+        if not self.channel:
+            await self.connect()
+        
+        concurrency = concurrency or settings.scan_worker_concurrency
+        # Prefetch действует на потребителей, созданных после set_qos
+        await self.channel.set_qos(prefetch_count=concurrency)
         queue = await self.channel.declare_queue("scan_tasks", durable=True)
+        semaphore = asyncio.Semaphore(concurrency)
         
         async def process_message(message):
-            async with message.process():
+            async with semaphore:
+                # Во время остановки еще не начатые задачи возвращаются в очередь
+                if self._scan_draining:
+                    await message.nack(requeue=True)
+                    return
+                self._scan_in_flight += 1
+                self._scan_idle.clear()
                 try:
-                    data = json.loads(message.body.decode())
-                    await callback(data)
-                except Exception as e:
-                    await logger.error(f"Error processing scan task: {e}")
+                    async with message.process():
+                        try:
+                            data = json.loads(message.body.decode())
+                            await callback(data)
+                        except Exception as e:
+                            await logger.error(f"Error processing scan task: {e}")
+                finally:
+                    self._scan_in_flight -= 1
+                    if not self._scan_in_flight:
+                        self._scan_idle.set()
         
-        await queue.consume(process_message)
-        await logger.info("Started consuming scan tasks")
+        self._scan_queue = queue
+        self._scan_draining = False
+        self._scan_consumer_tag = await queue.consume(process_message)
+        await logger.info(f"Started consuming scan tasks, concurrency: {concurrency}")
+    
+    async def drain_scan_tasks(self, timeout: float) -> bool:
+        """Остановка потребления задач сканирования с ожиданием начатых
+
+        Новые сообщения перестают поступать, полученные, но не начатые возвращаются в очередь.
+        Возвращает False, если начатые задачи не завершились за timeout: их сообщения
+        брокер вернет в очередь при закрытии соединения.
+        """
+        self._scan_draining = True
+        if self._scan_queue and self._scan_consumer_tag:
+            await self._scan_queue.cancel(self._scan_consumer_tag)
+            self._scan_consumer_tag = None
+        
+        await logger.info(f"Draining scan tasks, in flight: {self._scan_in_flight}")
+        try:
+            await asyncio.wait_for(self._scan_idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            await logger.warning(f"Scan tasks not finished in {timeout}s, in flight: {self._scan_in_flight}")
+            return False
     
     async def consume_scan_results(self, callback):
         """Потребление результатов сканирования"""
@@ -122,5 +243,25 @@ class QueueService:
         await queue.consume(process_message)
         await logger.info("Started consuming scan results")
 
+    async def consume_forbidden_words_changes(self, callback):
+        """Подписка на события об изменении запрещенных слов"""
+        if not self.channel:
+            await self.connect()
+        
+        exchange = await self.channel.get_exchange("forbidden_words_events")
+        # Каждый воркер получает собственную временную очередь
+        queue = await self.channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange)
+        
+        async def process_message(message):
+            async with message.process():
+                try:
+                    await callback(json.loads(message.body.decode()))
+                except Exception as e:
+                    await logger.error(f"Error processing forbidden words change: {e}")
+        
+        await queue.consume(process_message)
+        await logger.info("Started consuming forbidden words changes")
+
 # Глобальный экземпляр сервиса
 queue_service = QueueService() 
\ No newline at end of file
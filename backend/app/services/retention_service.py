@@ -0,0 +1,214 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from pypika_tortoise import Order, Table, analytics as an
+from tortoise import connections
+from tortoise.expressions import Q, Subquery
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+
+from app.models.contractor import Contractor
+from app.models.scan_result import Violation
+from app.models.scan_session import ScanSession
+from app.models.session_url import SessionUrl
+from app.models.webpage import WebPage
+from app.services.blob_store import blob_store
+from app.services.stats_service import stats_service
+from app.core.config import settings
+from app.core.logging import logger
+
+
+# Меньше этого размер пачки не уменьшается, даже если транзакции долгие
+MIN_BATCH_SIZE = 10
+
+
+# Вызывается после каждой пачки с текущими итогами удаления
+Progress = Optional[Callable[['RetentionReport'], Awaitable[None]]]
+
+
+@dataclass
+class RetentionReport:
+    """Итог очистки"""
+    sessions: int = 0
+    pages: int = 0
+    violations: int = 0
+    html_dropped: int = 0
+    session_urls: int = 0
+    blobs: int = 0
+    bytes_reclaimed: int = 0
+    batches: int = 0
+    max_lock_ms: float = 0.0
+
+
+class RetentionService:
+    """Очистка старых данных по политикам хранения
+
+    - у контрагента хранятся RETENTION_KEEP_SESSIONS последних завершенных сессий, более
+      старые удаляются вместе со страницами и нарушениями; сессии с нарушениями хранятся
+      RETENTION_VIOLATIONS_DAYS дней;
+    - у страниц старше RETENTION_HTML_DAYS дней удаляется HTML (текст остается для
+      повторной проверки нарушений);
+    - из хранилища удаляются blob, на которые больше не ссылаются страницы;
+    - удаляются отметки фронтира (session_urls) незапущенных сессий, оставшиеся после
+      сбоев: у завершенных сессий их удаляет сканер.
+
+    Строки удаляются пачками, каждая пачка - отдельная короткая транзакция. Размер пачки
+    подстраивается так, чтобы транзакция (и удерживаемые ею блокировки) укладывалась
+    в RETENTION_MAX_LOCK_MS, поэтому очистка может работать под нагрузкой. Теми же пачками
+    удаляются сессии и контрагенты по запросу из API (см. deletion_service).
+    """
+
+    def __init__(self):
+        self._batch_size = settings.retention_batch_size
+
+    async def run(self) -> RetentionReport:
+        """Очистка по всем политикам"""
+        report = RetentionReport()
+        started = time.monotonic()
+
+        if settings.retention_keep_sessions:
+            for session_id in await self._expired_sessions():
+                await self.delete_session(session_id, report)
+        if settings.retention_html_days:
+            await self._drop_html(report)
+        await self._drop_session_urls(report)
+        report.blobs, report.bytes_reclaimed = await blob_store.collect_garbage(self._batch_size)
+
+        # Счетчики контрагентов включали удаленные страницы
+        if report.sessions:
+            await stats_service.reconcile()
+
+        await logger.info(
+            f"🧹 Retention finished in {time.monotonic() - started:.1f}s: {report.sessions} sessions, "
+            f"{report.pages} pages, {report.violations} violations, {report.session_urls} frontier marks deleted, "
+            f"HTML dropped on {report.html_dropped} pages, "
+            f"{report.blobs} blobs ({report.bytes_reclaimed} bytes) reclaimed; {report.batches} batches, "
+            f"longest {report.max_lock_ms:.0f}ms"
+        )
+        return report
+
+    async def delete_session(
+        self,
+        session_id: int,
+        report: RetentionReport | None = None,
+        progress: Progress = None
+    ) -> RetentionReport:
+        """Удаление сессии со страницами и нарушениями пачками"""
+        report = report or RetentionReport()
+        pages, violations = report.pages, report.violations
+
+        while await self._delete_pages_batch(WebPage.filter(scan_session_id=session_id), report, progress):
+            pass
+        async with self._batch(report):
+            await ScanSession.filter(id=session_id).delete()
+        report.sessions += 1
+
+        await logger.info(
+            f"🗑️ Session {session_id} deleted: {report.pages - pages} pages, {report.violations - violations} violations"
+        )
+        return report
+
+    async def delete_contractor(
+        self,
+        contractor_id: int,
+        report: RetentionReport | None = None,
+        progress: Progress = None
+    ) -> RetentionReport:
+        """Удаление контрагента: сессии по одной, затем страницы без сессии, затем сам контрагент"""
+        report = report or RetentionReport()
+
+        for session_id in await ScanSession.filter(contractor_id=contractor_id).order_by('id').values_list('id', flat=True):
+            await self.delete_session(session_id, report, progress)
+        while await self._delete_pages_batch(WebPage.filter(contractor_id=contractor_id), report, progress):
+            pass
+        async with self._batch(report):
+            await Contractor.filter(id=contractor_id).delete()
+
+        await logger.info(
+            f"🗑️ Contractor {contractor_id} deleted: {report.sessions} sessions, {report.pages} pages, "
+            f"{report.violations} violations"
+        )
+        return report
+
+    async def _expired_sessions(self) -> List[int]:
+        """Сессии, вышедшие за пределы политик хранения; запущенные не трогаются
+
+        Одним запросом: сессии каждого контрагента нумеруются от новых к старым
+        (ROW_NUMBER() OVER (PARTITION BY contractor_id ...)), выбираются номера после
+        RETENTION_KEEP_SESSIONS.
+        """
+        keep = settings.retention_keep_sessions
+        sessions = Table(ScanSession._meta.db_table)
+        connection = connections.get('default')
+        rank = an.RowNumber().over(sessions.contractor_id) \
+            .orderby(sessions.started_at, order=Order.desc).orderby(sessions.id, order=Order.desc)
+        ranked = connection.query_class.from_(sessions) \
+            .select(sessions.id, sessions.total_violations, sessions.started_at, rank.as_('session_rank')) \
+            .where(sessions.status != 'running')
+        # Не больше 1000 сессий контрагента за запуск, остальные - при следующих запусках
+        query = connection.query_class.from_(ranked).select(ranked.id) \
+            .where(ranked.session_rank > keep).where(ranked.session_rank <= keep + 1000)
+        if settings.retention_violations_days:
+            violations_cutoff = datetime.utcnow() - timedelta(days=settings.retention_violations_days)
+            query = query.where((ranked.total_violations == 0) | (ranked.started_at < violations_cutoff))
+        else:
+            query = query.where(ranked.total_violations == 0)
+        rows = await connection.execute_query_dict(query.orderby(ranked.id).get_sql())
+        return [row['id'] for row in rows]
+
+    async def _drop_html(self, report: RetentionReport):
+        """Удаление HTML у страниц, просканированных раньше RETENTION_HTML_DAYS дней назад"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.retention_html_days)
+        last_id = 0
+        while page_ids := await WebPage.filter(id__gt=last_id, last_scanned__lt=cutoff) \
+                .filter(Q(content_blob__isnull=False) | Q(content__isnull=False)) \
+                .order_by('id').limit(self._batch_size).values_list('id', flat=True):
+            last_id = page_ids[-1]
+            async with self._batch(report):
+                report.html_dropped += await WebPage.filter(id__in=page_ids).update(content_blob=None, content=None)
+
+    async def _drop_session_urls(self, report: RetentionReport):
+        """Удаление отметок фронтира сессий, которые уже не выполняются (упавших, прерванных)"""
+        finished = Subquery(ScanSession.exclude(status='running').values('id'))
+        while url_ids := await SessionUrl.filter(scan_session_id__in=finished) \
+                .order_by('id').limit(self._batch_size).values_list('id', flat=True):
+            async with self._batch(report):
+                report.session_urls += await SessionUrl.filter(id__in=url_ids).delete()
+
+    async def _delete_pages_batch(self, pages: QuerySet, report: RetentionReport, progress: Progress = None) -> bool:
+        """Удаление одной пачки страниц с их нарушениями; False, если страниц не осталось"""
+        page_ids = await pages.order_by('id').limit(self._batch_size).values_list('id', flat=True)
+        if not page_ids:
+            return False
+        async with self._batch(report):
+            async with in_transaction():
+                report.violations += await Violation.filter(webpage_id__in=page_ids).delete()
+                report.pages += await WebPage.filter(id__in=page_ids).delete()
+        if progress:
+            await progress(report)
+        return True
+
+    @asynccontextmanager
+    async def _batch(self, report: RetentionReport):
+        """Замер длительности пачки, подстройка размера следующей и пауза между пачками"""
+        started = time.monotonic()
+        yield
+        lock_ms = (time.monotonic() - started) * 1000
+        report.batches += 1
+        report.max_lock_ms = max(report.max_lock_ms, lock_ms)
+
+        size = self._batch_size
+        if lock_ms > settings.retention_max_lock_ms:
+            size //= 2
+        elif lock_ms < settings.retention_max_lock_ms / 2:
+            size *= 2
+        self._batch_size = min(max(size, MIN_BATCH_SIZE), settings.retention_batch_size)
+        await asyncio.sleep(settings.retention_batch_pause)
+
+
+# Глобальный экземпляр сервиса
+retention_service = RetentionService()
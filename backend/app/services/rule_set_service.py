@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import Tuple, Any
+
+from tortoise.functions import Count, Max
+
+from app.models.forbidden_word import ForbiddenWord
+from app.services.word_matcher import RuleSet
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class RuleSetService:
+    """Кеш скомпилированного набора запрещенных слов в процессе воркера
+
+    Набор компилируется один раз и переиспользуется всеми задачами сканирования.
+    Актуальность проверяется дешевым запросом версии (количество слов и максимальный
+    updated_at) не чаще раза в rule_set_check_interval секунд, а при уведомлении
+    об изменении слов - сразу при следующем обращении.
+    """
+
+    def __init__(self):
+        self._rule_set: RuleSet | None = None
+        self._checked_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Принудительная проверка версии при следующем обращении"""
+        self._checked_at = 0.0
+
+    async def get_rule_set(self) -> RuleSet:
+        """Получение актуального набора правил"""
+        if self._is_fresh():
+            return self._rule_set
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._rule_set
+
+            version = await self._fetch_version()
+            if self._rule_set is None or self._rule_set.version != version:
+                self._rule_set = await self._compile(version)
+            self._checked_at = time.monotonic()
+
+        return self._rule_set
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._rule_set is not None
+            and time.monotonic() - self._checked_at < settings.rule_set_check_interval
+        )
+
+    async def _fetch_version(self) -> Tuple[Any, ...]:
+        result = await ForbiddenWord.all().annotate(
+            words_count=Count('id'),
+            last_updated=Max('updated_at')
+        ).values('words_count', 'last_updated')
+        if not result:
+            return 0, None
+        return result[0].get('words_count'), result[0].get('last_updated')
+
+    async def _compile(self, version: Tuple[Any, ...]) -> RuleSet:
+        forbidden_words = await ForbiddenWord.filter(is_active=True).values(
+            'id', 'word', 'use_regex', 'case_sensitive', 'severity'
+        )
+        rule_set = RuleSet(forbidden_words, version, combine_regex=settings.regex_combined_mode)
+
+        for word_data, error in rule_set.invalid_rules:
+            await logger.warning(f"❌ Error in regex '{word_data['word']}': {error}")
+        await logger.info(
+            f"📋 Compiled rule set: {len(rule_set)} forbidden words "
+            f"({len(rule_set.regex_rules)} regex), version {version}"
+        )
+        if rule_set.regex_matcher is not None:
+            await logger.info(
+                f"🧩 Combined regex mode: {len(rule_set.regex_matcher.guarded)} regex with prefilter, "
+                f"{len(rule_set.regex_matcher.combined)} alternations, "
+                f"{len(rule_set.regex_matcher.separate)} regex checked separately"
+            )
+        return rule_set
+
+
+# Глобальный экземпляр сервиса
+rule_set_service = RuleSetService()
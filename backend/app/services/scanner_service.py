@@ -1,17 +1,28 @@
 import asyncio
-import re
 import aiohttp
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+
+from pypika_tortoise import CustomFunction, Field, Table
+from tortoise import connections
+from tortoise.expressions import F
 
 from app.models.contractor import Contractor
 from app.models.webpage import WebPage
-from app.models.forbidden_word import ForbiddenWord
 from app.models.scan_session import ScanSession
 from app.models.scan_result import Violation
 from app.services.queue_service import queue_service
+from app.services.blob_store import blob_store
+from app.services.offload_service import offload_service
+from app.services.body_reader import read_body
+from app.services.host_scheduler import host_scheduler, BACKOFF_STATUSES
+from app.services.url_frontier import url_frontier
+from app.services.url_canonicalizer import UrlRules, build_url_rules, canonicalize, resolve_url, url_priority
+from app.services.page_processing import ParsedPage, parse_page
+from app.services.rule_set_service import rule_set_service
+from app.services.word_matcher import RuleSet, RuleSetMissing
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.core.logging import logger
 
 
@@ -22,7 +33,11 @@ class ScannerService:
     async def start_session(self):
         """Создание HTTP сессии"""
         if not self.session:
-            connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
+            # Нагрузку на отдельный хост ограничивает host_scheduler, здесь - только общий пул соединений
+            connector = aiohttp.TCPConnector(
+                limit=settings.scan_http_connections,
+                limit_per_host=settings.host_max_concurrency
+            )
             self.session = aiohttp.ClientSession(
                 timeout=aiohttp.ClientTimeout(total=30),
                 connector=connector,
@@ -37,10 +52,20 @@ class ScannerService:
             await self.session.close()
             self.session = None
     
-    async def scan_contractor(self, contractor_id: int, start_url: str | None = None, session_id: int = None):
-        """Сканирование контрагента - обрабатывает одну страницу и добавляет новые ссылки в очередь"""
+    async def scan_contractor(
+        self,
+        contractor_id: int,
+        start_url: str | None = None,
+        session_id: int = None,
+        depth: int = 0
+    ):
+        """Сканирование контрагента - обрабатывает одну страницу и добавляет новые ссылки в очередь
+
+        depth - расстояние от стартовой страницы в переходах по ссылкам.
+        """
         await self.start_session()
         
+        scan_session = None
         try:
             contractor = await Contractor.get(id=contractor_id)
             if not contractor.is_active:
@@ -48,13 +73,18 @@ class ScannerService:
                 return
             
             # Определяем начальный URL
+            # Правила канонизации ссылок контрагента; канонический URL - ключ дедупликации страниц,
+            # загружается же адрес из задачи как есть
+            url_rules = build_url_rules(contractor.domain, contractor.host_aliases, contractor.strip_query_params)
+            
             if not start_url:
                 start_url = f"https://{contractor.domain}"
+            fetch_url = resolve_url(start_url)
+            start_url = canonicalize(start_url, None, url_rules) or fetch_url
             
             await logger.info(f"🔍 Scanning contractor {contractor_id} ({contractor.name}) - URL: {start_url}, session_id: {session_id}")
             
             # Получаем сессию сканирования
-            scan_session = None
             if session_id:
                 scan_session = await ScanSession.get_or_none(id=session_id)
                 if not scan_session:
@@ -66,18 +96,9 @@ class ScannerService:
             else:
                 await logger.warning(f"⚠️ No session_id provided, scanning without session tracking")
             
-            # Получаем глобальные запрещенные слова
-            forbidden_words = await ForbiddenWord.filter(is_active=True)
-            forbidden_words_data = [
-                {
-                    'word': word.word,
-                    'use_regex': word.use_regex,
-                    'case_sensitive': word.case_sensitive,
-                    'severity': word.severity
-                }
-                for word in forbidden_words
-            ]
-            await logger.info(f"📝 Found {len(forbidden_words_data)} forbidden words for scanning")
+            # Получаем скомпилированный набор глобальных запрещенных слов (кешируется в процессе)
+            rule_set = await rule_set_service.get_rule_set()
+            await logger.info(f"📝 Found {len(rule_set)} forbidden words for scanning")
             
             # Обычное сканирование - проверяем TTL
             # Если есть session_id, проверяем только в рамках этой сессии
@@ -107,42 +128,22 @@ class ScannerService:
             await self._scan_single_page(
                 contractor=contractor,
                 url=start_url,
-                forbidden_words=forbidden_words_data,
+                fetch_url=fetch_url,
+                rule_set=rule_set,
+                url_rules=url_rules,
                 scan_session=scan_session,
-                max_pages=contractor.max_pages or 100
+                max_pages=contractor.max_pages or 100,
+                depth=depth
             )
             
-            # Завершаем сессию сканирования
             if scan_session:
-                # Обновляем статистику сессии
-                if scan_session:
-                    # Подсчитываем количество страниц в сессии
-                    pages_in_session = await WebPage.filter(scan_session=scan_session).count()
-                    
-                    # Подсчитываем количество нарушений в сессии
-                    violations_in_session = await Violation.filter(webpage__scan_session=scan_session).count()
-                    
-                    # Подсчитываем количество страниц с нарушениями в сессии
-                    pages_with_violations = await WebPage.filter(
-                        scan_session=scan_session,
-                        violations_found=True
-                    ).count()
-                    
-                    scan_session.pages_scanned = pages_in_session
-                    scan_session.pages_with_violations = pages_with_violations
-                    scan_session.total_violations = violations_in_session
-                    scan_session.status = 'completed'
-                    scan_session.completed_at = datetime.utcnow()
-                    await scan_session.save()
-                    
-                    await logger.info(f"📊 Session {scan_session.id} completed: {pages_in_session} pages, {violations_in_session} violations")
-                
                 await logger.info(f"✅ Scan completed for contractor {contractor.name}")
             
             # Обновляем статус контрагента
             contractor.last_check = datetime.utcnow()
             contractor.next_check = datetime.utcnow() + timedelta(hours=contractor.get_scan_interval_hours())
-            await contractor.save()
+            # Только свои поля: счетчики статистики обновляются атомарно другими задачами
+            await contractor.save(update_fields=['last_check', 'next_check'])
             
             await logger.info(f"✅ Completed scanning page {start_url} for contractor {contractor_id}")
             
@@ -156,22 +157,56 @@ class ScannerService:
                 scan_session.completed_at = datetime.utcnow()
                 scan_session.error_message = str(e)
                 await scan_session.save()
+                await url_frontier.forget(scan_session.id)
                 await logger.info(f"❌ Marked scan session {scan_session.id} as failed")
             
             raise
         finally:
             # НЕ закрываем сессию - она должна жить для всех запросов
-            pass
+            # Задача сессии обработана при любом исходе, включая пропуск страницы
+            if session_id:
+                await self._finish_session_task(session_id)
+    
+    async def _finish_session_task(self, session_id: int):
+        """Учет обработанной задачи и завершение сессии, когда задач не осталось
+
+        Счетчик уменьшается атомарно, а статус меняется условным UPDATE: из нескольких воркеров,
+        одновременно закончивших последние задачи, сессию завершает ровно один.
+        """
+        await ScanSession.filter(id=session_id).update(pending_tasks=F('pending_tasks') - 1)
+        completed = await ScanSession.filter(
+            id=session_id,
+            status='running',
+            pending_tasks__lte=0
+        ).update(status='completed', completed_at=datetime.utcnow())
+        if not completed:
+            return
+        
+        await url_frontier.forget(session_id)
+        
+        # Статистика сессии уже накоплена счетчиками
+        stats = await ScanSession.filter(id=session_id).first().values('pages_scanned', 'total_violations')
+        if stats is None:
+            # Сессию удалили, пока дорабатывала последняя задача
+            return
+        await logger.info(f"📊 Session {session_id} completed: {stats['pages_scanned']} pages, {stats['total_violations']} violations")
     
     async def _scan_single_page(
         self,
         contractor: Contractor,
         url: str,
-        forbidden_words: List[Dict[str, Any]],
+        rule_set: RuleSet,
+        url_rules: UrlRules,
         max_pages: int,
-        scan_session: ScanSession = None
+        scan_session: ScanSession = None,
+        depth: int = 0,
+        fetch_url: str | None = None
     ):
-        """Сканирование одной страницы"""
+        """Сканирование одной страницы
+
+        url - канонический адрес (ключ страницы и фронтира), fetch_url - загружаемый адрес.
+        """
+        fetch_url = fetch_url or url
         try:
             await logger.info(f"📄 Fetching page: {url}")
             
@@ -199,23 +234,50 @@ class ScannerService:
                     await logger.info(f"⏭️ Page {url} was recently scanned, skipping")
                     return
             
-            # Сканируем страницу
-            page_data = await self._fetch_page(url)
-            if not page_data:
+            # Предыдущая копия страницы: по ее ETag / Last-Modified сервер может ответить 304
+            previous = await self._previous_page(contractor, url, scan_session)
+            
+            # Сканируем страницу: загрузка и однократный разбор
+            page = await self._fetch_page(
+                fetch_url, url_rules, contractor.max_page_bytes or settings.scan_max_page_bytes, previous
+            )
+            if not page:
                 await logger.warning(f"⚠️ Failed to fetch page: {url}")
                 return
             
-            await logger.info(f"📊 Page fetched successfully: {url} (HTTP {page_data.get('http_status')}, {page_data.get('response_time', 0):.2f}s)")
+            await logger.info(f"📊 Page fetched successfully: {url} (HTTP {page.http_status}, {page.response_time or 0:.2f}s)")
+            
+            # Текст и набор правил те же, что у предыдущей копии - нарушения переносятся без поиска
+            reuse_violations = self._can_reuse_violations(previous, page, rule_set)
+            if reuse_violations:
+                metrics.increment('violation_checks_skipped')
+                if not page.not_modified:
+                    metrics.increment('pages_unchanged')
+                violations = []
+            else:
+                # Поиск до сохранения страницы, чтобы хеш правил не сохранился без нарушений
+                metrics.increment('violation_checks')
+                violations = await self._check_violations(page, rule_set)
             
-            # Сохраняем страницу
-            webpage = await self._save_webpage(contractor, url, page_data, scan_session)
+            # Сохраняем страницу, после чего исходный HTML больше не нужен
+            webpage, page_created = await self._save_webpage(
+                contractor, url, page, rule_set.fingerprint, depth, scan_session
+            )
+            page.html = None
             await logger.info(f"💾 Page saved to database: {url}")
             
-            # Проверяем на нарушения
-            violations = await self._check_violations(page_data, forbidden_words)
+            violations_created = 0
+            if reuse_violations:
+                violations = await self._copy_violations(previous, webpage)
+                # Без сессии страница та же, и нарушения уже учтены
+                if webpage.id != previous.id:
+                    violations_created = len(violations)
             if violations:
                 await logger.warning(f"🚨 Found {len(violations)} violations on page: {url}")
-                await self._save_violations(webpage, violations)
+                if not reuse_violations:
+                    violations_created = await self._save_violations(webpage, violations)
+            await self._update_stats(contractor, scan_session, page_created, violations_created)
+            if violations:
                 await queue_service.publish_violation_notification({
                     "contractor_id": contractor.id,
                     "contractor_name": contractor.name,
@@ -225,106 +287,296 @@ class ScannerService:
             else:
                 await logger.info(f"✅ No violations found on page: {url}")
             
-            # Извлекаем ссылки и добавляем их в очередь
-            links = await self._extract_links(page_data['html'], contractor.domain)
+            # Ссылки уже извлечены при разборе страницы, добавляем их в очередь
+            links = page.links
             await logger.info(f"🔗 Extracted {len(links)} links from page: {url}")
             
-            # Проверяем общее количество страниц контрагента
-            total_pages = await WebPage.filter(contractor=contractor).count()
+            # Дочерние страницы - следующий уровень; глубже max_depth не идем
+            max_depth = contractor.max_depth if contractor.max_depth is not None else settings.scan_default_max_depth
+            if max_depth and depth + 1 > max_depth:
+                await logger.info(f"⏹️ Reached max depth ({max_depth}) at {url}, links are not queued")
+                metrics.increment('depth_limited_pages')
+                return
+            
+            # Очередь задач - FIFO, поэтому уровни обходятся по порядку (в ширину). Внутри уровня
+            # первыми идут ссылки с коротким путем: при лимите страниц обходятся разделы, а не карточки.
+            # Ссылки загружаются как есть, а отмечаются во фронтире по каноническому виду
+            links = sorted(
+                ((canonicalize(link, None, url_rules) or link, link) for link in links),
+                key=lambda item: url_priority(item[0])
+            )
+            
+            # Сколько еще задач можно поставить: в сессии - по числу уже поставленных задач
+            # (оценка; окончательно задачи резервируются атомарно в _enqueue_links),
+            # без сессии - по числу страниц контрагента
+            if scan_session:
+                tasks_queued = await ScanSession.filter(id=scan_session.id).first().values_list('tasks_queued', flat=True)
+                if tasks_queued is None:
+                    await logger.info(f"⏹️ Session {scan_session.id} was deleted, links of {url} are not queued")
+                    return
+                budget = max_pages - tasks_queued
+            else:
+                budget = max_pages - await WebPage.filter(contractor=contractor).count()
+            
+            # Уже встреченные этим процессом URL сессии отсеиваются в памяти, остальные
+            # отмечаются в общей для всех процессов таблице
+            seen = None
+            if scan_session:
+                seen = await url_frontier.get(scan_session.id)
+                seen.add(url)
+                if page.final_url:
+                    seen.add(page.final_url)
             
-            added_to_queue = 0
-            for link in links:
-                if total_pages + added_to_queue >= max_pages:
+            new_links = {}
+            skipped_links = 0
+            for key, link in links:
+                if len(new_links) >= budget:
                     await logger.info(f"⏹️ Reached max pages limit ({max_pages}) for contractor {contractor.id}")
                     break
                 
-                # Проверяем, существует ли уже страница
-                # Если есть session_id, проверяем только в рамках этой сессии
-                if scan_session:
-                    existing_page = await WebPage.filter(contractor=contractor, url=link, scan_session=scan_session).first()
+                # Проверяем, встречалась ли уже страница
+                if seen is not None:
+                    is_new = seen.add(key)
                 else:
-                    existing_page = await WebPage.filter(contractor=contractor, url=link).first()
+                    # Без сессии - по базе, как раньше
+                    is_new = not await WebPage.filter(contractor=contractor, url=key).exists()
                 
-                if not existing_page:
-                    # Добавляем задачу в очередь
-                    await queue_service.publish_scan_task(
-                        contractor_id=contractor.id,
-                        url=link,
-                        depth=0,
-                        session_id=scan_session.id if scan_session else None
-                    )
-                    added_to_queue += 1
-                    await logger.debug(f"📤 Added to queue: {link}")
+                if not is_new:
+                    skipped_links += 1
+                    continue
+                
+                new_links[key] = link
+            
+            if scan_session:
+                # Сама страница тоже отмечается: ее ссылку мог найти и другой процесс
+                current = [url, page.final_url] if page.final_url else [url]
+                claimed = await url_frontier.claim(scan_session.id, current + list(new_links))
+                queued = set(claimed)
+                skipped_links += sum(1 for key in new_links if key not in queued)
+                new_links = {key: link for key, link in new_links.items() if key in queued}
+            
+            # Все новые ссылки страницы ставим в очередь одной пачкой
+            added_to_queue = await self._enqueue_links(contractor, new_links, depth + 1, max_pages, scan_session)
+            skipped_links += len(new_links) - added_to_queue
             
+            metrics.increment('frontier_links_queued', added_to_queue)
+            metrics.increment('frontier_links_skipped', skipped_links)
             await logger.info(f"📤 Added {added_to_queue} new pages to scan queue for contractor {contractor.id}")
             
         except Exception as e:
             await logger.error(f"❌ Error scanning page {url}: {e}")
             await logger.exception("Full traceback:")
     
-    async def _fetch_page(self, url: str) -> Dict[str, Any] | None:
-        """Получение страницы"""
+    async def _enqueue_links(
+        self,
+        contractor: Contractor,
+        links: Dict[str, str],
+        depth: int,
+        max_pages: int,
+        scan_session: ScanSession = None
+    ) -> int:
+        """Постановка ссылок в очередь с учетом задач сессии; возвращает число поставленных
+
+        links - адреса для загрузки по их каноническому виду (ключу фронтира).
+
+        Задачи сессии резервируются до публикации, чтобы сессия не завершилась раньше,
+        чем воркеры возьмут новые задачи. Ссылки сверх лимита страниц снимаются с фронтира.
+        """
+        if not links:
+            return 0
+        if scan_session:
+            reserved = await self._reserve_tasks(scan_session.id, max_pages, len(links))
+            if reserved < len(links):
+                keys = list(links)
+                await url_frontier.release(scan_session.id, keys[reserved:])
+                links = {key: links[key] for key in keys[:reserved]}
+                await logger.info(f"⏹️ Reached max pages limit ({max_pages}) for session {scan_session.id}")
+            if not links:
+                return 0
+        try:
+            await queue_service.publish_scan_tasks_batch(
+                contractor_id=contractor.id,
+                urls=list(links.values()),
+                depth=depth,
+                session_id=scan_session.id if scan_session else None
+            )
+        except Exception:
+            if scan_session:
+                await ScanSession.filter(id=scan_session.id).update(
+                    pending_tasks=F('pending_tasks') - len(links),
+                    tasks_queued=F('tasks_queued') - len(links)
+                )
+                # Иначе эти ссылки считались бы поставленными и больше не попали бы в очередь сессии
+                await url_frontier.release(scan_session.id, list(links))
+            raise
+        return len(links)
+    
+    async def _reserve_tasks(self, session_id: int, max_pages: int, count: int) -> int:
+        """Резервирование до count задач сессии в пределах max_pages; возвращает число зарезервированных
+
+        Один запрос: строка сессии блокируется, и счетчик увеличивается не выше лимита,
+        поэтому параллельные воркеры не превышают max_pages.
+        """
+        connection = connections.get('default')
+        sessions = Table(ScanSession._meta.db_table)
+        least = CustomFunction('LEAST', ['first', 'second'])
+        current = connection.query_class.from_(sessions).select(
+            sessions.id, sessions.tasks_queued.as_('queued_before')
+        ).where(sessions.id == session_id).where(sessions.tasks_queued < max_pages).for_update().as_('current')
+        queued = least(max_pages, current.queued_before + count)
+        query = connection.query_class.update(sessions).from_(current).set(
+            sessions.tasks_queued, queued
+        ).set(
+            sessions.pending_tasks, sessions.pending_tasks + queued - current.queued_before
+        ).where(sessions.id == current.id).returning(
+            (sessions.tasks_queued - Field('queued_before')).as_('reserved')
+        )
+        rows = await connection.execute_query_dict(query.get_sql())
+        # Лимит уже исчерпан или сессию удалили
+        return rows[0]['reserved'] if rows else 0
+    
+    async def _previous_page(
+        self,
+        contractor: Contractor,
+        url: str,
+        scan_session: ScanSession = None
+    ) -> WebPage | None:
+        """Последняя сохраненная копия страницы из предыдущих сессий"""
+        query = WebPage.filter(contractor=contractor, url=url, status='completed')
+        if scan_session:
+            query = query.exclude(scan_session=scan_session)
+        return await query.order_by('-last_scanned').first()
+    
+    async def _fetch_page(
+        self,
+        url: str,
+        url_rules: UrlRules,
+        max_bytes: int,
+        previous: WebPage | None = None
+    ) -> ParsedPage | None:
+        """Получение страницы: тело читается потоком и не больше max_bytes байт
+
+        Если есть предыдущая копия, запрос условный, и на 304 страница собирается из нее
+        без загрузки и разбора.
+        """
         try:
-            start_time = datetime.utcnow()
+            headers = {}
+            if previous:
+                if previous.etag:
+                    headers['If-None-Match'] = previous.etag
+                if previous.last_modified:
+                    headers['If-Modified-Since'] = previous.last_modified
             
-            await logger.debug(f"🌐 Making HTTP request to: {url}")
-            async with self.session.get(url, allow_redirects=True) as response:
-                response_time = (datetime.utcnow() - start_time).total_seconds()
-                
-                if response.status != 200:
-                    await logger.warning(f"⚠️ HTTP {response.status} for {url}")
-                    return None
-                
-                # Проверяем Content-Type
-                content_type = response.headers.get('content-type', '').lower()
-                
-                # Если это не HTML/текст, пропускаем
-                if not any(ct in content_type for ct in ['text/html', 'text/plain', 'application/xhtml+xml']):
-                    await logger.info(f"⏭️ Skipping non-HTML content: {content_type} for {url}")
-                    return None
-                
-                try:
-                    content = await response.text()
-                except UnicodeDecodeError as e:
-                    await logger.warning(f"⚠️ Unicode decode error for {url}: {e}")
-                    return None
-                
-                content_length = len(content)
-                
-                await logger.debug(f"📥 Received {content_length} bytes from {url}")
-                
-                # Парсим HTML
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Извлекаем текст
-                text_content = soup.get_text(separator=' ', strip=True)
-                text_length = len(text_content)
-                
-                # Извлекаем метаданные
-                title = soup.find('title')
-                title_text = title.get_text().strip() if title else None
-                
-                meta_desc = soup.find('meta', attrs={'name': 'description'})
-                description = meta_desc.get('content') if meta_desc else None
-                
-                await logger.debug(f"📝 Extracted {text_length} characters of text from {url}")
-                
-                return {
-                    'html': content,
-                    'text': text_content,
-                    'title': title_text,
-                    'description': description,
-                    'http_status': response.status,
-                    'response_time': response_time,
-                    'url': url
-                }
+            # Слот планировщика ограничивает частоту и параллельность запросов к хосту;
+            # на 429/503 запрос повторяется после паузы, выдержанной планировщиком
+            for attempt in range(settings.host_max_retries + 1):
+                async with host_scheduler.slot(url) as slot:
+                    start_time = datetime.utcnow()
+                    await logger.debug(f"🌐 Making HTTP request to: {url}")
+                    async with self.session.get(url, allow_redirects=True, headers=headers) as response:
+                        response_time = (datetime.utcnow() - start_time).total_seconds()
+                        slot.record(response.status, response.headers.get('Retry-After'))
+                        
+                        if response.status in BACKOFF_STATUSES and attempt < settings.host_max_retries:
+                            await logger.warning(f"⏳ HTTP {response.status} for {url}, retry {attempt + 1} after backoff")
+                            continue
+                        
+                        if response.status == 304 and previous:
+                            await logger.info(f"♻️ Page {url} not modified since {previous.last_scanned}")
+                            metrics.increment('pages_not_modified')
+                            # Текст загружается из хранилища, только если страницу нужно проверить заново
+                            return ParsedPage(
+                                url=url,
+                                text=previous.text_content or '',
+                                title=previous.title,
+                                description=previous.meta_description,
+                                links=previous.outbound_links or [],
+                                content_hash=previous.content_hash or '',
+                                http_status=response.status,
+                                response_time=response_time,
+                                html=previous.content,
+                                html_blob=previous.content_blob,
+                                text_blob=previous.text_blob,
+                                content_bytes=previous.content_bytes,
+                                content_length=previous.content_length,
+                                content_truncated=previous.content_truncated,
+                                etag=response.headers.get('ETag') or previous.etag,
+                                last_modified=response.headers.get('Last-Modified') or previous.last_modified,
+                                not_modified=True
+                            )
+                        
+                        if response.status != 200:
+                            await logger.warning(f"⚠️ HTTP {response.status} for {url}")
+                            return None
+                        
+                        # Проверяем Content-Type
+                        content_type = response.headers.get('content-type', '').lower()
+                        
+                        # Если это не HTML/текст, пропускаем
+                        if not any(ct in content_type for ct in ['text/html', 'text/plain', 'application/xhtml+xml']):
+                            await logger.info(f"⏭️ Skipping non-HTML content: {content_type} for {url}")
+                            return None
+                        
+                        # Заведомо слишком большой ответ отклоняем до чтения тела
+                        if response.content_length is not None and response.content_length > max_bytes:
+                            await logger.warning(
+                                f"⚠️ Skipping {url}: Content-Length {response.content_length} exceeds limit of {max_bytes} bytes"
+                            )
+                            return None
+                        
+                        body = await read_body(response, max_bytes, settings.scan_read_chunk_size)
+                        metrics.increment('pages_fetched')
+                        metrics.increment('bytes_fetched', body.bytes_read)
+                        content = body.text
+                        
+                        if body.truncated:
+                            await logger.warning(f"✂️ Body of {url} truncated at {max_bytes} bytes")
+                        await logger.debug(f"📥 Received {body.bytes_read} bytes from {url} ({body.encoding})")
+                        http_status = response.status
+                        content_length = response.content_length
+                        final_url = str(response.url)
+                        # Валидаторы длиннее колонок не сохраняем: обрезанные все равно не совпадут
+                        etag = response.headers.get('ETag')
+                        etag = etag if etag and len(etag) <= 512 else None
+                        last_modified = response.headers.get('Last-Modified')
+                        last_modified = last_modified if last_modified and len(last_modified) <= 64 else None
+                break
+            
+            # Разбираем HTML вне event loop - соединение к этому моменту уже возвращено в пул
+            page = await offload_service.run(
+                parse_page, content, url, final_url, url_rules, settings.html_parser_backend
+            )
+            page.final_url = canonicalize(final_url, None, url_rules)
+            page.http_status = http_status
+            page.response_time = response_time
+            page.html = content
+            page.content_bytes = body.bytes_read
+            page.content_length = content_length
+            page.content_truncated = body.truncated
+            page.etag = etag
+            page.last_modified = last_modified
+            
+            await logger.debug(f"📝 Extracted {len(page.text)} characters of text and {len(page.links)} links from {url}")
+            
+            return page
                 
         except Exception as e:
             await logger.error(f"❌ Error fetching {url}: {e}")
             return None
     
-    async def _save_webpage(self, contractor: Contractor, url: str, page_data: Dict[str, Any], scan_session: Optional['ScanSession'] = None) -> WebPage:
-        """Сохранение веб-страницы"""
+    async def _save_webpage(
+        self,
+        contractor: Contractor,
+        url: str,
+        page: ParsedPage,
+        rules_hash: str,
+        depth: int = 0,
+        scan_session: Optional['ScanSession'] = None
+    ) -> tuple[WebPage, bool]:
+        """Сохранение веб-страницы вместе с хешами текста и набора правил
+
+        Возвращает страницу и признак того, что запись создана, а не обновлена.
+        """
         from app.models.webpage import WebPage
         
         # Проверяем, существует ли уже такая страница в рамках текущей сессии
@@ -342,19 +594,29 @@ class ScannerService:
             ).first()
         
         created = webpage is None
+        content_blob, text_blob = await self._store_content(page)
         
         if created:
             # Создаем новую страницу
             webpage = await WebPage.create(
                 contractor=contractor,
                 url=url,
-                title=page_data.get('title'),
-                meta_description=page_data.get('description'),
-                content=page_data['html'],
-                text_content=page_data['text'],
+                title=page.title,
+                meta_description=page.description,
+                content_blob=content_blob,
+                text_blob=text_blob,
+                content_bytes=page.content_bytes,
+                content_length=page.content_length,
+                content_truncated=page.content_truncated,
+                etag=page.etag,
+                last_modified=page.last_modified,
+                outbound_links=page.links,
+                content_hash=page.content_hash or None,
+                rules_hash=rules_hash,
+                depth=depth,
                 status='completed',
-                http_status=page_data.get('http_status'),
-                response_time=page_data.get('response_time'),
+                http_status=page.http_status,
+                response_time=page.response_time,
                 last_scanned=datetime.utcnow(),
                 scan_session=scan_session
             )
@@ -362,13 +624,24 @@ class ScannerService:
         else:
             # Обновляем существующую страницу
             await logger.info(f"🔄 Updating existing page: {url}")
-            webpage.title = page_data.get('title')
-            webpage.meta_description = page_data.get('description')
-            webpage.content = page_data['html']
-            webpage.text_content = page_data['text']
+            webpage.title = page.title
+            webpage.meta_description = page.description
+            webpage.content_blob = content_blob
+            webpage.text_blob = text_blob
+            webpage.content = None
+            webpage.text_content = None
+            webpage.content_bytes = page.content_bytes
+            webpage.content_length = page.content_length
+            webpage.content_truncated = page.content_truncated
+            webpage.etag = page.etag
+            webpage.last_modified = page.last_modified
+            webpage.outbound_links = page.links
+            webpage.content_hash = page.content_hash or None
+            webpage.rules_hash = rules_hash
+            webpage.depth = depth
             webpage.status = 'completed'
-            webpage.http_status = page_data.get('http_status')
-            webpage.response_time = page_data.get('response_time')
+            webpage.http_status = page.http_status
+            webpage.response_time = page.response_time
             webpage.last_scanned = datetime.utcnow()
             
             # Если страница не была привязана к сессии, привязываем
@@ -378,190 +651,162 @@ class ScannerService:
             
             await webpage.save()
         
-        return webpage
+        return webpage, created
     
-    async def _check_violations(self, page_data: Dict[str, Any], forbidden_words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @staticmethod
+    async def _store_content(page: ParsedPage) -> tuple[str | None, str | None]:
+        """Сохранение HTML и текста в blob_store, возвращает их ключи
+
+        Не изменившаяся страница ссылается на контент предыдущей копии (HTML может быть
+        уже удален по сроку хранения); хранение этого контента продлевается, чтобы его не удалила
+        очистка, пока ссылка не записана в новую страницу.
+        """
+        content_blob = await blob_store.keep(page.html_blob) if page.html is None else await blob_store.put(page.html)
+        text_blob = await blob_store.keep(page.text_blob) if page.text_blob else await blob_store.put(page.text)
+        return content_blob, text_blob
+    
+    async def _check_violations(self, page: ParsedPage, rule_set: RuleSet) -> List[Dict[str, Any]]:
         """Проверка на нарушения"""
-        violations = []
-        text = page_data['text']
-        text_lower = text.lower()
+        if page.not_modified and page.text_blob:
+            page.text = await blob_store.get(page.text_blob) or ''
+        await logger.info(f"🔍 Checking violations on page {page.url}")
+        await logger.info(f"📝 Text length: {len(page.text)} characters")
+        await logger.info(f"📋 Found {len(rule_set)} forbidden words to check")
         
-        await logger.info(f"🔍 Checking violations on page {page_data.get('url', 'unknown')}")
-        await logger.info(f"📝 Text length: {len(text)} characters")
-        await logger.info(f"📋 Found {len(forbidden_words)} forbidden words to check")
-        
-        for word_data in forbidden_words:
-            await logger.info(f"🔍 Checking: '{word_data['word']}' (regex: {word_data.get('use_regex', '?')}, case_sensitive: {word_data.get('case_sensitive', '?')})")
-            word = word_data['word']
-            use_regex = word_data.get('use_regex', False)
-            case_sensitive = word_data.get('case_sensitive', False)
-            
-            search_text = text if case_sensitive else text_lower
-            search_word = word if case_sensitive else word.lower()
-            
-            await logger.info(f"🔍 Checking: '{word}' (regex: {use_regex}, case_sensitive: {case_sensitive})")
-            
-            if use_regex:
-                try:
-                    # Используем регулярное выражение
-                    # Если case_sensitive=True, не используем re.IGNORECASE
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    pattern = re.compile(search_word, flags)
-                    matches = pattern.finditer(search_text)
-                    
-                    match_count = 0
-                    for match in matches:
-                        # Извлекаем контекст
-                        start = max(0, match.start() - 50)
-                        end = min(len(search_text), match.end() + 50)
-                        context = search_text[start:end]
-                        
-                        violations.append({
-                            'word': word,
-                            'position': match.start(),
-                            'context': context,
-                            'url': page_data.get('url', ''),
-                            'matched_text': match.group()  # Добавляем найденный текст
-                        })
-                        
-                        match_count += 1
-                        await logger.info(f"  ✅ Found regex violation: '{match.group()}' for pattern '{word}'")
-                    
-                    if match_count == 0:
-                        await logger.info(f"  ❌ No regex matches found for pattern '{word}'")
-                        
-                except re.error as e:
-                    await logger.warning(f"  ❌ Error in regex '{word}': {e}")
-                    continue
-            else:
-                # Простой поиск подстроки
-                if search_word in search_text:
-                    # Находим все вхождения
-                    matches = re.finditer(re.escape(search_word), search_text)
-                    match_count = 0
-                    for match in matches:
-                        # Извлекаем контекст
-                        start = max(0, match.start() - 50)
-                        end = min(len(search_text), match.end() + 50)
-                        context = search_text[start:end]
-                        
-                        violations.append({
-                            'word': word,
-                            'position': match.start(),
-                            'context': context,
-                            'url': page_data.get('url', ''),
-                            'matched_text': match.group()
-                        })
-                        
-                        match_count += 1
-                        await logger.info(f"  ✅ Found word violation: '{match.group()}' for word '{word}'")
-                    
-                    if match_count == 0:
-                        await logger.info(f"  ❌ No word matches found for '{word}'")
-                else:
-                    await logger.info(f"  ❌ Word '{word}' not found in text")
+        # Поиск выполняется вне event loop, чтобы большая страница не блокировала остальные задачи
+        try:
+            violations = await offload_service.run(rule_set.find_violations, page.text, page.url)
+        except RuleSetMissing:
+            # Процесс пула еще не получал эту версию правил - передаем ему слова
+            violations = await offload_service.run(rule_set.with_words().find_violations, page.text, page.url)
         
-        await logger.info(f"🎯 Found {len(violations)} total violations on page {page_data.get('url', 'unknown')}")
+        await logger.info(f"🎯 Found {len(violations)} total violations on page {page.url}")
         return violations
     
-    async def _recalculate_contractor_stats(self, contractor: Contractor):
-        """Пересчет статистики контрагента"""
-        from app.models.scan_result import Violation
-        from app.models.scan_session import ScanSession
-        
-        # Общее количество нарушений
-        total_violations = await Violation.filter(webpage__contractor=contractor).count()
+    @staticmethod
+    def _can_reuse_violations(previous: WebPage | None, page: ParsedPage, rule_set: RuleSet) -> bool:
+        """Верны ли нарушения предыдущей копии для страницы: тот же текст и тот же набор правил"""
+        return (
+            previous is not None
+            and bool(previous.content_hash)
+            and previous.content_hash == page.content_hash
+            and previous.rules_hash == rule_set.fingerprint
+        )
+    
+    async def _copy_violations(self, source: WebPage, target: WebPage) -> List[Dict[str, Any]]:
+        """Перенос нарушений предыдущей копии страницы на новую без повторного поиска"""
+        rows = await Violation.filter(webpage=source).values(
+            'forbidden_word_id', 'forbidden_word__word', 'word_found', 'context', 'position', 'severity'
+        )
+        if not rows:
+            return []
         
-        # Количество сканирований (сессий)
-        scan_sessions_count = await ScanSession.filter(contractor=contractor).count()
+        # Без сессии новая копия - та же запись, и нарушения уже на месте
+        if target.id != source.id:
+            await Violation.bulk_create([
+                Violation(
+                    webpage=target,
+                    forbidden_word_id=row['forbidden_word_id'],
+                    word_found=row['word_found'],
+                    context=row['context'],
+                    position=row['position'],
+                    severity=row['severity']
+                )
+                for row in rows
+            ])
+            target.violations_found = True
+            target.violations_count = len(rows)
+            await target.save(update_fields=['violations_found', 'violations_count'])
+            metrics.increment('violations_copied', len(rows))
+            await logger.info(f"♻️ Copied {len(rows)} violations from page {source.id} to page {target.id}")
         
-        # Количество нарушений в последней сессии
-        last_session = await ScanSession.filter(contractor=contractor).order_by('-started_at').first()
-        last_session_violations = 0
-        if last_session:
-            last_session_violations = await Violation.filter(webpage__scan_session=last_session).count()
+        return [
+            {
+                'word': row['forbidden_word__word'],
+                'forbidden_word_id': row['forbidden_word_id'],
+                'severity': row['severity'],
+                'position': row['position'],
+                'context': row['context'],
+                'url': target.url,
+                'matched_text': row['word_found']
+            }
+            for row in rows
+        ]
+    
+    async def _update_stats(
+        self,
+        contractor: Contractor,
+        scan_session: Optional[ScanSession],
+        page_created: bool,
+        violations_created: int
+    ):
+        """Атомарное обновление статистики сессии и контрагента после сохранения страницы
+
+        Счетчики увеличиваются F-выражениями, без пересчета по истории; расхождения
+        исправляет периодическая сверка (stats_service.reconcile).
+        """
+        if scan_session and page_created:
+            await ScanSession.filter(id=scan_session.id).update(
+                pages_scanned=F('pages_scanned') + 1,
+                pages_with_violations=F('pages_with_violations') + (1 if violations_created else 0),
+                total_violations=F('total_violations') + violations_created
+            )
         
-        # Обновляем статистику контрагента
-        contractor.total_violations = total_violations
-        contractor.scan_sessions_count = scan_sessions_count
-        contractor.last_session_violations = last_session_violations
-        await contractor.save()
+        if not page_created and not violations_created:
+            return
         
-        await logger.info(f"📊 Updated contractor stats: {contractor.name} - Total violations: {total_violations}, Sessions: {scan_sessions_count}, Last session violations: {last_session_violations}")
+        updates = {}
+        if page_created:
+            updates['total_pages'] = F('total_pages') + 1
+            updates['scanned_pages'] = F('scanned_pages') + 1
+        if violations_created:
+            updates['total_violations'] = F('total_violations') + violations_created
+            updates['violations_found'] = F('violations_found') + violations_created
+            # Нарушения последней сессии - только если после этой сессии не запускались новые
+            if scan_session and not await ScanSession.filter(
+                contractor_id=contractor.id, started_at__gt=scan_session.started_at
+            ).exists():
+                updates['last_session_violations'] = F('last_session_violations') + violations_created
+        await Contractor.filter(id=contractor.id).update(**updates)
 
-    async def _save_violations(self, webpage: WebPage, violations: List[Dict[str, Any]]):
-        """Сохранение нарушений"""
-        from app.models.scan_result import Violation
-        from app.models.forbidden_word import ForbiddenWord
-        
+    async def _save_violations(self, webpage: WebPage, violations: List[Dict[str, Any]]) -> int:
+        """Сохранение нарушений одним запросом, возвращает число созданных записей
+
+        Идентификаторы слов берутся из набора правил. Уже записанные нарушения
+        (та же страница, слово, позиция и текст) пропускает уникальный ключ.
+        """
         if not violations:
-            return
+            return 0
         
-        webpage.violations_found = True
-        webpage.violations_count = len(violations)
-        await webpage.save()
+        # У новой страницы нарушений нет - пересчет нужен только при обновлении записи
+        existing = await Violation.filter(webpage=webpage).count() if webpage.violations_found else 0
         
-        # Сохраняем каждое нарушение в базу данных
+        rows = {}
         for violation_data in violations:
-            # Находим соответствующее запрещенное слово
-            forbidden_word = await ForbiddenWord.get_or_none(word=violation_data['word'])
-            if forbidden_word:
-                # Проверяем, существует ли уже такое нарушение на этой странице
-                # (по позиции и найденному слову)
-                existing_violation = await Violation.filter(
-                    webpage=webpage,
-                    forbidden_word=forbidden_word,
-                    position=violation_data['position'],
-                    word_found=violation_data.get('matched_text', violation_data['word'])
-                ).first()
-                
-                if not existing_violation:
-                    await Violation.create(
-                        webpage=webpage,
-                        forbidden_word=forbidden_word,
-                        word_found=violation_data.get('matched_text', violation_data['word']),
-                        context=violation_data['context'],
-                        position=violation_data['position'],
-                        severity=forbidden_word.severity
-                    )
-                    await logger.debug(f"💾 Created new violation: '{violation_data.get('matched_text', violation_data['word'])}' at position {violation_data['position']}")
-                else:
-                    await logger.debug(f"⏭️ Skipped duplicate violation: '{violation_data.get('matched_text', violation_data['word'])}' at position {violation_data['position']}")
-        
-        # Пересчитываем статистику контрагента
-        contractor = webpage.contractor
-        await self._recalculate_contractor_stats(contractor)
+            word_found = violation_data.get('matched_text', violation_data['word'])
+            key = (violation_data['forbidden_word_id'], violation_data['position'], word_found)
+            if key[0] is None or key in rows:
+                continue
+            rows[key] = Violation(
+                webpage=webpage,
+                forbidden_word_id=violation_data['forbidden_word_id'],
+                word_found=word_found,
+                context=violation_data['context'],
+                position=violation_data['position'],
+                severity=violation_data['severity']
+            )
+        if not rows:
+            return 0
         
-        await logger.info(f"💾 Saved violations for page {webpage.url}")
-    
-    async def _extract_links(self, html: str, domain: str) -> List[str]:
-        """Извлечение ссылок из HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        links = []
+        await Violation.bulk_create(rows.values(), batch_size=1000, ignore_conflicts=True)
+        created = await Violation.filter(webpage=webpage).count() - existing if existing else len(rows)
         
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            
-            # Обрабатываем относительные и абсолютные ссылки
-            if href.startswith('/'):
-                full_url = f"https://{domain}{href}"
-            elif href.startswith('http'):
-                # Проверяем, что ссылка ведет на тот же домен
-                parsed = urlparse(href)
-                if parsed.netloc == domain:
-                    full_url = href
-                else:
-                    continue
-            else:
-                continue
-            
-            # Фильтруем нежелательные ссылки
-            if any(skip in full_url.lower() for skip in ['#', 'javascript:', 'mailto:', 'tel:']):
-                continue
-            
-            links.append(full_url)
+        webpage.violations_found = True
+        webpage.violations_count = existing + created
+        await webpage.save(update_fields=['violations_found', 'violations_count'])
         
-        return list(set(links))  # Убираем дубликаты
+        await logger.info(f"💾 Saved {created} violations for page {webpage.url}")
+        return created
 
 # Глобальный экземпляр сервиса
 scanner_service = ScannerService() 
\ No newline at end of file
@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, Tuple
+
+from tortoise.expressions import Subquery
+from tortoise.functions import Count, Max
+
+from app.models.contractor import Contractor
+from app.models.scan_result import Violation
+from app.models.scan_session import ScanSession
+from app.models.webpage import WebPage
+from app.core.metrics import metrics
+from app.core.logging import logger
+
+
+def _counts(rows: Iterable[dict], key: str) -> Dict[int, int]:
+    """Результат группировки в виде {id: количество}"""
+    return {row[key]: row['n'] for row in rows if row[key] is not None}
+
+
+class StatsService:
+    """Сверка счетчиков статистики с данными
+
+    Сканер увеличивает счетчики ScanSession и Contractor атомарно по мере записи страниц
+    и нарушений. Сверка пересчитывает их группирующими запросами и исправляет
+    расхождения (удаление данных, сбои между записью страницы и счетчика).
+
+    Запущенные сессии и их контрагенты пропускаются: их счетчики еще меняются. Сессия может
+    запуститься или завершиться во время пересчета, поэтому исправление записывается условно:
+    только если запись не относится к запущенной сессии и счетчики с момента чтения не менялись.
+    Иначе запись остается до следующей сверки.
+
+    У контрагента сверяются счетчики, которые читает API (итоги на dashboard). total_pages
+    не сверяется: его никто не читает, а список и карточка контрагента считают суммы по сессиям.
+    """
+
+    async def reconcile(self) -> Tuple[int, int]:
+        """Сверка всех сессий и контрагентов, возвращает число исправленных записей"""
+        sessions_fixed = await self._reconcile_sessions()
+        contractors_fixed = await self._reconcile_contractors()
+
+        metrics.increment('stats_sessions_fixed', sessions_fixed)
+        metrics.increment('stats_contractors_fixed', contractors_fixed)
+        await logger.info(f"📊 Stats reconciled: {sessions_fixed} sessions and {contractors_fixed} contractors fixed")
+        return sessions_fixed, contractors_fixed
+
+    async def _reconcile_sessions(self) -> int:
+        """Сверка pages_scanned, pages_with_violations и total_violations сессий"""
+        # Счетчики читаются до пересчета - по ним обновление проверяет, что их не меняли
+        fields: List[str] = ['pages_scanned', 'pages_with_violations', 'total_violations']
+        sessions = await ScanSession.exclude(status='running').values('id', *fields)
+
+        pages = _counts(
+            await WebPage.annotate(n=Count('id')).group_by('scan_session_id').values('scan_session_id', 'n'),
+            'scan_session_id'
+        )
+        pages_with_violations = _counts(
+            await WebPage.filter(violations_found=True).annotate(n=Count('id'))
+            .group_by('scan_session_id').values('scan_session_id', 'n'),
+            'scan_session_id'
+        )
+        violations = _counts(
+            await Violation.annotate(n=Count('id')).group_by('webpage__scan_session_id')
+            .values('webpage__scan_session_id', 'n'),
+            'webpage__scan_session_id'
+        )
+
+        fixed = 0
+        for session in sessions:
+            actual = {
+                'pages_scanned': pages.get(session['id'], 0),
+                'pages_with_violations': pages_with_violations.get(session['id'], 0),
+                'total_violations': violations.get(session['id'], 0),
+            }
+            if not self._differs(session, actual):
+                continue
+            updated = await ScanSession.filter(
+                id=session['id'], **{name: session[name] for name in fields}
+            ).exclude(status='running').update(**actual)
+            if updated:
+                await logger.warning(f"⚠️ Session {session['id']} stats drifted, fixed: {actual}")
+                fixed += 1
+        return fixed
+
+    async def _reconcile_contractors(self) -> int:
+        """Сверка счетчиков страниц, нарушений и сессий контрагентов"""
+        fields: List[str] = [
+            'scanned_pages', 'violations_found', 'total_violations', 'scan_sessions_count', 'last_session_violations'
+        ]
+        running = Subquery(ScanSession.filter(status='running').values('contractor_id'))
+        contractors = await Contractor.exclude(id__in=running).values('id', *fields)
+
+        scanned_pages = _counts(
+            await WebPage.filter(last_scanned__isnull=False).annotate(n=Count('id'))
+            .group_by('contractor_id').values('contractor_id', 'n'),
+            'contractor_id'
+        )
+        violations = _counts(
+            await Violation.annotate(n=Count('id')).group_by('webpage__contractor_id')
+            .values('webpage__contractor_id', 'n'),
+            'webpage__contractor_id'
+        )
+        sessions = _counts(
+            await ScanSession.annotate(n=Count('id')).group_by('contractor_id').values('contractor_id', 'n'),
+            'contractor_id'
+        )
+        last_sessions = {
+            row['contractor_id']: row['last_id']
+            for row in await ScanSession.annotate(last_id=Max('id')).group_by('contractor_id')
+            .values('contractor_id', 'last_id')
+        }
+        session_violations = _counts(
+            await Violation.filter(webpage__scan_session_id__in=list(last_sessions.values()))
+            .annotate(n=Count('id')).group_by('webpage__scan_session_id')
+            .values('webpage__scan_session_id', 'n'),
+            'webpage__scan_session_id'
+        ) if last_sessions else {}
+
+        fixed = 0
+        for contractor in contractors:
+            contractor_id = contractor['id']
+            actual = {
+                'scanned_pages': scanned_pages.get(contractor_id, 0),
+                'violations_found': violations.get(contractor_id, 0),
+                'total_violations': violations.get(contractor_id, 0),
+                'scan_sessions_count': sessions.get(contractor_id, 0),
+                'last_session_violations': session_violations.get(last_sessions.get(contractor_id), 0),
+            }
+            if not self._differs(contractor, actual):
+                continue
+            updated = await Contractor.filter(
+                id=contractor_id, **{name: contractor[name] for name in fields}
+            ).exclude(id__in=running).update(**actual)
+            if updated:
+                await logger.warning(f"⚠️ Contractor {contractor_id} stats drifted, fixed: {actual}")
+                fixed += 1
+        return fixed
+
+    @staticmethod
+    def _differs(stored: dict, actual: dict) -> bool:
+        return any(stored[name] != value for name, value in actual.items())
+
+
+# Глобальный экземпляр сервиса
+stats_service = StatsService()
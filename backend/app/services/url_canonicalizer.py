@@ -0,0 +1,168 @@
+"""Канонический вид URL - ключ дедупликации страниц при обходе
+
+Загружается исходный адрес ссылки (resolve_url), а канонический вид используется только
+как ключ: под ним сохраняется страница и отмечаются ссылки во фронтире сессии. Так сайт
+получает ровно те адреса, на которые ссылается, без лишних редиректов из-за "/" или
+перекодированного запроса.
+
+Нормализация по RFC 3986: схема и хост в нижнем регистре, хост в IDNA, без порта
+по умолчанию, без сегментов "." и "..", единый вид процентного кодирования,
+без фрагмента. Дополнительно по правилам контрагента: синонимы хоста приводятся
+к основному домену, служебные параметры запроса (utm_* и т.п.) удаляются,
+оставшиеся сортируются, завершающий "/" пути отбрасывается.
+"""
+import re
+import string
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+from app.core.config import settings
+
+
+ALLOWED_SCHEMES = ('http', 'https')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_UNRESERVED = frozenset(string.ascii_letters + string.digits + '-._~')
+_PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+_INVALID_HOST_CHARS = re.compile(r'[\s<>"{}|\\^`%]')
+# Символы, которые в пути остаются как есть (остальное кодируется)
+_PATH_SAFE = "/:@!$&'()*+,;=%"
+
+
+@dataclass(frozen=True, slots=True)
+class UrlRules:
+    """Правила канонизации ссылок одного контрагента"""
+    host: str
+    aliases: FrozenSet[str] = frozenset()
+    strip_params: Tuple[str, ...] = ()
+    strip_trailing_slash: bool = True
+    _strip_prefixes: Tuple[str, ...] = field(default=(), repr=False)
+
+    def __post_init__(self):
+        # Шаблоны вида utm_* удаляют все параметры с этим префиксом
+        prefixes = tuple(name[:-1].lower() for name in self.strip_params if name.endswith('*'))
+        object.__setattr__(self, '_strip_prefixes', prefixes)
+
+    def strips(self, name: str) -> bool:
+        """Нужно ли удалить параметр запроса"""
+        name = name.lower()
+        return name in self.strip_params or name.startswith(self._strip_prefixes)
+
+    def is_internal(self, url: str) -> bool:
+        """Ссылка ведет на домен контрагента"""
+        return urlsplit(url).netloc == self.host
+
+
+def _normalize_escapes(part: str, safe: str) -> str:
+    # Экранированные незарезервированные символы раскодируются, остальные экранирования - в верхнем регистре
+    part = _PERCENT_ESCAPE.sub(
+        lambda match: chr(int(match.group(1), 16))
+        if chr(int(match.group(1), 16)) in _UNRESERVED else '%' + match.group(1).upper(),
+        part
+    )
+    return quote(part, safe=safe)
+
+
+def remove_dot_segments(path: str) -> str:
+    """Удаление сегментов "." и ".." (RFC 3986, 5.2.4)"""
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output) or '/'
+
+
+def canonical_netloc(scheme: str, hostname: str | None, port: int | None) -> str | None:
+    """Хост в IDNA и нижнем регистре, порт - только если он не по умолчанию"""
+    if not hostname:
+        return None
+    hostname = hostname.rstrip('.')
+    if _INVALID_HOST_CHARS.search(hostname):
+        return None
+    try:
+        hostname = hostname.encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return None
+    if ':' in hostname:
+        hostname = f'[{hostname}]'
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        return f'{hostname}:{port}'
+    return hostname
+
+
+def resolve_url(href: str, base_url: str | None = None) -> str:
+    """Абсолютный адрес ссылки для загрузки: как на странице, без фрагмента"""
+    href = href.strip()
+    return urldefrag(urljoin(base_url, href) if base_url else href).url
+
+
+def canonicalize(href: str, base_url: str | None = None, rules: UrlRules | None = None) -> str | None:
+    """Канонический абсолютный URL ссылки или None, если это не http(s)-ссылка"""
+    href = href.strip()
+    if not href:
+        return None
+    try:
+        parts = urlsplit(urljoin(base_url, href) if base_url else href)
+        scheme = parts.scheme.lower()
+        if scheme not in ALLOWED_SCHEMES:
+            return None
+        netloc = canonical_netloc(scheme, parts.hostname, parts.port)
+    except ValueError:
+        return None
+    if netloc is None:
+        return None
+
+    path = remove_dot_segments(_normalize_escapes(parts.path, _PATH_SAFE) or '/')
+    query_items = parse_qsl(parts.query, keep_blank_values=True)
+
+    if rules is not None:
+        if netloc in rules.aliases:
+            netloc = rules.host
+        if rules.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip('/') or '/'
+        query_items = [(name, value) for name, value in query_items if not rules.strips(name)]
+
+    query = urlencode(sorted(query_items, key=lambda item: item[0]), quote_via=quote)
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def build_url_rules(
+    domain: str,
+    host_aliases: Iterable[str] | None = None,
+    strip_query_params: Iterable[str] | None = None
+) -> UrlRules:
+    """Правила контрагента: его домен, синонимы (www.-вариант - всегда) и удаляемые параметры"""
+    def netloc_of(value: str) -> str | None:
+        parts = urlsplit(value if '//' in value else f'//{value}')
+        try:
+            return canonical_netloc(parts.scheme or 'https', parts.hostname, parts.port)
+        except ValueError:
+            return None
+
+    host = netloc_of(domain) or domain.lower()
+    aliases = {netloc_of(alias) for alias in (host_aliases or [])}
+    aliases.add(host[4:] if host.startswith('www.') else f'www.{host}')
+    aliases.discard(None)
+    aliases.discard(host)
+
+    strip_params = [name.strip().lower() for name in settings.url_strip_query_params.split(',') if name.strip()]
+    strip_params.extend(name.strip().lower() for name in (strip_query_params or []) if name.strip())
+
+    return UrlRules(
+        host=host,
+        aliases=frozenset(aliases),
+        strip_params=tuple(dict.fromkeys(strip_params)),
+        strip_trailing_slash=settings.url_strip_trailing_slash
+    )
+
+
+def url_priority(url: str) -> Tuple[int, int]:
+    """Ключ порядка обхода: меньше сегментов пути и без параметров запроса - раньше"""
+    parts = urlsplit(url)
+    return parts.path.count('/') - (1 if parts.path.endswith('/') else 0), 1 if parts.query else 0
@@ -0,0 +1,151 @@
+"""Фронтир сессии сканирования: какие URL уже поставлены в очередь или просканированы
+
+Ссылка ставится в очередь, только если ее удалось отметить в таблице session_urls
+(INSERT ... ON CONFLICT DO NOTHING): таблица общая для всех процессов воркеров, поэтому
+ссылку, найденную одновременно несколькими процессами, ставит в очередь ровно один.
+
+Перед обращением к таблице ссылки проверяются масштабируемым фильтром Блума в памяти
+процесса - так отсеиваются уже встреченные этим процессом ссылки без запроса к базе.
+Фильтр сессии при первом обращении заполняется URL страниц, уже сохраненных в этой
+сессии. Ложноположительный ответ фильтра (ссылка считается известной, хотя не была)
+возможен с вероятностью порядка frontier_error_rate; ложноотрицательных нет.
+"""
+import asyncio
+import hashlib
+import math
+from collections import OrderedDict
+from typing import Iterable, List
+
+from pypika_tortoise import Table
+from tortoise import connections
+
+from app.models.session_url import SessionUrl
+from app.models.webpage import WebPage
+from app.core.config import settings
+
+
+def url_key(url: str) -> str:
+    """Ключ URL в session_urls (совпадает с md5(url) в Postgres)"""
+    return hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+class BloomFilter:
+    """Фильтр Блума фиксированной емкости"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Двойное хеширование: k позиций из двух 64-битных половин одного дайджеста
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Добавление элемента; True, если его еще не было"""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+class ScalableBloomFilter:
+    """Фильтр Блума без заранее известного числа элементов
+
+    Когда текущий фильтр заполнен, добавляется следующий вдвое большей емкости
+    с вдвое меньшей вероятностью ошибки, так что общая ошибка не превышает 2 * error_rate.
+    """
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int, error_rate: float):
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - self.TIGHTENING))]
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom for bloom in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, item: str) -> bool:
+        """Добавление элемента; True, если его еще не было"""
+        if item in self:
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.GROWTH, current.error_rate * self.TIGHTENING)
+            self.filters.append(current)
+        return current.add(item)
+
+
+class UrlFrontier:
+    """Фильтры URL по сессиям сканирования; хранятся последние frontier_max_sessions сессий"""
+
+    def __init__(self):
+        self._sessions: OrderedDict[int, ScalableBloomFilter] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, session_id: int) -> ScalableBloomFilter:
+        """Фильтр сессии; при первом обращении заполняется страницами сессии из базы"""
+        seen = self._sessions.get(session_id)
+        if seen is not None:
+            self._sessions.move_to_end(session_id)
+            return seen
+
+        async with self._lock:
+            seen = self._sessions.get(session_id)
+            if seen is None:
+                seen = ScalableBloomFilter(settings.frontier_initial_capacity, settings.frontier_error_rate)
+                for url in await WebPage.filter(scan_session_id=session_id).values_list('url', flat=True):
+                    seen.add(url)
+                self._sessions[session_id] = seen
+                while len(self._sessions) > settings.frontier_max_sessions:
+                    self._sessions.popitem(last=False)
+        return seen
+
+    @staticmethod
+    async def claim(session_id: int, urls: List[str]) -> List[str]:
+        """Отметка URL в сессии одним запросом; возвращает в исходном порядке те, что еще не были отмечены"""
+        keys = {url_key(url): url for url in urls}
+        if not keys:
+            return []
+        connection = connections.get('default')
+        query = connection.query_class.into(Table(SessionUrl._meta.db_table)).columns('scan_session_id', 'url_hash')
+        for key in keys:
+            query = query.insert(session_id, key)
+        query = query.on_conflict('scan_session_id', 'url_hash').do_nothing().returning('url_hash')
+        claimed = {row['url_hash'] for row in await connection.execute_query_dict(query.get_sql())}
+        return [url for key, url in keys.items() if key in claimed]
+
+    async def release(self, session_id: int, urls: List[str]):
+        """Снятие отметок с URL, которые не удалось поставить в очередь
+
+        Фильтр Блума процесса сбрасывается (удалить из него URL нельзя) и при следующем
+        обращении заполняется заново, иначе этот процесс считал бы URL уже поставленными.
+        """
+        self._sessions.pop(session_id, None)
+        if urls:
+            await SessionUrl.filter(scan_session_id=session_id, url_hash__in=[url_key(url) for url in urls]).delete()
+
+    async def forget(self, session_id: int):
+        """Освобождение фильтра и отметок завершенной сессии"""
+        self._sessions.pop(session_id, None)
+        await SessionUrl.filter(scan_session_id=session_id).delete()
+
+
+# Глобальный экземпляр фронтира
+url_frontier = UrlFrontier()
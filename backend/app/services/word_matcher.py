@@ -0,0 +1,498 @@
+import hashlib
+import json
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, List, Iterator, Tuple, Hashable
+
+# Внутренний модуль разбора re (до 3.11 - sre_parse), стабильность не гарантируется:
+# без него обязательная строка шаблона не ищется и регулярные выражения проверяются без отбора
+try:
+    from re import _parser
+except ImportError:
+    _parser = None
+
+
+# Сколько символов вокруг совпадения сохраняем в контексте нарушения
+CONTEXT_SIZE = 50
+# Версия алгоритма поиска: увеличить, если при тех же правилах меняется результат
+MATCHER_VERSION = 3
+
+
+def make_violation(word_data: Dict[str, Any], source: str, position: int, end: int, url: str) -> Dict[str, Any]:
+    """Описание найденного нарушения с контекстом вокруг совпадения"""
+    return {
+        'word': word_data['word'],
+        'forbidden_word_id': word_data.get('id'),
+        'severity': word_data.get('severity', 'medium'),
+        'position': position,
+        'context': source[max(0, position - CONTEXT_SIZE):end + CONTEXT_SIZE],
+        'url': url,
+        'matched_text': source[position:end]
+    }
+
+
+class AhoCorasick:
+    """Автомат Ахо-Корасик: поиск всех вхождений множества подстрок за один проход по тексту"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, pattern: str) -> int:
+        """Добавление шаблона, возвращает его индекс"""
+        if self._built:
+            raise RuntimeError("Automaton is already built")
+        if not pattern:
+            raise ValueError("Empty pattern")
+
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+
+        index = len(self._lengths)
+        self._lengths.append(len(pattern))
+        self._output[node].append(index)
+        return index
+
+    def build(self):
+        """Построение суффиксных ссылок (обход в ширину по бору)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                if self._output[fail]:
+                    # Наследуем шаблоны, оканчивающиеся в суффиксе
+                    self._output[child] = self._output[child] + self._output[fail]
+        self._built = True
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Все вхождения шаблонов, в том числе перекрывающиеся: (начало, конец, индекс шаблона)"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        lengths = self._lengths
+
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for index in output[node]:
+                    yield end - lengths[index], end, index
+
+
+# С меньшим числом слов цикл str.find по словам быстрее прохода автомата по тексту
+# (автомат проходит текст посимвольно в Python, str.find - в C); см. benchmarks/word_matcher_benchmark.py
+AUTOMATON_MIN_WORDS = 400
+
+
+class PlainWordMatcher:
+    """Поиск всех запрещенных слов без регулярных выражений
+
+    Небольшой набор слов (меньше AUTOMATON_MIN_WORDS) ищется по одному слову через str.find.
+    Большой набор - за один проход по тексту: все слова приводятся к нижнему регистру
+    и попадают в один автомат, который проходит по тексту в нижнем регистре. Совпадения
+    слов с учетом регистра дополнительно сверяются с исходным текстом. Результаты обоих
+    способов совпадают.
+    """
+
+    def __init__(self, forbidden_words: List[Dict[str, Any]], use_automaton: bool | None = None):
+        self._words: List[Dict[str, Any]] = [
+            word_data for word_data in forbidden_words
+            if not word_data.get('use_regex', False) and word_data['word']
+        ]
+        if use_automaton is None:
+            use_automaton = len(self._words) >= AUTOMATON_MIN_WORDS
+
+        self._automaton: AhoCorasick | None = None
+        if use_automaton:
+            self._automaton = AhoCorasick()
+            for word_data in self._words:
+                self._automaton.add(word_data['word'].lower())
+            self._automaton.build()
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def find_violations(self, text: str, url: str = '', text_lower: str | None = None) -> List[Dict[str, Any]]:
+        """Поиск нарушений: позиция, найденный текст и контекст для каждого вхождения"""
+        if not self._words:
+            return []
+        if text_lower is None:
+            text_lower = text.lower()
+
+        if self._automaton is None:
+            return list(self._find_each(text, text_lower, url))
+
+        if len(text_lower) == len(text):
+            return list(self._find(text_lower, text, url))
+
+        # Редкий случай: lower() изменил длину текста (например, 'İ') и позиции не совпадают -
+        # слова с учетом регистра ищем отдельно по исходному тексту
+        return list(self._find(text_lower, None, url)) + list(self._find_case_sensitive(text, url))
+
+    def _find_each(self, text: str, text_lower: str, url: str) -> Iterator[Dict[str, Any]]:
+        for word_data in self._words:
+            if word_data.get('case_sensitive', False):
+                search_text, word = text, word_data['word']
+            else:
+                search_text, word = text_lower, word_data['word'].lower()
+            position = search_text.find(word)
+            while position != -1:
+                end = position + len(word)
+                yield make_violation(word_data, search_text, position, end, url)
+                position = search_text.find(word, end)
+
+    def _find(self, text_lower: str, text: str | None, url: str) -> Iterator[Dict[str, Any]]:
+        words = self._words
+        # Вхождения одного слова не должны перекрываться - как при re.finditer по каждому слову
+        last_end: Dict[int, int] = {}
+
+        for position, end, index in self._automaton.finditer(text_lower):
+            if position < last_end.get(index, 0):
+                continue
+            word_data = words[index]
+
+            if word_data.get('case_sensitive', False):
+                if text is None or text[position:end] != word_data['word']:
+                    continue
+                source = text
+            else:
+                source = text_lower
+            last_end[index] = end
+
+            yield make_violation(word_data, source, position, end, url)
+
+    def _find_case_sensitive(self, text: str, url: str) -> Iterator[Dict[str, Any]]:
+        for word_data in self._words:
+            if not word_data.get('case_sensitive', False):
+                continue
+            word = word_data['word']
+            position = text.find(word)
+            while position != -1:
+                end = position + len(word)
+                yield make_violation(word_data, text, position, end, url)
+                position = text.find(word, end)
+
+
+# Сколько регулярных выражений объединяется в одну альтернативу
+COMBINED_REGEX_CHUNK_SIZE = 100
+# Более короткие обязательные подстроки встречаются почти на любой странице и ничего не отсеивают
+PREFILTER_MIN_LENGTH = 3
+
+# Обратные ссылки, именованные группы, встроенные флаги и условные конструкции
+# зависят от нумерации групп или флагов всего шаблона - такие правила не объединяем
+_UNMERGEABLE_REGEX = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?<(?![=!])|\(\?[aiLmsux-]+[:)]|\(\?\(')
+
+def is_mergeable_regex(pattern: re.Pattern) -> bool:
+    """Можно ли включить регулярное выражение в общую альтернативу"""
+    if _UNMERGEABLE_REGEX.search(pattern.pattern):
+        return False
+    # Шаблон, совпадающий с пустой строкой, перекрыл бы остальные альтернативы
+    return pattern.match('') is None
+
+
+def required_literal(pattern: str) -> str:
+    """Самая длинная строка, которая обязательно входит в любое совпадение шаблона
+
+    Строится по дереву разбора re: учитываются только буквальные символы верхнего
+    уровня (экранированные - \\x63, \\N{...} и т.п. - тоже), группы, классы,
+    квантификаторы и альтернативы разрывают строку. Для шаблонов со встроенными
+    флагами и без модуля разбора re возвращается пустая строка.
+    """
+    if _parser is None:
+        return ''
+    try:
+        parsed = _parser.parse(pattern)
+        if parsed.state.flags & ~re.UNICODE:
+            return ''
+
+        runs = []
+        run = []
+        for op, value in parsed:
+            if op is _parser.LITERAL:
+                run.append(chr(value))
+            elif run:
+                runs.append(''.join(run))
+                run = []
+    except (re.error, AttributeError, TypeError, ValueError):
+        # Ошибка шаблона или другое устройство дерева разбора в новой версии Python
+        return ''
+    if run:
+        runs.append(''.join(run))
+    return max(runs, key=len, default='')
+
+
+@lru_cache(maxsize=1)
+def _bmp_chars() -> str:
+    return ''.join(chr(code) for code in range(0x10000) if not 0xD800 <= code <= 0xDFFF)
+
+
+@lru_cache(maxsize=None)
+def _folds_to_itself(char: str) -> bool:
+    """re.IGNORECASE сопоставляет символу только его варианты регистра
+
+    Для некоторых символов есть дополнительные совпадения (например, 's' и 'ſ'),
+    которые не приводятся к нему через lower() - их нельзя искать как подстроку.
+    """
+    return all(
+        variant.lower() == char
+        for variant in re.findall(re.escape(char), _bmp_chars(), re.IGNORECASE)
+    )
+
+
+def prefilter_literal(pattern: re.Pattern) -> str:
+    """Подстрока для быстрого отсева правила: если ее нет в тексте, совпадений нет"""
+    literal = required_literal(pattern.pattern)
+    if not pattern.flags & re.IGNORECASE:
+        return literal
+
+    # Ищем по тексту в нижнем регистре - оставляем только символы без особых случаев регистра
+    parts = []
+    current = []
+    for char in literal.lower():
+        if len(char) == 1 and _folds_to_itself(char):
+            current.append(char)
+        else:
+            parts.append(''.join(current))
+            current = []
+    parts.append(''.join(current))
+    return max(parts, key=len)
+
+
+def find_regex_violations(
+    regex_rules: List[Tuple[Dict[str, Any], re.Pattern]],
+    text: str,
+    text_lower: str,
+    url: str
+) -> Iterator[Dict[str, Any]]:
+    """Поиск нарушений отдельным проходом для каждого регулярного выражения"""
+    for word_data, pattern in regex_rules:
+        search_text = text if word_data.get('case_sensitive', False) else text_lower
+        for match in pattern.finditer(search_text):
+            yield make_violation(word_data, search_text, match.start(), match.end(), url)
+
+
+class CombinedRegexMatcher:
+    """Проверка регулярных выражений с минимальным числом проходов по тексту
+
+    Правила с обязательной подстрокой (например, 'casino' в r'\\bcasino\\d*') запускаются
+    только если эта подстрока есть на странице - проверка подстроки в десятки раз дешевле
+    прохода регулярного выражения. Остальные совместимые правила объединяются в несколько
+    альтернатив, раздельно по учету регистра. Альтернативы незахватывающие: именованные
+    группы отключают оптимизации движка re и замедляют поиск в десятки раз, поэтому правило,
+    давшее совпадение, определяется повторным match в позиции совпадения. Альтернатива находит
+    самое левое совпадение, поэтому из перекрывающихся совпадений разных правил сообщается
+    только первое. Правила с обратными ссылками, встроенными флагами и т.п. проверяются
+    по отдельности.
+    """
+
+    def __init__(self, regex_rules: List[Tuple[Dict[str, Any], re.Pattern]]):
+        self.guarded: List[Tuple[str, Dict[str, Any], re.Pattern]] = []
+        self.combined: List[Tuple[bool, re.Pattern, List[Tuple[Dict[str, Any], re.Pattern]]]] = []
+        self.separate: List[Tuple[Dict[str, Any], re.Pattern]] = []
+
+        mergeable: Dict[bool, List[Tuple[Dict[str, Any], re.Pattern]]] = {True: [], False: []}
+        for word_data, pattern in regex_rules:
+            literal = prefilter_literal(pattern)
+            if len(literal) >= PREFILTER_MIN_LENGTH:
+                self.guarded.append((literal, word_data, pattern))
+            elif is_mergeable_regex(pattern):
+                mergeable[word_data.get('case_sensitive', False)].append((word_data, pattern))
+            else:
+                self.separate.append((word_data, pattern))
+
+        for case_sensitive, rules in mergeable.items():
+            for offset in range(0, len(rules), COMBINED_REGEX_CHUNK_SIZE):
+                self._combine(case_sensitive, rules[offset:offset + COMBINED_REGEX_CHUNK_SIZE])
+
+    def _combine(self, case_sensitive: bool, rules: List[Tuple[Dict[str, Any], re.Pattern]]):
+        alternatives = '|'.join(f'(?:{pattern.pattern})' for _, pattern in rules)
+        try:
+            combined = re.compile(alternatives, 0 if case_sensitive else re.IGNORECASE)
+        except re.error:
+            self.separate.extend(rules)
+            return
+        self.combined.append((case_sensitive, combined, rules))
+
+    def find_violations(self, text: str, text_lower: str, url: str = '') -> List[Dict[str, Any]]:
+        """Поиск нарушений всеми регулярными выражениями набора"""
+        violations = []
+
+        candidates = []
+        for literal, word_data, pattern in self.guarded:
+            search_text = text if word_data.get('case_sensitive', False) else text_lower
+            if literal in search_text:
+                candidates.append((word_data, pattern))
+        violations.extend(find_regex_violations(candidates, text, text_lower, url))
+
+        for case_sensitive, combined, rules in self.combined:
+            search_text = text if case_sensitive else text_lower
+            for match in combined.finditer(search_text):
+                word_data = self._matched_rule(rules, search_text, match)
+                if word_data is not None:
+                    violations.append(make_violation(word_data, search_text, match.start(), match.end(), url))
+
+        violations.extend(find_regex_violations(self.separate, text, text_lower, url))
+        return violations
+
+    @staticmethod
+    def _matched_rule(
+        rules: List[Tuple[Dict[str, Any], re.Pattern]],
+        search_text: str,
+        match: re.Match
+    ) -> Dict[str, Any] | None:
+        # Альтернатива выбирает первое по порядку правило, совпавшее в этой позиции
+        for word_data, pattern in rules:
+            rule_match = pattern.match(search_text, match.start())
+            if rule_match is not None and rule_match.end() == match.end():
+                return word_data
+        return None
+
+
+def rule_set_fingerprint(forbidden_words: List[Dict[str, Any]], combine_regex: bool) -> str:
+    """Хеш всего, от чего зависит результат поиска: при равных хешах нарушения на одном тексте совпадают"""
+    rules = sorted(
+        json.dumps([
+            word_data.get('id'),
+            word_data['word'],
+            bool(word_data.get('use_regex', False)),
+            bool(word_data.get('case_sensitive', False)),
+            word_data.get('severity', 'medium')
+        ], ensure_ascii=False)
+        for word_data in forbidden_words
+    )
+    payload = json.dumps([MATCHER_VERSION, CONTEXT_SIZE, combine_regex, rules], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Наборы правил, восстановленные в дочерних процессах пула, по версии
+_restored_rule_sets: Dict[Tuple[Hashable, bool], 'RuleSet'] = {}
+
+
+class RuleSetMissing(Exception):
+    """В процессе пула нет набора правил этой версии - задачу нужно повторить со словами"""
+
+
+class _MissingRuleSet:
+    """Заместитель набора правил, которого нет в процессе пула
+
+    Ошибка возникает при вызове, а не при распаковке задачи: исключение при распаковке
+    остановило бы процесс пула.
+    """
+
+    def __init__(self, version: Hashable):
+        self.version = version
+
+    def find_violations(self, text: str, url: str = ''):
+        raise RuleSetMissing(self.version)
+
+
+def _restore_rule_set(
+    version: Hashable,
+    combine_regex: bool,
+    forbidden_words: List[Dict[str, Any]] | None
+) -> 'RuleSet | _MissingRuleSet':
+    key = (version, combine_regex)
+    rule_set = _restored_rule_sets.get(key)
+    if rule_set is not None:
+        return rule_set
+    if forbidden_words is None:
+        return _MissingRuleSet(version)
+
+    rule_set = RuleSet(forbidden_words, version, combine_regex)
+    if version is not None:
+        # Достаточно последней версии - старые наборы больше не понадобятся
+        _restored_rule_sets.clear()
+        _restored_rule_sets[key] = rule_set
+    return rule_set
+
+
+class RuleSet:
+    """Скомпилированный набор активных запрещенных слов
+
+    Хранит автомат для простых слов, скомпилированные регулярные выражения
+    и метаданные слов (id, критичность). Создается один раз на версию правил.
+    При combine_regex регулярные выражения проверяются объединенными альтернативами.
+
+    При передаче в пул процессов сериализуется только версия: процесс пула берет
+    скомпилированный набор из своего кеша. Если набора этой версии в процессе еще нет,
+    вызов завершается RuleSetMissing, и задача повторяется с набором with_words() -
+    со словами, по которым процесс собирает и кеширует набор. Так слова передаются
+    в каждый процесс пула один раз на версию. Набор без версии передается со словами всегда.
+
+    fingerprint сохраняется вместе со страницей: по нему видно, что нарушения
+    страницы найдены тем же набором правил.
+    """
+
+    def __init__(self, forbidden_words: List[Dict[str, Any]], version: Hashable = None, combine_regex: bool = False):
+        self.version = version
+        self.combine_regex = combine_regex
+        self.words = forbidden_words
+        # Передавать слова при сериализации (см. with_words)
+        self._ship_words = version is None
+        self.fingerprint = rule_set_fingerprint(forbidden_words, combine_regex)
+        self.word_matcher = PlainWordMatcher(forbidden_words)
+        self.regex_rules: List[Tuple[Dict[str, Any], re.Pattern]] = []
+        self.invalid_rules: List[Tuple[Dict[str, Any], str]] = []
+
+        for word_data in forbidden_words:
+            if not word_data.get('use_regex', False):
+                continue
+            # Если case_sensitive=True, не используем re.IGNORECASE
+            flags = 0 if word_data.get('case_sensitive', False) else re.IGNORECASE
+            try:
+                self.regex_rules.append((word_data, re.compile(word_data['word'], flags)))
+            except re.error as e:
+                self.invalid_rules.append((word_data, str(e)))
+
+        self.regex_matcher = CombinedRegexMatcher(self.regex_rules) if combine_regex else None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __reduce__(self):
+        return _restore_rule_set, (self.version, self.combine_regex, self.words if self._ship_words else None)
+
+    def with_words(self) -> 'RuleSet':
+        """Тот же набор, который передается в пул процессов вместе со словами"""
+        shipped = object.__new__(RuleSet)
+        shipped.__dict__.update(self.__dict__)
+        shipped._ship_words = True
+        return shipped
+
+    def find_violations(self, text: str, url: str = '') -> List[Dict[str, Any]]:
+        """Поиск всех нарушений на странице"""
+        text_lower = text.lower()
+        violations = self.word_matcher.find_violations(text, url, text_lower)
+
+        if self.regex_matcher is not None:
+            violations.extend(self.regex_matcher.find_violations(text, text_lower, url))
+        else:
+            violations.extend(find_regex_violations(self.regex_rules, text, text_lower, url))
+
+        return violations
@@ -0,0 +1,63 @@
+import asyncio
+import signal
+import time
+
+from app.services.stats_service import stats_service
+from app.services.blob_store import blob_store
+from app.services.retention_service import retention_service
+from app.services.deletion_service import deletion_service
+from app.core.config import settings
+from app.core.database import init_db, close_db
+from app.core.logging import logger
+
+
+async def run_job(name: str, job):
+    """Запуск обслуживающей задачи: ошибка одной задачи не останавливает worker"""
+    try:
+        await job()
+    except Exception as e:
+        await logger.error(f"❌ Maintenance job {name} failed: {e}")
+        await logger.exception("Full traceback:")
+
+
+async def start_maintenance_worker():
+    """Периодические обслуживающие задачи: сверка счетчиков статистики, перенос контента страниц
+    в хранилище, очистка старых данных и фоновое удаление по запросу из API"""
+    await logger.info("🔧 Starting maintenance worker...")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await init_db()
+    await logger.info("✅ Database initialized for maintenance worker")
+    await blob_store.check_compression()
+
+    # Время следующего запуска каждой задачи; первый запуск - сразу после старта
+    jobs = {
+        'stats_reconcile': (settings.stats_reconcile_interval, stats_service.reconcile),
+        'blob_migrate': (settings.blob_migrate_interval, blob_store.migrate_pages),
+        'retention': (settings.retention_interval, retention_service.run),
+        'deletion_jobs': (settings.deletion_job_interval, deletion_service.run_pending),
+    }
+    next_run = {name: 0.0 for name in jobs}
+
+    try:
+        while not stop.is_set():
+            for name, (interval, job) in jobs.items():
+                if interval and time.monotonic() >= next_run[name]:
+                    await run_job(name, job)
+                    next_run[name] = time.monotonic() + interval
+            try:
+                await asyncio.wait_for(stop.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await close_db()
+        await logger.info("👋 Maintenance worker shutdown complete")
+        await logger.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(start_maintenance_worker())
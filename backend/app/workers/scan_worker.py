@@ -1,69 +1,141 @@
 import asyncio
-from typing import Dict, Any
+import signal
+import time
+from typing import Dict, Any, Optional
 from app.services.queue_service import queue_service
 from app.services.scanner_service import scanner_service
-from app.core.database import init_db
+from app.services.rule_set_service import rule_set_service
+from app.services.offload_service import offload_service
+from app.services.html_parsers import get_parser
+from app.services.blob_store import blob_store
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.database import init_db, close_db
 from app.core.logging import logger
 
 
 async def process_scan_task(task_data: Dict[str, Any]):
-    """Обработка задачи сканирования"""
-    try:
-        contractor_id = task_data['contractor_id']
-        url = task_data['url']
-        depth = task_data.get('depth', 0)
-        session_id = task_data.get('session_id')
-        
-        await logger.info(f"🚀 Starting scan task: contractor {contractor_id}, URL: {url}, depth: {depth}, session_id: {session_id}")
-        
-        # Запускаем сканирование
-        await scanner_service.scan_contractor(contractor_id, url, session_id)
-        
-        await logger.info(f"✅ Completed scan task for contractor {contractor_id}, URL: {url}")
-        
-    except Exception as e:
-        await logger.error(f"❌ Error processing scan task for contractor {task_data.get('contractor_id', 'unknown')}: {e}")
-        await logger.exception("Full traceback:")
+    """Обработка задачи сканирования (одна ссылка в url или пачка в urls)"""
+    contractor_id = task_data.get('contractor_id', 'unknown')
+    depth = task_data.get('depth', 0)
+    session_id = task_data.get('session_id')
+    urls = task_data.get('urls') or [task_data.get('url')]
+    
+    for url in urls:
+        try:
+            await logger.info(f"🚀 Starting scan task: contractor {contractor_id}, URL: {url}, depth: {depth}, session_id: {session_id}")
+            
+            # Запускаем сканирование
+            await scanner_service.scan_contractor(task_data['contractor_id'], url, session_id, depth)
+            
+            await logger.info(f"✅ Completed scan task for contractor {contractor_id}, URL: {url}")
+            
+        except Exception as e:
+            await logger.error(f"❌ Error processing scan task for contractor {contractor_id}: {e}")
+            await logger.exception("Full traceback:")
+
+async def process_forbidden_words_change(event_data: Dict[str, Any]):
+    """Сброс кеша запрещенных слов при их изменении через API"""
+    rule_set_service.invalidate()
+    await logger.info(f"🔄 Forbidden words changed at {event_data.get('timestamp')}, rule set will be reloaded")
+
+async def log_metrics():
+    """Вывод счетчиков за интервал, включая долю страниц, проверенных без поиска нарушений"""
+    interval = metrics.interval
+    counters = metrics.report()
+    if not counters:
+        return
+    checks = counters.get('violation_checks', 0) + counters.get('violation_checks_skipped', 0)
+    skipped_share = counters.get('violation_checks_skipped', 0) / checks if checks else 0.0
+    summary = ', '.join(f"{name}={value}" for name, value in sorted(counters.items()))
+    await logger.info(f"📈 Scan metrics for {interval:.0f}s: {summary}, checks skipped {skipped_share:.0%}")
 
-async def start_scan_worker():
-    """Запуск worker'а для обработки задач сканирования"""
+async def start_scan_worker(heartbeat: Optional[Any] = None):
+    """Запуск worker'а для обработки задач сканирования
+
+    heartbeat - общее с супервизором значение (multiprocessing.Value), в которое раз в секунду
+    записывается время: по нему супервизор видит зависший event loop.
+    """
     await logger.info("🔧 Starting scan worker...")
     
+    # SIGTERM (остановка контейнера или супервизор) и SIGINT завершают worker после дренажа задач
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    
+    db_ready = False
     try:
         # Инициализируем базу данных
         await logger.info("📊 Initializing database connection...")
         await init_db()
+        db_ready = True
         await logger.info("✅ Database initialized for scan worker")
         
+        # Проверяем реализацию разбора HTML до получения задач, а не на первой странице;
+        # без необязательной зависимости работаем на html.parser
+        try:
+            get_parser(settings.html_parser_backend)
+        except RuntimeError as e:
+            await logger.error(f"❌ {e}, falling back to html.parser")
+            settings.html_parser_backend = 'html.parser'
+        await logger.info(f"✅ HTML parser backend: {settings.html_parser_backend}")
+        
+        # Так же кодек сжатия контента страниц: без zstandard записываем в gzip
+        await blob_store.check_compression()
+        
+        # Запускаем пул для разбора HTML и поиска нарушений
+        offload_service.start()
+        await logger.info("✅ CPU pool started for scan worker")
+        
         # Подключаемся к очереди
         await logger.info("🐰 Connecting to MQ...")
         await queue_service.connect()
         await logger.info("✅ Connected to MQ")
         
+        # Подписываемся на изменения запрещенных слов
+        await queue_service.consume_forbidden_words_changes(process_forbidden_words_change)
+        
         # Начинаем потребление задач
-        await logger.info("📥 Starting to consume scan tasks from queue...")
+        await logger.info(
+            f"📥 Starting to consume scan tasks from queue: {settings.scan_worker_concurrency} tasks in flight, "
+            f"{settings.scan_http_connections} HTTP connections"
+        )
         await queue_service.consume_scan_tasks(process_scan_task)
         
         await logger.info("🔄 Scan worker is running and waiting for tasks...")
         
-        # Держим worker запущенным
-        while True:
-            await asyncio.sleep(1)
+        # Держим worker запущенным и периодически выводим счетчики
+        while not stop.is_set():
+            if heartbeat is not None:
+                heartbeat.value = time.time()
+            try:
+                await asyncio.wait_for(stop.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+            if metrics.interval >= settings.metrics_log_interval:
+                await log_metrics()
+        
+        await logger.info("🛑 Scan worker is stopping, draining tasks...")
+        await queue_service.drain_scan_tasks(settings.scan_worker_drain_timeout)
             
-    except KeyboardInterrupt:
-        await logger.info("🛑 Scan worker stopped by user")
     except Exception as e:
         await logger.error(f"💥 Scan worker error: {e}")
         await logger.exception("Full traceback:")
     finally:
         await logger.info("🔌 Disconnecting from MQ...")
         await queue_service.disconnect()
+        await scanner_service.close_session()
+        offload_service.shutdown()
+        if db_ready:
+            await close_db()
         await logger.info("👋 Scan worker shutdown complete")
+        await logger.shutdown()
 
-async def main():
+async def main(heartbeat: Optional[Any] = None):
     """Главная функция для запуска scan worker"""
     await logger.info("🎯 Scan worker process started")
-    await start_scan_worker()
+    await start_scan_worker(heartbeat)
 
 
 # Запускаем worker при импорте модуля
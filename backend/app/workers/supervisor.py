@@ -0,0 +1,169 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+def check_limits(processes: int):
+    """Проверка, что лимит параллельности на хост делится между процессами
+
+    Каждому процессу нужен хотя бы один запрос к хосту, поэтому при числе процессов больше
+    HOST_MAX_CONCURRENCY вместе они превысили бы лимит.
+    """
+    if processes > settings.host_max_concurrency:
+        raise ValueError(
+            f"SCAN_WORKER_PROCESSES ({processes}) exceeds HOST_MAX_CONCURRENCY ({settings.host_max_concurrency}): "
+            f"per-host concurrency cannot be shared between processes"
+        )
+
+
+def share_limits(processes: int):
+    """Деление ресурсов и ограничений между процессами супервизора
+
+    Пул CPU каждого процесса по умолчанию получает свою долю ядер, а не все ядра. Лимиты
+    вежливости (HOST_REQUESTS_PER_SECOND, HOST_MAX_CONCURRENCY) задаются на хост для всего
+    сервиса, а планировщик ведется в каждом процессе отдельно, поэтому процессу достается их доля
+    (с округлением вниз, чтобы сумма не превышала лимит).
+    """
+    check_limits(processes)
+    cores = os.cpu_count() or 1
+    settings.scan_cpu_workers = settings.scan_cpu_workers or max(1, cores // processes)
+    settings.host_requests_per_second = settings.host_requests_per_second / processes
+    settings.host_max_concurrency = settings.host_max_concurrency // processes
+
+
+def run_worker(heartbeat: Any, processes: int):
+    """Точка входа дочернего процесса: собственный event loop, пул БД и канал MQ"""
+    # Ctrl+C в терминале получает вся группа процессов - worker останавливается по SIGTERM от супервизора
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    share_limits(processes)
+
+    from app.workers.scan_worker import main
+    asyncio.run(main(heartbeat))
+
+
+@dataclass
+class WorkerSlot:
+    """Место под один процесс scan worker"""
+    index: int
+    process: Optional[multiprocessing.Process] = None
+    heartbeat: Any = None
+    started_at: float = 0.0
+    restarts: int = 0
+    # Раньше этого времени процесс не перезапускается (пауза после частых падений)
+    restart_at: float = field(default=0.0)
+
+
+class ScanWorkerSupervisor:
+    """Запуск и контроль нескольких процессов scan worker
+
+    Каждый процесс обрабатывает задачи из общей очереди и получает долю ядер и лимитов
+    вежливости (см. share_limits). Упавший или зависший процесс
+    (нет heartbeat дольше SCAN_WORKER_HEARTBEAT_TIMEOUT) перезапускается, при частых
+    падениях - с растущей паузой. По SIGTERM процессы дорабатывают начатые задачи.
+    """
+
+    def __init__(self, processes: int = 0):
+        self.processes = processes or settings.scan_worker_processes or os.cpu_count() or 1
+        # Ошибку конфигурации сообщаем сразу, а не падениями процессов
+        check_limits(self.processes)
+        # spawn: процессы не наследуют соединения и состояние event loop супервизора
+        self._context = multiprocessing.get_context('spawn')
+        self.slots = [WorkerSlot(index) for index in range(self.processes)]
+        self._stop = asyncio.Event()
+
+    def _start(self, slot: WorkerSlot):
+        """Запуск процесса в слоте"""
+        slot.heartbeat = self._context.Value('d', time.time())
+        slot.process = self._context.Process(
+            target=run_worker,
+            args=(slot.heartbeat, self.processes),
+            name=f'scan-worker-{slot.index}',
+        )
+        slot.process.start()
+        slot.started_at = time.time()
+
+    async def _check(self, slot: WorkerSlot):
+        """Проверка процесса и перезапуск при падении или зависании"""
+        now = time.time()
+        process = slot.process
+
+        if process is not None and process.is_alive():
+            # Процесс успевает инициализироваться до первого heartbeat
+            stalled = now - max(slot.heartbeat.value, slot.started_at)
+            if stalled < settings.scan_worker_heartbeat_timeout:
+                return
+            await logger.warning(f"⚠️ Scan worker {slot.index} (pid {process.pid}) has no heartbeat for {stalled:.0f}s, killing")
+            process.kill()
+            process.join()
+
+        if process is not None:
+            uptime = now - slot.started_at
+            await logger.warning(f"⚠️ Scan worker {slot.index} (pid {process.pid}) exited with code {process.exitcode} after {uptime:.0f}s")
+            # Процесс, проработавший дольше минуты, считаем здоровым и сбрасываем паузу
+            slot.restarts = slot.restarts + 1 if uptime < 60 else 1
+            slot.restart_at = now + min(2 ** (slot.restarts - 1), 60)
+            slot.process = None
+
+        if now >= slot.restart_at:
+            self._start(slot)
+            await logger.info(f"🔁 Scan worker {slot.index} started, pid {slot.process.pid}")
+
+    async def _stop_workers(self):
+        """Остановка процессов с ожиданием дренажа задач"""
+        alive = [slot.process for slot in self.slots if slot.process is not None and slot.process.is_alive()]
+        await logger.info(f"🛑 Stopping {len(alive)} scan workers...")
+        for process in alive:
+            process.terminate()
+
+        # Worker дорабатывает задачи SCAN_WORKER_DRAIN_TIMEOUT, плюс время на закрытие соединений
+        deadline = time.time() + settings.scan_worker_drain_timeout + 10
+        while any(process.is_alive() for process in alive) and time.time() < deadline:
+            await asyncio.sleep(0.5)
+
+        for process in alive:
+            if process.is_alive():
+                await logger.warning(f"⚠️ Scan worker pid {process.pid} did not stop in time, killing")
+                process.kill()
+            process.join()
+
+    async def run(self):
+        """Запуск процессов и контроль до получения SIGTERM или SIGINT"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._stop.set)
+
+        await logger.info(f"🎯 Scan worker supervisor started, processes: {self.processes}")
+        for slot in self.slots:
+            self._start(slot)
+            await logger.info(f"🚀 Scan worker {slot.index} started, pid {slot.process.pid}")
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), 1)
+                except asyncio.TimeoutError:
+                    pass
+                if self._stop.is_set():
+                    break
+                for slot in self.slots:
+                    await self._check(slot)
+        finally:
+            await self._stop_workers()
+            await logger.info("👋 Scan worker supervisor stopped")
+            await logger.shutdown()
+
+
+async def main():
+    """Главная функция для запуска супервизора"""
+    await ScanWorkerSupervisor().run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
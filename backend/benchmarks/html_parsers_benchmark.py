@@ -0,0 +1,86 @@
+"""Сравнение реализаций разбора HTML: совпадение результата с html.parser и страниц в секунду
+
+Образцы разметки - из tests/html_fixtures.py. Запуск из каталога backend (lxml и selectolax -
+из группы fast-html):
+    python -m benchmarks.html_parsers_benchmark
+"""
+import random
+import time
+from typing import List
+
+from app.services.html_parsers import BACKENDS, get_parser
+from tests.html_fixtures import FIXTURES, KNOWN_DIFFERENCES, PAGE_SIZES, REFERENCE, make_page
+
+
+PAGES = 20
+REPEATS = 3
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name in BACKENDS:
+        try:
+            get_parser(name)
+        except RuntimeError as e:
+            print(f"skip {name}: {e}")
+            continue
+        names.append(name)
+    return names
+
+
+def check_conformance(names: List[str], documents: List[str]) -> bool:
+    reference = get_parser(REFERENCE)
+    conforms = True
+    for index, document in enumerate(documents):
+        expected = reference.parse(document)
+        for name in names:
+            actual = get_parser(name).parse(document)
+            if actual != expected:
+                conforms = False
+                print(f"MISMATCH {name} on document #{index}:\n  expected {expected!r:.300}\n  actual   {actual!r:.300}")
+    return conforms
+
+
+def check_known_differences(names: List[str]):
+    reference = get_parser(REFERENCE)
+    for document, differing in KNOWN_DIFFERENCES:
+        expected = reference.parse(document)
+        for name in names:
+            matches = get_parser(name).parse(document) == expected
+            if matches == (name in differing):
+                print(f"Known difference changed: {name} {'matches' if matches else 'differs'} on {document[:40]!r}")
+
+
+def measure(name: str, pages: List[str]) -> float:
+    parser = get_parser(name)
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for page in pages:
+            parser.parse(page)
+        best = min(best, time.perf_counter() - started)
+    return len(pages) / best
+
+
+def main():
+    rng = random.Random(7)
+    names = available_backends()
+    generated = {size: [make_page(rng, size) for _ in range(PAGES)] for size in PAGE_SIZES}
+
+    documents = FIXTURES + [pages[0] for pages in generated.values()]
+    if check_conformance(names, documents):
+        print(f"All backends match {REFERENCE} on {len(documents)} documents")
+    check_known_differences(names)
+
+    print(f"Best of {REPEATS} runs, {PAGES} pages each")
+    print(f"{'backend':>12} " + ' '.join(f"{f'{size // 1000} KB, p/s':>13}" for size in PAGE_SIZES) + f" {'speedup':>8}")
+    baseline = None
+    for name in names:
+        rates = [measure(name, generated[size]) for size in PAGE_SIZES]
+        baseline = baseline or rates
+        speedup = min(rate / base for rate, base in zip(rates, baseline))
+        print(f"{name:>12} " + ' '.join(f"{rate:>13.1f}" for rate in rates) + f" {speedup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
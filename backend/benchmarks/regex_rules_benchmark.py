@@ -0,0 +1,130 @@
+"""Сравнение проверки регулярных выражений: отдельный проход на правило против объединенных альтернатив
+
+Запуск из каталога backend:
+    python -m benchmarks.regex_rules_benchmark
+"""
+import random
+import time
+from typing import Dict, Any, List
+
+from app.services.word_matcher import RuleSet
+
+
+RULE_COUNTS = [20, 100, 300]
+PAGE_SIZES = [100_000, 500_000]
+REPEATS = 3
+# Сколько разных правил нарушает одна страница
+STEMS_PER_PAGE = 5
+
+# Шаблоны, похожие на реальные правила: варианты написания, цифры, границы слов
+RULE_TEMPLATES = [
+    r'\b{stem}[аоуыи]?\b',
+    r'{stem}\s*онлайн',
+    r'{stem}\d+',
+    r'\b(?:купить|продать)\s+{stem}',
+    r'{stem}[-_ ]?(?:casino|bet)',
+    r'(?:www\.)?{stem}\.(?:com|net|ru)',
+]
+# Правила, которые нельзя объединить: обратные ссылки и встроенные флаги
+SEPARATE_TEMPLATES = [
+    r'({stem})\s+\1',
+    r'(?s){stem}.{{0,20}}бонус',
+]
+# Правила с экранированными символами: оба режима должны найти одни и те же нарушения
+ESCAPED_RULES = [
+    r'\x63asino',
+    r'\u0441тавки\d*',
+    r'\N{LATIN SMALL LETTER B}onus\s+code',
+    r'\160oker',
+    r'slot\x73?\.(?:com|net)',
+    r'\U00000072oulette',
+]
+ESCAPED_PAGE = 'Лучшее casino и ставки24, bonus  code, poker, slots.com и roulette онлайн. ' * 200
+ALPHABET = 'абвгдежзиклмнопрстуфхцчшэюяabcdefghijklmnopqrstuvwxyz'
+FILLER = 'Продажа товаров и услуг доставка оплата гарантия каталог контакты new sale best price'.split()
+
+
+def make_stem(rng: random.Random) -> str:
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 8)))
+
+
+def make_rules(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    rules = []
+    stems = []
+    for index in range(count):
+        stem = make_stem(rng)
+        stems.append(stem)
+        templates = SEPARATE_TEMPLATES if index % 10 == 0 else RULE_TEMPLATES
+        rules.append({
+            'id': index + 1,
+            'word': rng.choice(templates).format(stem=stem),
+            'use_regex': True,
+            'case_sensitive': rng.random() < 0.2,
+            'severity': 'high'
+        })
+    return rules, stems
+
+
+def make_page(rng: random.Random, stems: List[str], size: int) -> str:
+    stems = rng.sample(stems, STEMS_PER_PAGE)
+    tokens = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.005:
+            token = rng.choice(stems) + rng.choice(['', 'а', '123', ' онлайн', '.com'])
+        else:
+            token = rng.choice(FILLER)
+        tokens.append(token)
+        length += len(token) + 1
+    return ' '.join(tokens)
+
+
+def measure(rule_set: RuleSet, page: str) -> float:
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        rule_set.find_violations(page)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def check_escaped_rules():
+    """Совпадения в обоих режимах на правилах с экранированными символами"""
+    rules = [
+        {'id': index + 1, 'word': word, 'use_regex': True, 'case_sensitive': False, 'severity': 'high'}
+        for index, word in enumerate(ESCAPED_RULES)
+    ]
+    separate = sorted((v['forbidden_word_id'], v['position']) for v in RuleSet(rules).find_violations(ESCAPED_PAGE))
+    combined = sorted(
+        (v['forbidden_word_id'], v['position']) for v in RuleSet(rules, combine_regex=True).find_violations(ESCAPED_PAGE)
+    )
+    if not separate or separate != combined:
+        raise AssertionError(f"Escaped rules: separate {len(separate)} matches, combined {len(combined)}")
+    print(f"Escaped rules: {len(separate)} matches in both modes")
+
+
+def main():
+    check_escaped_rules()
+    rng = random.Random(7)
+    print(f"Best of {REPEATS} runs")
+    print(f"{'rules':>6} {'page, KB':>9} {'separate, ms':>13} {'combined, ms':>13} {'speedup':>8} {'matches':>15}")
+
+    for count in RULE_COUNTS:
+        rules, stems = make_rules(rng, count)
+        separate = RuleSet(rules)
+        combined = RuleSet(rules, combine_regex=True)
+
+        for size in PAGE_SIZES:
+            page = make_page(rng, stems, size)
+            separate_time = measure(separate, page)
+            combined_time = measure(combined, page)
+            # Объединенный режим не сообщает перекрывающиеся совпадения разных правил
+            matches = f"{len(separate.find_violations(page))}/{len(combined.find_violations(page))}"
+            print(
+                f"{count:>6} {size // 1000:>9} {separate_time * 1000:>13.1f} {combined_time * 1000:>13.1f} "
+                f"{separate_time / combined_time:>7.1f}x {matches:>15}"
+            )
+
+
+if __name__ == '__main__':
+    main()
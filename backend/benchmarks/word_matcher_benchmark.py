@@ -0,0 +1,123 @@
+"""Сравнение поиска простых запрещенных слов: цикл по словам против автомата Ахо-Корасик
+
+Проверяется, что оба способа PlainWordMatcher находят те же нарушения, что и прежний
+алгоритм, и что порог AUTOMATON_MIN_WORDS выбирает более быстрый: далеко ниже порога
+быстрее цикл str.find по словам, далеко выше - автомат.
+
+Запуск из каталога backend:
+    python -m benchmarks.word_matcher_benchmark
+"""
+import random
+import re
+import time
+from typing import Dict, Any, List
+
+from app.services.word_matcher import AUTOMATON_MIN_WORDS, PlainWordMatcher, CONTEXT_SIZE
+
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюяabcdefghijklmnopqrstuvwxyz'
+WORD_COUNTS = [10, 100, 200, 400, 1000, 3000]
+PAGE_SIZE = 100_000
+REPEATS = 5
+
+
+def random_word(rng: random.Random, min_length: int = 4, max_length: int = 12) -> str:
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length)))
+
+
+def make_words(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    words = set()
+    while len(words) < count:
+        words.add(random_word(rng))
+    return [
+        {
+            'word': word.capitalize() if rng.random() < 0.3 else word,
+            'use_regex': False,
+            'case_sensitive': rng.random() < 0.2,
+            'severity': 'medium'
+        }
+        for word in sorted(words)
+    ]
+
+
+def make_page(rng: random.Random, words: List[Dict[str, Any]]) -> str:
+    tokens = []
+    size = 0
+    while size < PAGE_SIZE:
+        # Примерно каждое сотое слово на странице - запрещенное
+        token = rng.choice(words)['word'] if rng.random() < 0.01 else random_word(rng, 2, 10)
+        tokens.append(token)
+        size += len(token) + 1
+    return ' '.join(tokens)
+
+
+def legacy_check(text: str, forbidden_words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Прежний алгоритм: отдельная проверка и finditer для каждого слова"""
+    violations = []
+    text_lower = text.lower()
+    for word_data in forbidden_words:
+        word = word_data['word']
+        case_sensitive = word_data['case_sensitive']
+        search_text = text if case_sensitive else text_lower
+        search_word = word if case_sensitive else word.lower()
+        if search_word in search_text:
+            for match in re.finditer(re.escape(search_word), search_text):
+                start = max(0, match.start() - CONTEXT_SIZE)
+                end = min(len(search_text), match.end() + CONTEXT_SIZE)
+                violations.append({
+                    'word': word,
+                    'position': match.start(),
+                    'context': search_text[start:end],
+                    'url': '',
+                    'matched_text': match.group()
+                })
+    return violations
+
+
+def measure(func, *args) -> float:
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    rng = random.Random(42)
+    print(f"Page size: {PAGE_SIZE} characters, best of {REPEATS} runs, automaton from {AUTOMATON_MIN_WORDS} words")
+    print(f"{'words':>7} {'legacy, ms':>12} {'find, ms':>10} {'automaton, ms':>14} {'build, ms':>10} {'selected':>10}")
+
+    for count in WORD_COUNTS:
+        words = make_words(rng, count)
+        page = make_page(rng, words)
+
+        per_word = PlainWordMatcher(words, use_automaton=False)
+        started = time.perf_counter()
+        automaton = PlainWordMatcher(words, use_automaton=True)
+        build_time = time.perf_counter() - started
+
+        expected = sorted((v['word'], v['position']) for v in legacy_check(page, words))
+        for name, matcher in (('find', per_word), ('automaton', automaton)):
+            actual = sorted((v['word'], v['position']) for v in matcher.find_violations(page))
+            if expected != actual:
+                raise AssertionError(f"{name}: results differ for {count} words: {len(expected)} != {len(actual)}")
+
+        legacy_time = measure(legacy_check, page, words)
+        per_word_time = measure(per_word.find_violations, page)
+        automaton_time = measure(automaton.find_violations, page)
+        selected = 'automaton' if count >= AUTOMATON_MIN_WORDS else 'find'
+        print(
+            f"{count:>7} {legacy_time * 1000:>12.1f} {per_word_time * 1000:>10.1f} {automaton_time * 1000:>14.1f} "
+            f"{build_time * 1000:>10.1f} {selected:>10}"
+        )
+
+        # Вблизи порога способы сравнимы, поэтому проверяются только наборы вдвое меньше и вдвое больше
+        if count <= AUTOMATON_MIN_WORDS // 2 and per_word_time > automaton_time:
+            raise AssertionError(f"Automaton is faster for {count} words: lower AUTOMATON_MIN_WORDS")
+        if count >= AUTOMATON_MIN_WORDS * 2 and automaton_time > per_word_time:
+            raise AssertionError(f"find is faster for {count} words: raise AUTOMATON_MIN_WORDS")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 import asyncio
-from app.core.config import settings
-from app.core.database import init_db
+from tortoise import Tortoise
+from tortoise.exceptions import OperationalError
+from app.core.database import TORTOISE_ORM
 from app.core.logging import logger
 
 
@@ -11,37 +12,25 @@ async def init_database():
         await logger.info("Starting database initialization...")
         
         # Инициализируем подключение к базе данных
-        await init_db()
+        await Tortoise.init(config=TORTOISE_ORM)
+        
+        # В существующей базе схема создается после миграций: generate_schemas добавляет
+        # комментарии к колонкам, которые появятся только после них. Новая база создается
+        # по моделям, а миграции поверх нее ничего не меняют
+        from aerich.models import Aerich
+        try:
+            existing = await Aerich.exists()
+        except OperationalError:
+            existing = False
+        if not existing:
+            await Tortoise.generate_schemas()
         
         # Импортируем aerich после инициализации базы данных
         from aerich import Command
         
-        # Создаем команду aerich
-        command = Command(
-            tortoise_config={
-                'connections': {
-                    'default': settings.database_url
-                },
-                'apps': {
-                    'models': {
-                        'models': [
-                            'aerich.models',
-                            'app.models.user',
-                            'app.models.contractor',
-                            'app.models.forbidden_word',
-                            'app.models.mcc_code',
-                            'app.models.scan_result',
-                            'app.models.webpage',
-                            'app.models.scan_session',
-                        ],
-                        'default_connection': 'default',
-                    }
-                },
-                'use_tz': False,
-                'timezone': 'UTC'
-            },
-            app='models'
-        )
+        # Создаем команду aerich с той же конфигурацией, что и у приложения: в списке моделей
+        # должны быть все модели, иначе aerich сочтет их таблицы удаленными
+        command = Command(tortoise_config=TORTOISE_ORM, app='models')
         
         # Проверяем, нужно ли инициализировать aerich
         try:
@@ -60,6 +49,9 @@ async def init_database():
         except Exception as e:
             await logger.warning(f"Migration warning: {e}")
         
+        if existing:
+            await Tortoise.generate_schemas()
+        
         await logger.info("Database initialization completed")
         
     except Exception as e:
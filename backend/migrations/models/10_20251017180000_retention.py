@@ -0,0 +1,22 @@
+from tortoise import BaseDBAsyncClient
+
+# Индексы строятся CONCURRENTLY, вне транзакции (см. 8_20251017160000_crawler_indexes.py)
+RUN_IN_TRANSACTION = False
+
+INDEXES = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_content_blob" ON "webpages" ("content_blob")',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_text_blob" ON "webpages" ("text_blob")',
+]
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    for index in INDEXES:
+        await db.execute_script(index)
+    return """
+        ANALYZE "webpages";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_webpages_content_blob";
+DROP INDEX IF EXISTS "idx_webpages_text_blob";"""
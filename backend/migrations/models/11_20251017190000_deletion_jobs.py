@@ -0,0 +1,31 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "deletion_jobs" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "target" VARCHAR(20) NOT NULL,
+    "target_id" INT NOT NULL,
+    "status" VARCHAR(20) NOT NULL,
+    "sessions_deleted" INT NOT NULL,
+    "pages_deleted" INT NOT NULL,
+    "violations_deleted" INT NOT NULL,
+    "error_message" TEXT,
+    "created_at" TIMESTAMPTZ NOT NULL,
+    "started_at" TIMESTAMPTZ,
+    "completed_at" TIMESTAMPTZ,
+    "created_by_id" INT REFERENCES "users" ("id") ON DELETE SET NULL
+);
+COMMENT ON COLUMN "deletion_jobs"."target" IS 'Что удаляется: scan_session или contractor';
+COMMENT ON COLUMN "deletion_jobs"."target_id" IS 'id удаляемой записи';
+COMMENT ON COLUMN "deletion_jobs"."status" IS 'Статус: pending, running, completed, failed';
+COMMENT ON COLUMN "deletion_jobs"."sessions_deleted" IS 'Удалено сессий';
+COMMENT ON COLUMN "deletion_jobs"."pages_deleted" IS 'Удалено страниц';
+COMMENT ON COLUMN "deletion_jobs"."violations_deleted" IS 'Удалено нарушений';
+COMMENT ON TABLE "deletion_jobs" IS 'Фоновое удаление сессии сканирования или контрагента со всеми данными';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "deletion_jobs";"""
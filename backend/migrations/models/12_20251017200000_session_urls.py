@@ -0,0 +1,23 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "session_urls" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "url_hash" VARCHAR(32) NOT NULL,
+    "scan_session_id" INT NOT NULL REFERENCES "scan_sessions" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_session_url_scan_se_8dd989" UNIQUE ("scan_session_id", "url_hash")
+);
+COMMENT ON COLUMN "session_urls"."url_hash" IS 'MD5 канонического URL';
+COMMENT ON TABLE "session_urls" IS 'URL, уже поставленный в очередь в сессии сканирования; общий для всех процессов воркеров';
+        INSERT INTO "session_urls" ("scan_session_id", "url_hash")
+    SELECT DISTINCT "webpages"."scan_session_id", md5("webpages"."url") FROM "webpages"
+    JOIN "scan_sessions" ON "scan_sessions"."id" = "webpages"."scan_session_id"
+    WHERE "scan_sessions"."status" = 'running'
+ON CONFLICT DO NOTHING;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "session_urls";"""
@@ -0,0 +1,11 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        COMMENT ON COLUMN "webpages"."content_hash" IS 'SHA-256 текста, по которому искались нарушения';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        COMMENT ON COLUMN "webpages"."content_hash" IS 'SHA-256 текста без учета пробелов';"""
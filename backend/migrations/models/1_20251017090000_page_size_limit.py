@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contractors" ADD COLUMN IF NOT EXISTS "max_page_bytes" INT;
+COMMENT ON COLUMN "contractors"."max_page_bytes" IS 'Максимальный размер страницы в байтах';
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "content_bytes" INT;
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "content_length" BIGINT;
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "content_truncated" BOOL NOT NULL DEFAULT False;
+COMMENT ON COLUMN "webpages"."content_bytes" IS 'Прочитано байт тела ответа';
+COMMENT ON COLUMN "webpages"."content_length" IS 'Content-Length из ответа';
+COMMENT ON COLUMN "webpages"."content_truncated" IS 'Тело обрезано по лимиту размера';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contractors" DROP COLUMN IF EXISTS "max_page_bytes";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "content_bytes";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "content_length";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "content_truncated";"""
@@ -0,0 +1,18 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "etag" VARCHAR(512);
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "last_modified" VARCHAR(64);
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "outbound_links" JSONB;
+COMMENT ON COLUMN "webpages"."etag" IS 'ETag из ответа';
+COMMENT ON COLUMN "webpages"."last_modified" IS 'Last-Modified из ответа';
+COMMENT ON COLUMN "webpages"."outbound_links" IS 'Ссылки со страницы для обхода без повторного разбора';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" DROP COLUMN IF EXISTS "etag";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "last_modified";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "outbound_links";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "content_hash" VARCHAR(64);
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "rules_hash" VARCHAR(64);
+COMMENT ON COLUMN "webpages"."content_hash" IS 'SHA-256 текста без учета пробелов';
+COMMENT ON COLUMN "webpages"."rules_hash" IS 'Отпечаток набора правил, которым проверена страница';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" DROP COLUMN IF EXISTS "content_hash";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "rules_hash";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contractors" ADD COLUMN IF NOT EXISTS "host_aliases" JSONB;
+ALTER TABLE "contractors" ADD COLUMN IF NOT EXISTS "strip_query_params" JSONB;
+COMMENT ON COLUMN "contractors"."host_aliases" IS 'Синонимы домена: зеркала и старые адреса сайта';
+COMMENT ON COLUMN "contractors"."strip_query_params" IS 'Параметры запроса, удаляемые из ссылок';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "contractors" DROP COLUMN IF EXISTS "host_aliases";
+ALTER TABLE "contractors" DROP COLUMN IF EXISTS "strip_query_params";"""
@@ -0,0 +1,12 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "depth" INT;
+COMMENT ON COLUMN "webpages"."depth" IS 'Глубина от стартовой страницы';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" DROP COLUMN IF EXISTS "depth";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "scan_sessions" ADD COLUMN IF NOT EXISTS "pending_tasks" INT NOT NULL DEFAULT 0;
+ALTER TABLE "scan_sessions" ADD COLUMN IF NOT EXISTS "tasks_queued" INT NOT NULL DEFAULT 0;
+COMMENT ON COLUMN "scan_sessions"."pending_tasks" IS 'Задачи сессии в очереди и в обработке';
+COMMENT ON COLUMN "scan_sessions"."tasks_queued" IS 'Всего задач, поставленных в очередь за сессию';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "scan_sessions" DROP COLUMN IF EXISTS "pending_tasks";
+ALTER TABLE "scan_sessions" DROP COLUMN IF EXISTS "tasks_queued";"""
@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DELETE FROM "violations" AS "v" USING "violations" AS "d"
+WHERE "v"."webpage_id" = "d"."webpage_id"
+  AND "v"."forbidden_word_id" = "d"."forbidden_word_id"
+  AND "v"."position" = "d"."position"
+  AND "v"."word_found" = "d"."word_found"
+  AND "v"."id" > "d"."id";
+UPDATE "webpages" AS "w" SET "violations_count" = "c"."n"
+FROM (SELECT "webpage_id", COUNT(*) AS "n" FROM "violations" GROUP BY "webpage_id") AS "c"
+WHERE "w"."id" = "c"."webpage_id" AND "w"."violations_count" <> "c"."n";
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_violations_webpage_e7bbb7" ON "violations" ("webpage_id", "forbidden_word_id", "position", "word_found");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "violations" DROP CONSTRAINT IF EXISTS "uid_violations_webpage_e7bbb7";
+DROP INDEX IF EXISTS "uid_violations_webpage_e7bbb7";"""
@@ -0,0 +1,31 @@
+from tortoise import BaseDBAsyncClient
+
+# Индексы строятся CONCURRENTLY, без блокировки записи в таблицы. Такой CREATE INDEX нельзя
+# выполнить в транзакции и вместе с другими командами, поэтому миграция идет вне транзакции,
+# а каждый индекс создается отдельным запросом
+RUN_IN_TRANSACTION = False
+
+INDEXES = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_contractor_url_scanned" ON "webpages" ("contractor_id", "url", "last_scanned")',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_contractor" ON "webpages" ("contractor_id", "id")',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_session" ON "webpages" ("scan_session_id", "id")',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_webpages_violations" ON "webpages" ("id") WHERE violations_found = true',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_scan_sessions_contractor_started" ON "scan_sessions" ("contractor_id", "started_at")',
+]
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    for index in INDEXES:
+        await db.execute_script(index)
+    return """
+        ANALYZE "webpages";
+ANALYZE "scan_sessions";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_webpages_contractor_url_scanned";
+DROP INDEX IF EXISTS "idx_webpages_contractor";
+DROP INDEX IF EXISTS "idx_webpages_session";
+DROP INDEX IF EXISTS "idx_webpages_violations";
+DROP INDEX IF EXISTS "idx_scan_sessions_contractor_started";"""
@@ -0,0 +1,29 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "page_blobs" (
+    "hash" VARCHAR(64) NOT NULL PRIMARY KEY,
+    "data" BYTEA NOT NULL,
+    "size" INT NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL
+);
+COMMENT ON COLUMN "page_blobs"."hash" IS 'SHA-256 несжатого контента';
+COMMENT ON COLUMN "page_blobs"."data" IS 'Сжатый контент, кодек определяется по заголовку';
+COMMENT ON COLUMN "page_blobs"."size" IS 'Размер несжатого контента в байтах';
+COMMENT ON TABLE "page_blobs" IS 'Сжатый контент страницы в хранилище с адресацией по хешу (BLOB_STORE_BACKEND=postgres)';
+ALTER TABLE "page_blobs" ALTER COLUMN "data" SET STORAGE EXTERNAL;
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "content_blob" VARCHAR(64);
+ALTER TABLE "webpages" ADD COLUMN IF NOT EXISTS "text_blob" VARCHAR(64);
+ALTER TABLE "webpages" ALTER COLUMN "content" DROP NOT NULL;
+ALTER TABLE "webpages" ALTER COLUMN "text_content" DROP NOT NULL;
+COMMENT ON COLUMN "webpages"."content_blob" IS 'Ключ HTML контента в хранилище';
+COMMENT ON COLUMN "webpages"."text_blob" IS 'Ключ текстового контента в хранилище';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "webpages" DROP COLUMN IF EXISTS "content_blob";
+ALTER TABLE "webpages" DROP COLUMN IF EXISTS "text_blob";
+DROP TABLE IF EXISTS "page_blobs";"""
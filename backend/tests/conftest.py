@@ -0,0 +1,38 @@
+"""Общие фикстуры тестов"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable
+
+import pytest
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from app.core.database import TORTOISE_ORM
+
+
+class Rollback(Exception):
+    """Откат транзакции с тестовыми данными"""
+
+
+@pytest.fixture
+def database() -> Callable[[Callable[[Any], Awaitable[None]]], None]:
+    """Запуск проверки в транзакции на базе с примененными миграциями (настройки DATABASE_*)
+
+    Проверка получает соединение транзакции; в конце транзакция откатывается, данные в базе
+    не меняются. Без DATABASE_HOST тест пропускается.
+    """
+    if not os.getenv('DATABASE_HOST'):
+        pytest.skip('DATABASE_HOST is not set')
+
+    async def run_check(check):
+        await Tortoise.init(config=TORTOISE_ORM)
+        try:
+            async with in_transaction() as connection:
+                await check(connection)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            await Tortoise.close_connections()
+
+    return lambda check: asyncio.run(run_check(check))
@@ -0,0 +1,60 @@
+"""Образцы разметки для проверки реализаций разбора HTML (tests/test_html_parsers.py,
+benchmarks/html_parsers_benchmark.py)"""
+import random
+
+
+REFERENCE = 'html.parser'
+PAGE_SIZES = [20_000, 200_000]
+
+# Разметка, на которой реализации чаще всего расходятся
+FIXTURES = [
+    '',
+    'просто текст без тегов',
+    '<p>unclosed <div>x<span>y</div> z',
+    '<html><head><title> Заголовок &amp; ко </title>'
+    '<meta name="description" content="Описание"></head>'
+    '<body><p>Текст&nbsp;с <b>жирным</b>хвостом</p></body></html>',
+    '<html><head><script>var s = "<a href=/x>x</a>";</script><style>p { color: red }</style></head>'
+    '<body><!-- комментарий --><noscript>без js</noscript><p>видимый</p></body></html>',
+    '<body><template><i>шаблон</i></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby></body>',
+    '<?xml version="1.0" encoding="utf-8"?><html><body>Привет <a href="http://example.com/b">b</a></body></html>',
+    '<head><meta name="Description" content="регистр"><meta name="description" content="нужное"></head>'
+    '<body><svg><title>svg</title></svg></body>',
+    '<a href="/a">a</a><a>без href</a><a href="">пустой</a><A HREF="/upper">UPPER</A>'
+    '<a href="javascript:void(0)">js</a><a href="/a#frag">якорь</a>',
+    '<table><tr><td>1<td>2</table><ul><li>один<li>два</ul><select><option>опция</select>',
+    '<pre>  строка\n  с отступом  </pre><textarea>  поле  </textarea>',
+    '<title>первый</title><title>второй</title>',
+    '<p>' + '<div>' * 200 + 'глубоко' + '</div>' * 200 + '</p>',
+]
+# Известные расхождения: документ и реализации, которые на нем отличаются от html.parser
+KNOWN_DIFFERENCES = [
+    ('<p>' + '<div>' * 3000 + 'глубоко' + '</div>' * 3000 + '</p>после', {'lxml'}),
+    ('<p>один<td>два</p>', {'selectolax'}),
+]
+
+WORDS = 'Продажа товаров и услуг доставка оплата гарантия каталог контакты new sale best price'.split()
+
+
+def make_page(rng: random.Random, size: int) -> str:
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Магазин</title>'
+        '<meta name="description" content="Интернет-магазин">'
+        '<script>window.dataLayer = [];</script><style>body { margin: 0 }</style></head><body>'
+    ]
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.3:
+            part = f'<a href="/catalog/{rng.randint(1, 10_000)}">{rng.choice(WORDS)}</a>'
+        elif kind < 0.4:
+            part = f'<a href="https://other{rng.randint(1, 50)}.example/">{rng.choice(WORDS)}</a>'
+        elif kind < 0.45:
+            part = '<!-- banner -->'
+        else:
+            tag = rng.choice(['p', 'div', 'span', 'li', 'h2'])
+            part = f'<{tag} class="c{rng.randint(1, 30)}">' + ' '.join(rng.choices(WORDS, k=8)) + f'</{tag}>'
+        parts.append(part)
+        length += len(part)
+    parts.append('</body></html>')
+    return ''.join(parts)
@@ -0,0 +1,42 @@
+"""Планировщик запросов по хостам: частота без ограничения и задержка до заголовков ответа"""
+import asyncio
+
+from app.core.config import settings
+from app.services.host_scheduler import HostScheduler
+
+
+def test_zero_rate_is_unlimited(monkeypatch):
+    monkeypatch.setattr(settings, 'host_requests_per_second', 0.0)
+    monkeypatch.setattr(settings, 'host_max_concurrency', 4)
+
+    async def run():
+        scheduler = HostScheduler()
+        for status in (200, 503, 200):
+            async with scheduler.slot('http://example.com/') as slot:
+                slot.record(status)
+        return scheduler._hosts['example.com']
+
+    state = asyncio.run(asyncio.wait_for(run(), 1))
+    assert state.rate == 0.0
+
+
+def test_latency_ends_at_headers(monkeypatch):
+    monkeypatch.setattr(settings, 'host_requests_per_second', 0.0)
+    latencies = []
+
+    async def run():
+        scheduler = HostScheduler()
+        release = scheduler.release
+
+        async def record_latency(state, slot, latency):
+            latencies.append(latency)
+            await release(state, slot, latency)
+
+        scheduler.release = record_latency
+        async with scheduler.slot('http://example.com/') as slot:
+            slot.record(200)
+            # Загрузка тела после заголовков в задержку ответа не входит
+            await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    assert latencies[0] < 0.1
@@ -0,0 +1,36 @@
+"""Реализации разбора HTML дают тот же результат, что и html.parser
+
+Образцы разметки - из tests/html_fixtures.py. Реализации без установленной
+необязательной зависимости (группа fast-html) пропускаются.
+"""
+import random
+
+import pytest
+
+from app.services.html_parsers import BACKENDS, get_parser
+from tests.html_fixtures import FIXTURES, KNOWN_DIFFERENCES, PAGE_SIZES, REFERENCE, make_page
+
+
+DOCUMENTS = FIXTURES + [make_page(random.Random(7), size) for size in PAGE_SIZES]
+
+
+@pytest.fixture(params=[name for name in BACKENDS if name != REFERENCE])
+def backend(request):
+    try:
+        return get_parser(request.param)
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+@pytest.mark.parametrize('document', DOCUMENTS, ids=[f'document-{index}' for index in range(len(DOCUMENTS))])
+def test_matches_reference(backend, document):
+    assert backend.parse(document) == get_parser(REFERENCE).parse(document)
+
+
+@pytest.mark.parametrize(
+    'document, differing', KNOWN_DIFFERENCES, ids=[f'known-{index}' for index in range(len(KNOWN_DIFFERENCES))]
+)
+def test_known_differences(backend, document, differing):
+    # Если расхождение исчезло или появилось у другой реализации, список нужно обновить
+    matches = backend.parse(document) == get_parser(REFERENCE).parse(document)
+    assert matches != (backend.name in differing)
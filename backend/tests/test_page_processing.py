@@ -0,0 +1,24 @@
+"""Разбор страницы: ссылки для обхода и хеш текста для переноса нарушений"""
+from app.services.page_processing import filter_links, text_hash
+from app.services.url_canonicalizer import build_url_rules
+from app.services.word_matcher import RuleSet
+
+
+def test_text_hash_keeps_whitespace():
+    # Текст отличается только пробелами, но позиции и совпадения правил с пробелами - разные
+    before, after = 'казино  онлайн', 'казино онлайн'
+    rule_set = RuleSet([{'id': 1, 'word': 'казино онлайн', 'use_regex': False}])
+    assert rule_set.find_violations(before) != rule_set.find_violations(after)
+    assert text_hash(before) != text_hash(after)
+    assert text_hash(after) == text_hash('казино онлайн')
+
+
+def test_filter_links_keeps_original_urls():
+    # Загружается адрес, на который ссылается сайт; канонический вид только убирает повторы
+    rules = build_url_rules('example.com')
+    hrefs = ['/docs/', '/docs', '/list?page', '/x#top', 'https://other.org/']
+    assert filter_links(hrefs, 'https://example.com/', rules) == [
+        'https://example.com/docs/',
+        'https://example.com/list?page',
+        'https://example.com/x',
+    ]
@@ -0,0 +1,136 @@
+"""Число запросов к базе у страниц API не зависит от размера страницы
+
+Каждый обработчик вызывается с разным размером страницы на тестовых данных (контрагенты
+с сессиями, страницы с нарушениями), запросы к базе подсчитываются. Их число не должно превышать
+ожидаемое и не должно расти вместе с размером страницы (N+1: отдельный запрос на каждую строку
+страницы). Нужна база с примененными миграциями (см. фикстуру database).
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from app.api.v1.endpoints.contractors import get_contractor, get_contractors
+from app.api.v1.endpoints.scan_results import get_scan_results
+from app.api.v1.endpoints.scan_sessions import get_scan_session
+from app.models.contractor import Contractor
+from app.models.forbidden_word import ForbiddenWord
+from app.models.scan_result import Violation
+from app.models.scan_session import ScanSession
+from app.models.user import User
+from app.models.webpage import WebPage
+
+
+# Контрагентов, страниц в сессии и нарушений на странице
+CONTRACTORS = 60
+PAGES = 60
+VIOLATIONS = 3
+PAGE_SIZES = (1, 20, 50)
+
+
+class QueryCounter:
+    """Подсчет запросов, выполненных через соединение"""
+
+    METHODS = ('execute_query', 'execute_query_dict', 'execute_insert', 'execute_many')
+
+    def __init__(self, connection):
+        self.count = 0
+        for name in self.METHODS:
+            setattr(connection, name, self._wrap(getattr(connection, name)))
+
+    def _wrap(self, method):
+        async def counted(*args, **kwargs):
+            self.count += 1
+            return await method(*args, **kwargs)
+        return counted
+
+
+async def seed(connection) -> Dict[str, Any]:
+    """Тестовые данные; возвращает пользователя, контрагента и сессию для вызова обработчиков"""
+    user = await User.create(
+        username='query-count', email='query-count@example.com', full_name='query count',
+        hashed_password='-', using_db=connection
+    )
+    words = [
+        await ForbiddenWord.create(word=f'query-count-{w}', category='test', created_by=user, using_db=connection)
+        for w in range(VIOLATIONS)
+    ]
+    contractor = await Contractor.create(
+        name='query-count', domain='query-count.example.com', created_by=user, using_db=connection
+    )
+    session = await ScanSession.create(contractor=contractor, status='completed', using_db=connection)
+    await WebPage.bulk_create([
+        WebPage(
+            contractor=contractor, scan_session=session, url=f'https://query-count.example.com/page/{p}',
+            status='completed', violations_found=True, violations_count=VIOLATIONS
+        )
+        for p in range(PAGES)
+    ], using_db=connection)
+    pages = await WebPage.filter(scan_session=session).using_db(connection).values_list('id', flat=True)
+    await Violation.bulk_create([
+        Violation(webpage_id=page_id, forbidden_word=word, word_found=word.word, context='', position=0)
+        for page_id in pages
+        for word in words
+    ], using_db=connection)
+    for c in range(CONTRACTORS - 1):
+        other = await Contractor.create(
+            name=f'query-count {c}', domain=f'query-count-{c}.example.com', created_by=user, using_db=connection
+        )
+        await ScanSession.create(
+            contractor=other, status='completed', pages_scanned=c, total_violations=c % 3, using_db=connection
+        )
+    return {'user': user, 'contractor': contractor.id, 'session': session.id}
+
+
+def handlers(data: Dict[str, Any]) -> List[Tuple[str, Callable[[int], Awaitable[Any]], int]]:
+    """Обработчики API: название, вызов с размером страницы, допустимое число запросов"""
+    user, contractor, session = data['user'], data['contractor'], data['session']
+    return [
+        (
+            'GET /contractors',
+            lambda page_size: get_contractors(
+                page=1, page_size=page_size, sort='id', min_pages=None, min_violations=None, current_user=user
+            ),
+            2,
+        ),
+        (
+            'GET /contractors (aggregate filter)',
+            lambda page_size: get_contractors(
+                page=1, page_size=page_size, sort='-violations_found', min_pages=1, min_violations=1,
+                current_user=user
+            ),
+            2,
+        ),
+        (
+            'GET /contractors/{id}',
+            lambda page_size: get_contractor(contractor, current_user=user),
+            1,
+        ),
+        (
+            'GET /scan-results',
+            lambda page_size: get_scan_results(page=1, page_size=page_size, current_user=user),
+            3,
+        ),
+        (
+            'GET /scan-sessions/{id}',
+            lambda page_size: get_scan_session(session, page=1, page_size=page_size, current_user=user),
+            4,
+        ),
+    ]
+
+
+def test_handlers_query_count(database):
+    failures = []
+
+    async def check(connection):
+        data = await seed(connection)
+        counter = QueryCounter(connection)
+        for name, call, expected in handlers(data):
+            counts = []
+            for page_size in PAGE_SIZES:
+                counter.count = 0
+                await call(page_size)
+                counts.append(counter.count)
+            if max(counts) > expected:
+                sizes = ', '.join(f'{size}: {count}' for size, count in zip(PAGE_SIZES, counts))
+                failures.append(f"{name}: queries by page size {sizes} (max {expected})")
+
+    database(check)
+    assert not failures, '\n'.join(failures)
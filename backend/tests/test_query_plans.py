@@ -0,0 +1,182 @@
+"""Частые запросы сканера и API используют индексы
+
+На тестовых данных реального соотношения (контрагенты, сессии, страницы, нарушения) собирается
+статистика, и для каждого запроса строится план (EXPLAIN) - без подсказок планировщику: в нем
+должен быть ожидаемый индекс. Нужна база с примененными миграциями (см. фикстуру database).
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from app.models.contractor import Contractor
+from app.models.forbidden_word import ForbiddenWord
+from app.models.scan_result import Violation
+from app.models.scan_session import ScanSession
+from app.models.user import User
+from app.models.webpage import WebPage
+
+
+URL = 'https://example.com/catalog/item'
+BLOB = '0123456789abcdef' * 4
+SINCE = datetime(2025, 1, 1)
+# Объем тестовых данных: контрагенты со страницами, сессии у каждого, страницы в сессии и
+# контрагенты только с сессиями. Выборочность запросов как в рабочей базе: строки одного
+# контрагента - доли процента таблицы
+CONTRACTORS = 20
+SESSIONS = 10
+PAGES = 250
+OTHER_CONTRACTORS = 500
+
+
+async def seed(connection) -> Dict[str, int]:
+    """Тестовые данные; возвращает id записей, по которым строятся запросы"""
+    user = await User.create(
+        username='plan-check', email='plan-check@example.com', full_name='plan check',
+        hashed_password='-', using_db=connection
+    )
+    word = await ForbiddenWord.create(word='plan-check', category='test', created_by=user, using_db=connection)
+    for c in range(CONTRACTORS):
+        contractor = await Contractor.create(
+            name=f'plan-check {c}', domain=f'plan-check-{c}.example.com', created_by=user, using_db=connection
+        )
+        for s in range(SESSIONS):
+            session = await ScanSession.create(contractor=contractor, status='completed', using_db=connection)
+            await WebPage.bulk_create([
+                WebPage(
+                    contractor=contractor, scan_session=session,
+                    url=f'https://plan-check-{c}.example.com/section/{p % 20}/page/{p}',
+                    status='completed',
+                    last_scanned=SINCE + timedelta(days=s), violations_found=p % 50 == 0
+                )
+                for p in range(PAGES)
+            ], using_db=connection)
+    await Contractor.bulk_create([
+        Contractor(name=f'plan-check other {c}', domain=f'plan-check-other-{c}.example.com', created_by=user)
+        for c in range(OTHER_CONTRACTORS)
+    ], using_db=connection)
+    others = await Contractor.filter(name__startswith='plan-check other').using_db(connection).values_list('id', flat=True)
+    await ScanSession.bulk_create([
+        ScanSession(contractor_id=other, status='completed', started_at=SINCE + timedelta(days=s))
+        for other in others
+        for s in range(SESSIONS)
+    ], using_db=connection)
+    pages = await WebPage.filter(violations_found=True).using_db(connection).values_list('id', flat=True)
+    await Violation.bulk_create([
+        Violation(webpage_id=page_id, forbidden_word=word, word_found='plan-check', context='', position=0)
+        for page_id in pages
+    ], using_db=connection)
+    await connection.execute_script('ANALYZE "webpages"; ANALYZE "scan_sessions"; ANALYZE "violations"')
+    return {
+        'contractor': contractor.id,
+        'session': session.id,
+        'page': pages[-1],
+    }
+
+
+def hot_queries(ids: Dict[str, int]) -> List[Tuple[str, Any, Set[str]]]:
+    """Запросы в том виде, в каком их строят сканер и API: название, запрос, допустимые индексы"""
+    contractor, session, page = ids['contractor'], ids['session'], ids['page']
+    return [
+        (
+            'scanner: previous copy of a page',
+            WebPage.filter(contractor_id=contractor, url=URL, status='completed').exclude(scan_session_id=session)
+            .order_by('-last_scanned').limit(1),
+            {'idx_webpages_contractor_url_scanned'},
+        ),
+        (
+            'scanner: page scanned recently (TTL)',
+            WebPage.filter(contractor_id=contractor, url=URL, last_scanned__gte=SINCE - timedelta(hours=1)).limit(1),
+            {'idx_webpages_contractor_url_scanned'},
+        ),
+        (
+            'scanner: page already scanned in session',
+            WebPage.filter(contractor_id=contractor, url=URL, scan_session_id=session).limit(1),
+            {'idx_webpages_contractor_url_scanned'},
+        ),
+        (
+            'scanner: page known without session',
+            WebPage.filter(contractor_id=contractor, url=URL).limit(1),
+            {'idx_webpages_contractor_url_scanned'},
+        ),
+        (
+            'frontier: session URLs',
+            WebPage.filter(scan_session_id=session).values_list('url', flat=True),
+            {'idx_webpages_session'},
+        ),
+        (
+            'scanner: violations of a page',
+            Violation.filter(webpage_id=page),
+            {'uid_violations_webpage_e7bbb7'},
+        ),
+        (
+            'api: violations of a page of results',
+            Violation.filter(webpage_id__in=[page, page - 1]).select_related('forbidden_word'),
+            {'uid_violations_webpage_e7bbb7'},
+        ),
+        (
+            'scanner: newer session of contractor',
+            ScanSession.filter(contractor_id=contractor, started_at__gt=SINCE).limit(1),
+            {'idx_scan_sessions_contractor_started'},
+        ),
+        (
+            'api: sessions of contractor',
+            ScanSession.filter(contractor_id=contractor).order_by('-started_at').limit(20),
+            {'idx_scan_sessions_contractor_started'},
+        ),
+        (
+            'api: pages of session',
+            WebPage.filter(scan_session_id=session).order_by('-id').limit(20),
+            {'idx_webpages_session'},
+        ),
+        (
+            'api: pages of contractor',
+            WebPage.filter(contractor_id=contractor).order_by('-id').limit(20),
+            {'idx_webpages_contractor'},
+        ),
+        (
+            'scanner: pages of contractor (budget without session)',
+            WebPage.filter(contractor_id=contractor).count(),
+            {'idx_webpages_contractor', 'idx_webpages_contractor_url_scanned'},
+        ),
+        (
+            'retention: pages referencing HTML blobs',
+            WebPage.filter(content_blob__in=[BLOB, BLOB[::-1]]).values_list('content_blob', flat=True),
+            {'idx_webpages_content_blob'},
+        ),
+        (
+            'retention: pages referencing text blobs',
+            WebPage.filter(text_blob__in=[BLOB, BLOB[::-1]]).values_list('text_blob', flat=True),
+            {'idx_webpages_text_blob'},
+        ),
+        (
+            'api: pages with violations',
+            WebPage.filter(violations_found=True).order_by('-id').limit(20),
+            {'idx_webpages_violations'},
+        ),
+    ]
+
+
+def plan_indexes(node: Dict[str, Any]) -> Iterable[str]:
+    """Имена индексов во всех узлах плана"""
+    if 'Index Name' in node:
+        yield node['Index Name']
+    for child in node.get('Plans', []):
+        yield from plan_indexes(child)
+
+
+def test_hot_queries_use_indexes(database):
+    failures = []
+
+    async def check(connection):
+        ids = await seed(connection)
+        for name, query, expected in hot_queries(ids):
+            _, rows = await connection.execute_query(f'EXPLAIN (FORMAT JSON) {query.sql(params_inline=True)}')
+            plan = rows[0]['QUERY PLAN']
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = set(plan_indexes(plan[0]['Plan']))
+            if not used & expected:
+                failures.append(f"{name}: {', '.join(sorted(used)) or 'no index'}, expected one of {', '.join(sorted(expected))}")
+
+    database(check)
+    assert not failures, '\n'.join(failures)
@@ -0,0 +1,45 @@
+"""Процессы супервизора делят ядра пула CPU и лимиты вежливости"""
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.workers.supervisor import ScanWorkerSupervisor, share_limits
+
+
+def test_share_limits(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    monkeypatch.setattr(settings, 'scan_cpu_workers', 0)
+    monkeypatch.setattr(settings, 'host_requests_per_second', 2.0)
+    monkeypatch.setattr(settings, 'host_max_concurrency', 4)
+    share_limits(4)
+    assert settings.scan_cpu_workers == 2
+    assert settings.host_requests_per_second == 0.5
+    assert settings.host_max_concurrency == 1
+
+
+def test_share_limits_keeps_explicit_pool(monkeypatch):
+    monkeypatch.setattr(settings, 'scan_cpu_workers', 3)
+    monkeypatch.setattr(settings, 'host_requests_per_second', 2.0)
+    monkeypatch.setattr(settings, 'host_max_concurrency', 4)
+    share_limits(1)
+    assert (settings.scan_cpu_workers, settings.host_requests_per_second, settings.host_max_concurrency) == (3, 2.0, 4)
+
+
+def test_share_limits_rounds_down(monkeypatch):
+    # 5 на 2 процесса - по 2, вместе не больше лимита
+    monkeypatch.setattr(settings, 'scan_cpu_workers', 1)
+    monkeypatch.setattr(settings, 'host_requests_per_second', 2.0)
+    monkeypatch.setattr(settings, 'host_max_concurrency', 5)
+    share_limits(2)
+    assert settings.host_max_concurrency * 2 <= 5
+
+
+def test_processes_above_host_concurrency_are_refused(monkeypatch):
+    # По одному запросу на процесс - уже больше лимита на хост
+    monkeypatch.setattr(settings, 'host_max_concurrency', 2)
+    with pytest.raises(ValueError):
+        share_limits(3)
+    assert settings.host_max_concurrency == 2
+    with pytest.raises(ValueError):
+        ScanWorkerSupervisor(processes=3)
@@ -0,0 +1,40 @@
+"""Отбор регулярных выражений по обязательной строке шаблона и передача набора правил в пул процессов"""
+import pickle
+
+import pytest
+
+from app.services import word_matcher
+from app.services.word_matcher import required_literal
+
+
+def test_required_literal_escapes():
+    assert required_literal(r'\x63asino\d+') == 'casino'
+    assert required_literal(r'\N{LATIN SMALL LETTER B}onus\s+code') == 'bonus'
+
+
+def test_required_literal_without_re_parser(monkeypatch):
+    # Без внутреннего модуля разбора re отбора нет, но построение правил не падает
+    monkeypatch.setattr(word_matcher, '_parser', None)
+    assert required_literal(r'casino\d+') == ''
+
+
+RULES = [
+    {'id': index, 'word': f'word{index}', 'use_regex': False, 'case_sensitive': False, 'severity': 'medium'}
+    for index in range(1000)
+] + [{'id': 1000, 'word': r'casino\d+', 'use_regex': True, 'case_sensitive': False, 'severity': 'high'}]
+
+
+def test_rule_set_ships_words_once(monkeypatch):
+    monkeypatch.setattr(word_matcher, '_restored_rule_sets', {})
+    rule_set = word_matcher.RuleSet(RULES, version=7)
+    task = pickle.dumps(rule_set.find_violations)
+    assert len(task) < 500
+
+    # Процесс пула без этой версии - вызов просит передать слова
+    with pytest.raises(word_matcher.RuleSetMissing):
+        pickle.loads(task)('casino1')
+    found = pickle.loads(pickle.dumps(rule_set.with_words().find_violations))('word5 casino1')
+    assert sorted(violation['forbidden_word_id'] for violation in found) == [5, 1000]
+
+    # Дальше набор берется из кеша процесса
+    assert len(pickle.loads(task)('casino1')) == 1